@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='seen_events',
+            field=models.BinaryField(blank=True, default=b'', help_text='Bitset of UICEvent ids this user has already been asked (see games.utils.seen_set)'),
+        ),
+    ]
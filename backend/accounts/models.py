@@ -6,6 +6,12 @@ class UserProfile(models.Model):
     total_score = models.IntegerField(default=0)
     games_played = models.IntegerField(default=0)
     best_score = models.IntegerField(default=0)
+    seen_events = models.BinaryField(
+        default=b'',
+        blank=True,
+        editable=False,
+        help_text="Bitset of UICEvent ids this user has already been asked (see games.utils.seen_set)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -189,6 +189,106 @@ REST_FRAMEWORK = {
 }
 
 
+# Game Settings
+# Round size and how questions are picked
+
+# Questions per round (fewer if the catalog is smaller)
+GAMES_ROUND_SIZE = config('GAMES_ROUND_SIZE', default=7, cast=int)
+
+# Default question selection: 'random', 'unseen' (no repeats until the catalog is exhausted)
+# or a difficulty mode
+# Clients can override it per round with start_game's 'selection' field
+GAMES_DEFAULT_SELECTION = config('GAMES_DEFAULT_SELECTION', default='random')
+
+# Difficulty modes ('easy', 'medium', 'hard', 'mixed') reweight from EventStats after this
+# many guesses (or 10% of all attempts, if more) or this many seconds. Guesses are counted
+# in the default cache, so workers sharing it (e.g. Redis) all see every guess
+DIFFICULTY_REBUILD_MIN_ATTEMPTS = config('DIFFICULTY_REBUILD_MIN_ATTEMPTS', default=50, cast=int)
+DIFFICULTY_REBUILD_SECONDS = config('DIFFICULTY_REBUILD_SECONDS', default=300, cast=int)
+
+# Dealt question sets kept in memory per worker, so guesses resolve their event without a query
+ROUND_STATE_CACHE_SIZE = config('ROUND_STATE_CACHE_SIZE', default=2048, cast=int)
+ROUND_STATE_TTL_SECONDS = config('ROUND_STATE_TTL_SECONDS', default=3600, cast=int)
+
+# Write-behind for Guess rows: GUESS_BUFFER_SIZE > 0 buffers them in each worker and writes
+# them with bulk_create in batches of that size, at least every GUESS_BUFFER_FLUSH_SECONDS.
+# Round scores are still updated per guess. Set GUESS_BUFFER_JOURNAL_DIR to journal buffered
+# rows to local disk; after a crash, replay them with `manage.py recover_guess_journals`
+GUESS_BUFFER_SIZE = config('GUESS_BUFFER_SIZE', default=0, cast=int)
+GUESS_BUFFER_FLUSH_SECONDS = config('GUESS_BUFFER_FLUSH_SECONDS', default=2.0, cast=float)
+GUESS_BUFFER_JOURNAL_DIR = config('GUESS_BUFFER_JOURNAL_DIR', default='')
+
+# Lifetime of a day's serialized daily challenge in the default cache (event edits clear it)
+DAILY_CHALLENGE_CACHE_SECONDS = config('DAILY_CHALLENGE_CACHE_SECONDS', default=86400, cast=int)
+
+
+# Answer Grading Settings
+# Matcher engine and cache size, per-guess validation limits and catalog autocomplete
+
+MATCHER_CACHE_SIZE = config('MATCHER_CACHE_SIZE', default=512, cast=int)
+
+# Answer matching engine: 'automaton' (default), 'difflib' or 'token_set'
+MATCHER_ENGINE = config('MATCHER_ENGINE', default='automaton')
+
+# Hard cap on the work done validating one guess (0 disables a limit)
+GUESS_VALIDATION_MAX_COMPARISONS = config('GUESS_VALIDATION_MAX_COMPARISONS', default=20000, cast=int)
+# Wall-clock cap; off by default because a slow or descheduled worker would mark
+# a correct guess wrong, while the comparison cap bounds the same work deterministically
+GUESS_VALIDATION_MAX_MICROSECONDS = config('GUESS_VALIDATION_MAX_MICROSECONDS', default=0, cast=int)
+
+# Completions precomputed per trie node, and how often popularity is refreshed
+AUTOCOMPLETE_TOP_K = config('AUTOCOMPLETE_TOP_K', default=20, cast=int)
+AUTOCOMPLETE_REFRESH_SECONDS = config('AUTOCOMPLETE_REFRESH_SECONDS', default=600, cast=int)
+
+# Grade guesses in a pool of worker processes (0 grades inline on the request thread)
+# Saturated or slow grading falls back to exact/prefix/token matching only
+GRADING_POOL_WORKERS = config('GRADING_POOL_WORKERS', default=0, cast=int)
+GRADING_POOL_MAX_PENDING = config('GRADING_POOL_MAX_PENDING', default=64, cast=int)
+GRADING_POOL_TIMEOUT_MS = config('GRADING_POOL_TIMEOUT_MS', default=250, cast=int)
+
+# Compiled answer index shared (memory-mapped) by every worker; empty disables it
+# Rebuild with `manage.py compile_answer_index`; workers pick up new versions on their own
+ANSWER_INDEX_PATH = config('ANSWER_INDEX_PATH', default='')
+ANSWER_INDEX_CHECK_SECONDS = config('ANSWER_INDEX_CHECK_SECONDS', default=30, cast=int)
+
+
+# Image Settings
+# Downscaled variants (thumb/mobile/desktop) are generated whenever an event image changes
+
+IMAGE_VARIANT_WEBP = config('IMAGE_VARIANT_WEBP', default=True, cast=bool)
+
+
+# Background Job Settings
+# Post-game work (profile totals, leaderboard entries) is queued in the database
+# and run by `manage.py run_jobs`
+
+# Failed jobs are retried with exponential backoff this many times in total
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=5, cast=int)
+# A running job held this long is assumed orphaned by a dead worker and re-run
+JOBS_LOCK_SECONDS = config('JOBS_LOCK_SECONDS', default=300, cast=int)
+# Finished jobs are deleted after this many days
+JOBS_KEEP_DONE_DAYS = config('JOBS_KEEP_DONE_DAYS', default=7, cast=int)
+
+
+# Cache Settings
+# Grading verdicts use their own alias; point VERDICT_CACHE_BACKEND at Redis or
+# Memcached to share them across worker processes
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'verdicts': {
+        'BACKEND': config('VERDICT_CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('VERDICT_CACHE_LOCATION', default='verdicts'),
+        'TIMEOUT': config('VERDICT_CACHE_TIMEOUT', default=86400, cast=int),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('VERDICT_CACHE_MAX_ENTRIES', default=50000, cast=int),
+        },
+    },
+}
+
+
 # CORS Settings
 # Frontend origin configuration with credentials support
 
@@ -1,8 +1,9 @@
 from django.contrib import admin
+from django.db.models.functions import Length
+from django.urls import reverse
 from django.utils.html import format_html
 from django import forms
-import base64
-from .models import UICEvent, GameRound, Guess
+from .models import UICEvent, GameRound, Guess, EventStats, DailyChallenge, Job
 
 
 class UICEventAdminForm(forms.ModelForm):
@@ -56,14 +57,14 @@ class UICEventAdmin(admin.ModelAdmin):
     list_filter = ['organization', 'event_date', 'image_format']
     search_fields = ['name', 'description', 'organization']
     ordering = ['name']
-    readonly_fields = ['event_date', 'image_preview', 'image_size']
+    readonly_fields = ['event_date', 'normalized_answers', 'image_preview', 'image_size']
 
     fieldsets = (
         ('Basic Information', {
             'fields': ('name', 'organization', 'description')
         }),
         ('Game Settings', {
-            'fields': ('points_value', 'acceptable_answers')
+            'fields': ('points_value', 'acceptable_answers', 'normalized_answers')
         }),
         ('Media', {
             'fields': ('image_upload', 'image_format', 'image_preview', 'image_size'),
@@ -75,23 +76,25 @@ class UICEventAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # Image bytes stay deferred; only their size is read
+        return super().get_queryset(request).annotate(image_bytes=Length('image_data'))
+
     def image_preview(self, obj):
-        """Show image preview in admin from binary data"""
-        if obj.image_data:
-            # Convert binary data to base64 data URL
-            encoded = base64.b64encode(obj.image_data).decode('utf-8')
-            data_url = f"data:image/{obj.image_format};base64,{encoded}"
+        """Show image preview in admin via the (thumbnail) image endpoint"""
+        if obj.image_sha256:
+            url = f"{reverse('event_image', args=[obj.pk])}?variant=thumb&v={obj.image_sha256[:16]}"
             return format_html(
                 '<img src="{}" style="max-width: 200px; max-height: 200px;" />',
-                data_url
+                url
             )
         return "No image"
     image_preview.short_description = 'Image Preview'
     
     def image_size(self, obj):
         """Show image size in KB"""
-        if obj.image_data:
-            size_kb = len(obj.image_data) / 1024
+        if getattr(obj, 'image_bytes', None):
+            size_kb = obj.image_bytes / 1024
             return f"{size_kb:.1f} KB"
         return "No image"
     image_size.short_description = 'Image Size'
@@ -114,6 +117,7 @@ class GameRoundAdmin(admin.ModelAdmin):
     list_display = [
         'id',
         'user',
+        'round_type',
         'total_score',
         'correct_answers',
         'questions_answered',
@@ -121,7 +125,7 @@ class GameRoundAdmin(admin.ModelAdmin):
         'is_completed',
         'started_at'
     ]
-    list_filter = ['is_completed', 'started_at']
+    list_filter = ['round_type', 'is_completed', 'started_at']
     search_fields = ['user__email']
     readonly_fields = ['started_at', 'completed_at', 'accuracy_display']
     ordering = ['-started_at']
@@ -129,7 +133,7 @@ class GameRoundAdmin(admin.ModelAdmin):
 
     fieldsets = (
         ('User', {
-            'fields': ('user',)
+            'fields': ('user', 'round_type')
         }),
         ('Score & Progress', {
             'fields': ('total_score', 'questions_answered', 'correct_answers', 'accuracy_display')
@@ -180,6 +184,44 @@ class GuessAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(EventStats)
+class EventStatsAdmin(admin.ModelAdmin):
+    """Read-only view of the running per-event guess totals"""
+    list_display = ['event', 'attempts', 'correct', 'accuracy', 'average_time']
+    search_fields = ['event__name']
+    ordering = ['-attempts']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyChallenge)
+class DailyChallengeAdmin(admin.ModelAdmin):
+    """Admin interface for daily challenge decks (build them with build_daily_challenge)"""
+    list_display = ['date', 'question_count', 'created_at']
+    readonly_fields = ['created_at']
+    ordering = ['-date']
+    date_hierarchy = 'date'
+
+    def question_count(self, obj):
+        return len(obj.question_ids)
+    question_count.short_description = 'Questions'
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Admin interface for queued background jobs (run by run_jobs)"""
+    list_display = ['id', 'kind', 'status', 'attempts', 'run_after', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    search_fields = ['dedupe_key', 'last_error']
+    readonly_fields = ['kind', 'payload', 'dedupe_key', 'attempts', 'locked_at', 'last_error',
+                       'created_at', 'finished_at']
+    ordering = ['-id']
+
+
 # Customize admin site header and title
 admin.site.site_header = "UIC Guesser Admin"
 admin.site.site_title = "UIC Guesser Admin Portal"
@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+
+from .grading import answer_index
+from .models import Guess, UICEvent
+from .utils.autocomplete import AutocompleteIndex
+from .utils.normalize import normalize_answer
+from .utils.symspell import SymSpellIndex
+
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogIndex:
+    """
+    Process-wide suggestion index over every UICEvent's acceptable answers
+
+    Built lazily on first use. The suggestion index is kept current one event at
+    a time by the signal handlers in games.signals, so an admin edit never
+    triggers a full rebuild. The autocomplete index is frozen, so an edit marks
+    it stale and it is rebuilt (with fresh popularity) in a background thread,
+    as it is every AUTOCOMPLETE_REFRESH_SECONDS; requests keep completing from
+    the old index until the new one is swapped in. Only the very first build
+    runs on the request path.
+
+    While a compiled answer index is published and no event has been edited
+    since it was written, suggestions come straight from the mapped index and
+    no in-memory SymSpellIndex is built at all.
+    """
+
+    def __init__(self, background=True):
+        """
+        Args:
+            background: Rebuild a stale autocomplete index in a thread (off in tests)
+        """
+        self.background = background
+        self._lock = threading.Lock()
+        self._symspell = None
+        self._autocomplete = None
+        self._autocomplete_built_at = 0.0
+        self._autocomplete_stale = False
+        self._rebuilding = False
+        self._edited_at = 0.0
+
+    def _build_symspell(self):
+        index = SymSpellIndex()
+        for event_id, answers in UICEvent.objects.values_list('id', 'acceptable_answers'):
+            index.add_event(event_id, answers)
+        return index
+
+    def _build_autocomplete(self):
+        events = UICEvent.objects.values_list('id', 'acceptable_answers')
+        # Popularity = correct guesses typed as (a normalized form of) this
+        # answer; typos accepted by the fuzzy matcher credit no answer
+        popularity = Counter()
+        for event_id, user_answer, hits in (
+            Guess.objects.filter(is_correct=True)
+            .values('uic_event', 'user_answer')
+            .annotate(hits=Count('id'))
+            .values_list('uic_event', 'user_answer', 'hits')
+        ):
+            popularity[event_id, normalize_answer(user_answer)] += hits
+        weighted_answers = [
+            (answer, popularity[event_id, normalize_answer(answer)])
+            for event_id, answers in events
+            for answer in answers
+        ]
+        return AutocompleteIndex(weighted_answers, k=getattr(settings, 'AUTOCOMPLETE_TOP_K', 20))
+
+    @property
+    def symspell(self):
+        """SymSpellIndex over the whole catalog, built on first access"""
+        if self._symspell is None:
+            with self._lock:
+                if self._symspell is None:
+                    self._symspell = self._build_symspell()
+        return self._symspell
+
+    @property
+    def autocomplete(self):
+        """AutocompleteIndex over the whole catalog, built on first access"""
+        index = self._autocomplete
+        if index is None:
+            with self._lock:
+                if self._autocomplete is None:
+                    self._autocomplete = self._build_autocomplete()
+                    self._autocomplete_built_at = time.monotonic()
+                return self._autocomplete
+
+        max_age = getattr(settings, 'AUTOCOMPLETE_REFRESH_SECONDS', 600)
+        if self._autocomplete_stale or time.monotonic() - self._autocomplete_built_at > max_age:
+            with self._lock:
+                if self._rebuilding:
+                    return index
+                self._rebuilding = True
+            if self.background:
+                threading.Thread(
+                    target=self._rebuild_autocomplete, args=(True,), name='autocomplete-rebuild', daemon=True
+                ).start()
+            else:
+                self._rebuild_autocomplete()
+        return self._autocomplete
+
+    def _rebuild_autocomplete(self, in_thread=False):
+        # Cleared first, so an edit made during the build triggers another
+        self._autocomplete_stale = False
+        try:
+            index = self._build_autocomplete()
+            with self._lock:
+                if self._autocomplete is not None:
+                    self._autocomplete = index
+                    self._autocomplete_built_at = time.monotonic()
+        except Exception:
+            logger.exception('Could not rebuild the autocomplete index')
+        finally:
+            self._rebuilding = False
+            if in_thread:
+                connection.close()
+
+    def refresh_event(self, uic_event):
+        """
+        Re-index a single event if the index has been built
+
+        Args:
+            uic_event: Saved UICEvent instance
+        """
+        with self._lock:
+            if self._symspell is not None:
+                self._symspell.add_event(uic_event.pk, uic_event.acceptable_answers)
+            self._autocomplete_stale = True
+            self._edited_at = time.time()
+
+    def drop_event(self, event_id):
+        """
+        Remove a single event from the index if it has been built
+
+        Args:
+            event_id: Primary key of the deleted UICEvent
+        """
+        with self._lock:
+            if self._symspell is not None:
+                self._symspell.remove_event(event_id)
+            self._autocomplete_stale = True
+            self._edited_at = time.time()
+
+    def reset(self):
+        """Forget every index; the next access rebuilds from the database"""
+        with self._lock:
+            self._symspell = None
+            self._autocomplete = None
+            self._autocomplete_stale = False
+
+    def suggest(self, query, top_k=5):
+        """
+        Top-k near matches for the query across all events
+
+        Returns:
+            List of dicts: [{'answer', 'event_id', 'distance', 'confidence'}, ...]
+        """
+        mapped = answer_index.index if answer_index is not None else None
+        if mapped is not None and mapped.stat.st_mtime > self._edited_at:
+            return mapped.suggest(query, top_k=top_k)
+
+        index = self.symspell
+        with self._lock:
+            return index.lookup(query, top_k=top_k)
+
+    def complete(self, prefix, limit=10):
+        """
+        Most popular answers starting with the prefix across all events
+
+        Returns:
+            List of tuples: [(answer, popularity), ...]
+        """
+        return self.autocomplete.complete(prefix, limit=limit)
+
+
+catalog_index = CatalogIndex()
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import DailyChallenge, UICEvent
+from .sampling import question_sampler
+from .serializers import IMAGE_MODE_URL, UICEventSerializer
+
+
+def _payload_key(date):
+    return f'daily-challenge:{date.isoformat()}'
+
+
+def get_daily_challenge(date=None, rebuild=False):
+    """
+    The stored deck for a day, drawing it on first use
+
+    Concurrent first requests race on the unique date; get_or_create keeps
+    whichever deck was saved first.
+
+    Args:
+        date: Day of the challenge (defaults to today)
+        rebuild: Draw a new deck even if one exists
+
+    Returns:
+        DailyChallenge
+    """
+    date = date or timezone.localdate()
+    if rebuild:
+        challenge, _ = DailyChallenge.objects.update_or_create(
+            date=date, defaults={'question_ids': question_sampler.sample(settings.GAMES_ROUND_SIZE)}
+        )
+        forget_daily_payload(date)
+        return challenge
+
+    challenge = DailyChallenge.objects.filter(date=date).first()
+    if challenge is None:
+        challenge, _ = DailyChallenge.objects.get_or_create(
+            date=date, defaults={'question_ids': question_sampler.sample(settings.GAMES_ROUND_SIZE)}
+        )
+    return challenge
+
+
+def daily_payload(date=None):
+    """
+    Serialized questions for a day's challenge, shared by every player
+
+    The questions are serialized once in IMAGE_MODE_URL (relative image URLs,
+    no image bytes) and kept in the default cache, so starting a daily round
+    is a cache read plus the GameRound insert.
+
+    Args:
+        date: Day of the challenge (defaults to today)
+
+    Returns:
+        Dict with the date, questions and total_questions
+    """
+    date = date or timezone.localdate()
+    key = _payload_key(date)
+    payload = cache.get(key)
+    if payload is not None:
+        return payload
+
+    challenge = get_daily_challenge(date)
+    events_by_id = UICEvent.objects.in_bulk(challenge.question_ids)
+    events = [events_by_id[event_id] for event_id in challenge.question_ids if event_id in events_by_id]
+    payload = {
+        'date': date.isoformat(),
+        'questions': UICEventSerializer(events, many=True, image_mode=IMAGE_MODE_URL).data,
+        'total_questions': len(events),
+    }
+    cache.set(key, payload, settings.DAILY_CHALLENGE_CACHE_SECONDS)
+    return payload
+
+
+def forget_daily_payload(date=None):
+    """Drop a day's cached payload (e.g. one of its events was edited)"""
+    cache.delete(_payload_key(date or timezone.localdate()))
@@ -0,0 +1,263 @@
+import logging
+import math
+import random
+import threading
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from itertools import accumulate
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+
+from .models import EventStats, UICEvent
+
+
+logger = logging.getLogger(__name__)
+
+# Target difficulty (0 = everyone gets it, 1 = nobody does) per selection mode
+DIFFICULTY_TARGETS = {
+    'easy': 0.25,
+    'medium': 0.5,
+    'hard': 0.75,
+}
+# 'mixed' rounds split the questions evenly across these, easiest first
+DIFFICULTY_MIXED = 'mixed'
+
+# Accuracy prior: events start at 50% as if they had PRIOR_ATTEMPTS guesses
+PRIOR_ATTEMPTS = 5
+# Average answer time that counts as half-way slow (seconds)
+TIME_HALF_SECONDS = 15.0
+# Share of difficulty that comes from answer time rather than accuracy
+TIME_WEIGHT = 0.2
+# How tightly sampling concentrates around the target, and the floor that
+# keeps every event reachable
+SPREAD = 0.15
+MIN_WEIGHT = 0.01
+
+# Guesses recorded by every worker sharing the default cache
+ATTEMPTS_CACHE_KEY = 'difficulty:attempts'
+
+# One built weight table: event ids, cumulative weights per target, when it was
+# built, the total attempts it reflects and the shared attempt counter at the time
+WeightTable = namedtuple('WeightTable', ['ids', 'cumulative', 'built_at', 'attempts', 'counter'])
+
+
+def record_attempt(event_id, is_correct, time_taken):
+    """
+    Add one guess to an event's running totals without reading them
+
+    Args:
+        event_id: Primary key of the UICEvent
+        is_correct: Whether the guess was accepted
+        time_taken: Seconds the player took
+    """
+    try:
+        time_taken = max(0.0, float(time_taken or 0))
+    except (TypeError, ValueError):
+        time_taken = 0.0
+
+    updated = EventStats.objects.filter(event_id=event_id).update(
+        attempts=F('attempts') + 1,
+        correct=F('correct') + (1 if is_correct else 0),
+        time_sum=F('time_sum') + time_taken,
+        time_sq_sum=F('time_sq_sum') + time_taken * time_taken,
+    )
+    if not updated:
+        # First guess for this event; a concurrent first guess just re-runs the update
+        stats, created = EventStats.objects.get_or_create(
+            event_id=event_id,
+            defaults={
+                'attempts': 1,
+                'correct': 1 if is_correct else 0,
+                'time_sum': time_taken,
+                'time_sq_sum': time_taken * time_taken,
+            }
+        )
+        if not created:
+            return record_attempt(event_id, is_correct, time_taken)
+
+    difficulty_sampler.note_attempt()
+
+
+def event_difficulty(attempts, correct, time_sum):
+    """
+    Difficulty score in [0, 1] from an event's running totals
+
+    Accuracy is smoothed towards 50% so a couple of lucky guesses do not make
+    an event look trivial; slow average answers add a little on top.
+    """
+    accuracy = (correct + PRIOR_ATTEMPTS / 2) / (attempts + PRIOR_ATTEMPTS)
+    average_time = time_sum / attempts if attempts else TIME_HALF_SECONDS
+    slowness = average_time / (average_time + TIME_HALF_SECONDS)
+    return (1 - TIME_WEIGHT) * (1 - accuracy) + TIME_WEIGHT * slowness
+
+
+class DifficultySampler:
+    """
+    Weighted question sampler that favours events near a target difficulty
+
+    Difficulties come from EventStats in one query and are turned into one
+    cumulative weight array per target, so a draw is a bisect. The arrays are
+    only rebuilt when the stats have changed materially: after
+    DIFFICULTY_REBUILD_MIN_ATTEMPTS guesses (or 10% of all attempts, if more)
+    counted in the default cache, so every worker sharing it sees them, after
+    DIFFICULTY_REBUILD_SECONDS, or when an event is added or deleted.
+
+    Only the very first table is built on the request path. Later rebuilds
+    run in a background thread while draws keep using the current table,
+    which is then swapped in whole.
+    """
+
+    def __init__(self, background=True):
+        """
+        Args:
+            background: Rebuild stale tables in a thread (off in tests)
+        """
+        self.background = background
+        self._lock = threading.Lock()
+        self._table = None
+        self._invalidated = False
+        self._rebuilding = False
+        self.rebuilds = 0
+
+    def note_attempt(self, count=1):
+        """Count recorded guesses towards the next rebuild, across processes"""
+        try:
+            cache.incr(ATTEMPTS_CACHE_KEY, count)
+        except ValueError:
+            if not cache.add(ATTEMPTS_CACHE_KEY, count, timeout=None):
+                cache.incr(ATTEMPTS_CACHE_KEY, count)
+
+    def invalidate(self):
+        """Rebuild soon (e.g. the catalog changed), drawing from the current table meanwhile"""
+        self._invalidated = True
+
+    def reset(self):
+        """Drop the table; the next draw rebuilds it on the spot"""
+        with self._lock:
+            self._table = None
+            self._invalidated = False
+
+    def _stale(self, table):
+        if self._invalidated:
+            return True
+        min_attempts = getattr(settings, 'DIFFICULTY_REBUILD_MIN_ATTEMPTS', 50)
+        max_age = getattr(settings, 'DIFFICULTY_REBUILD_SECONDS', 300)
+        counter = cache.get(ATTEMPTS_CACHE_KEY, 0)
+        # A counter below the table's means the cache was cleared
+        return (counter < table.counter
+                or counter - table.counter >= max(min_attempts, table.attempts // 10)
+                or time.monotonic() - table.built_at > max_age)
+
+    def _build(self):
+        counter = cache.get(ATTEMPTS_CACHE_KEY, 0)
+        stats = {
+            event_id: (attempts, correct, time_sum)
+            for event_id, attempts, correct, time_sum in EventStats.objects.values_list(
+                'event_id', 'attempts', 'correct', 'time_sum'
+            )
+        }
+        ids = list(UICEvent.objects.order_by().values_list('id', flat=True))
+        difficulties = [event_difficulty(*stats.get(event_id, (0, 0, 0.0))) for event_id in ids]
+
+        cumulative = {}
+        for name, target in DIFFICULTY_TARGETS.items():
+            weights = (
+                math.exp(-0.5 * ((difficulty - target) / SPREAD) ** 2) + MIN_WEIGHT
+                for difficulty in difficulties
+            )
+            cumulative[name] = list(accumulate(weights))
+
+        self.rebuilds += 1
+        return WeightTable(
+            ids=ids,
+            cumulative=cumulative,
+            built_at=time.monotonic(),
+            attempts=sum(attempts for attempts, _, _ in stats.values()),
+            counter=counter,
+        )
+
+    def _current_table(self):
+        """The table to draw from, scheduling a rebuild if it is stale"""
+        table = self._table
+        if table is None:
+            with self._lock:
+                if self._table is None:
+                    self._invalidated = False
+                    self._table = self._build()
+                return self._table
+
+        if self._stale(table):
+            with self._lock:
+                if self._rebuilding:
+                    return table
+                self._rebuilding = True
+            if self.background:
+                threading.Thread(target=self._rebuild, args=(True,), name='difficulty-rebuild', daemon=True).start()
+            else:
+                self._rebuild()
+        return self._table
+
+    def _rebuild(self, in_thread=False):
+        # Cleared first, so an invalidation during the build triggers another
+        self._invalidated = False
+        try:
+            self._table = self._build()
+        except Exception:
+            logger.exception('Could not rebuild the difficulty table')
+        finally:
+            self._rebuilding = False
+            if in_thread:
+                connection.close()
+
+    def sample(self, k, difficulty):
+        """
+        Pick up to k distinct event ids weighted towards a difficulty
+
+        Args:
+            k: Number of questions wanted
+            difficulty: Name in DIFFICULTY_TARGETS, or DIFFICULTY_MIXED
+
+        Returns:
+            List of event ids (all of them if fewer than k exist)
+        """
+        table = self._current_table()
+        ids = table.ids
+        if not ids:
+            return []
+
+        if difficulty == DIFFICULTY_MIXED:
+            # Spread k evenly over the targets, easiest first
+            names = list(DIFFICULTY_TARGETS)
+            plan = [
+                (name, k * (i + 1) // len(names) - k * i // len(names))
+                for i, name in enumerate(names)
+            ]
+        else:
+            plan = [(difficulty, k)]
+
+        chosen = []
+        picked = set()
+        for name, count in plan:
+            cumulative = table.cumulative[name]
+            wanted = min(len(chosen) + count, len(ids))
+            for _ in range(8 * count + 8):
+                if len(chosen) >= wanted:
+                    break
+                index = bisect_right(cumulative, random.random() * cumulative[-1])
+                event_id = ids[min(index, len(ids) - 1)]
+                if event_id not in picked:
+                    picked.add(event_id)
+                    chosen.append(event_id)
+
+        # Heavily weighted catalogs can keep drawing the same events; top up uniformly
+        if len(chosen) < min(k, len(ids)):
+            rest = [event_id for event_id in ids if event_id not in picked]
+            chosen += random.sample(rest, min(k, len(ids)) - len(chosen))
+        return chosen
+
+
+difficulty_sampler = DifficultySampler()
@@ -0,0 +1,165 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import UICEvent
+from .utils.answer_index import AnswerIndexLoader
+from .utils.batch_grader import BatchGrader
+from .utils.budget import BudgetStats, ValidationBudget
+from .utils.fuzzy_matcher import DEFAULT_ENGINE
+from .utils.grading_pool import GradingPool, run_grading
+from .utils.matcher_cache import MatcherCache, answers_version
+from .utils.normalize import normalize_answer
+from .utils.verdict_cache import VerdictCache
+
+
+logger = logging.getLogger(__name__)
+
+
+# Memory-mapped answer index published by `manage.py compile_answer_index`
+answer_index = None
+if getattr(settings, 'ANSWER_INDEX_PATH', ''):
+    answer_index = AnswerIndexLoader(
+        settings.ANSWER_INDEX_PATH,
+        check_seconds=getattr(settings, 'ANSWER_INDEX_CHECK_SECONDS', 30)
+    )
+
+# Process-wide registry of compiled matchers, invalidated by games.signals
+matcher_cache = MatcherCache(
+    max_size=getattr(settings, 'MATCHER_CACHE_SIZE', 512),
+    tolerance=0.8,  # 80% minimum similarity
+    engine=getattr(settings, 'MATCHER_ENGINE', DEFAULT_ENGINE),
+    answer_index=answer_index
+)
+
+# Verdicts live in the 'verdicts' cache alias so they can be shared across workers
+verdict_cache = VerdictCache(caches['verdicts'], namespace=matcher_cache.engine)
+
+# Aggregate cost accounting for every validation graded in this process
+budget_stats = BudgetStats()
+
+# Optional out-of-process grading (GRADING_POOL_WORKERS = 0 grades inline)
+grading_pool = None
+if getattr(settings, 'GRADING_POOL_WORKERS', 0) > 0:
+    grading_pool = GradingPool(
+        workers=settings.GRADING_POOL_WORKERS,
+        max_pending=getattr(settings, 'GRADING_POOL_MAX_PENDING', 64),
+        timeout_ms=getattr(settings, 'GRADING_POOL_TIMEOUT_MS', 250),
+        engine=matcher_cache.engine,
+        tolerance=matcher_cache.tolerance,
+        cache_size=matcher_cache.max_size,
+        max_comparisons=getattr(settings, 'GUESS_VALIDATION_MAX_COMPARISONS', None) or None,
+        max_microseconds=getattr(settings, 'GUESS_VALIDATION_MAX_MICROSECONDS', None) or None,
+        answer_index_path=getattr(settings, 'ANSWER_INDEX_PATH', ''),
+    )
+
+
+def new_budget():
+    """
+    Create a ValidationBudget from the GUESS_VALIDATION_* settings
+
+    A limit of 0 (or unset) means unbounded.
+    """
+    return ValidationBudget(
+        max_comparisons=getattr(settings, 'GUESS_VALIDATION_MAX_COMPARISONS', None) or None,
+        max_microseconds=getattr(settings, 'GUESS_VALIDATION_MAX_MICROSECONDS', None) or None,
+    )
+
+
+def grade_guess(uic_event, user_answer):
+    """
+    Grade a user's answer against an event's acceptable answers
+
+    Args:
+        uic_event: UICEvent being guessed
+        user_answer: User's submitted answer
+
+    Returns:
+        Tuple: (is_correct, matched_answer, confidence, suggestions)
+    """
+    version = answers_version(uic_event.acceptable_answers)
+    # Normalize the guess once; the cache key and every strategy use this form
+    normalized_answer = normalize_answer(user_answer)
+
+    verdict = verdict_cache.get(uic_event.pk, version, normalized_answer)
+    if verdict is not None:
+        return verdict
+
+    if grading_pool is not None:
+        result = _grade_in_pool(uic_event, version, normalized_answer)
+        if result is None:
+            return _fallback_verdict(uic_event, version, normalized_answer)
+        verdict, budget = result
+    else:
+        budget = new_budget()
+        verdict = run_grading(matcher_cache.get(uic_event, version), normalized_answer, budget)
+
+    budget_stats.record(budget)
+
+    # A cut-off search is not a real verdict, so never memoize it
+    if budget.exhausted:
+        logger.warning(
+            'Answer validation for event %s hit its budget: %s', uic_event.pk, budget.report()
+        )
+    else:
+        verdict_cache.set(uic_event.pk, version, normalized_answer, verdict)
+    return verdict
+
+
+def _grade_in_pool(uic_event, version, normalized_answer):
+    """
+    Grade in the process pool, starting it (pre-warmed from the catalog) on first use
+
+    Returns:
+        Tuple: (verdict, budget), or None if the pool could not grade in time
+    """
+    if not grading_pool.started:
+        warm_events = [
+            (event.pk, answers_version(event.acceptable_answers),
+             event.acceptable_answers, event.normalized_answers)
+            for event in UICEvent.objects.only(
+                'id', 'acceptable_answers', 'normalized_answers'
+            )[:matcher_cache.max_size]
+        ]
+        grading_pool.start(warm_events)
+
+    return grading_pool.grade(
+        uic_event.pk, version, uic_event.acceptable_answers,
+        uic_event.normalized_answers, normalized_answer
+    )
+
+
+def _fallback_verdict(uic_event, version, normalized_answer):
+    """
+    Verdict used when the grading pool is saturated or too slow
+
+    Only the constant-time strategies run on the request thread; a guess that
+    would need the fuzzy search is marked incorrect. Never cached.
+    """
+    logger.warning('Grading pool unavailable for event %s, using fast strategies only', uic_event.pk)
+    verdict = matcher_cache.get(uic_event, version).match_fast(normalized_answer)
+    if verdict is None:
+        return False, None, 0.0, []
+    return verdict + ([],)
+
+
+def grade_answers_batch(pairs):
+    """
+    Grade many answers in one pass, reusing the cached compiled matchers
+
+    Args:
+        pairs: List of (event_id, user_answer) tuples
+
+    Returns:
+        List aligned with pairs of (is_correct, matched_answer, confidence)
+        tuples, or None where the event does not exist
+    """
+    events = UICEvent.objects.only('id', 'acceptable_answers', 'normalized_answers').in_bulk(
+        {event_id for event_id, _ in pairs}
+    )
+    grader = BatchGrader(
+        tolerance=matcher_cache.tolerance,
+        matcher_for=lambda event_id, answers: matcher_cache.get(events[event_id])
+    )
+    return grader.grade(pairs, {pk: event.acceptable_answers for pk, event in events.items()})
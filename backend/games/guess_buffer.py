@@ -0,0 +1,358 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import InterfaceError, OperationalError, connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import Guess
+
+
+logger = logging.getLogger(__name__)
+
+# Guess columns written to the journal, in this order
+JOURNAL_FIELDS = (
+    'game_round_id', 'uic_event_id', 'user_answer', 'is_correct', 'time_taken', 'points_earned', 'created_at'
+)
+
+
+def _journal_line(guess):
+    row = {field: getattr(guess, field) for field in JOURNAL_FIELDS}
+    row['created_at'] = guess.created_at.isoformat()
+    return json.dumps(row) + '\n'
+
+
+def _insertable(guess):
+    """
+    Whether a Guess row would insert without a data error
+
+    Field values are checked (and coerced, e.g. a numeric string time_taken)
+    against the model; foreign keys are left to the database.
+    """
+    try:
+        guess.clean_fields(exclude=['game_round', 'uic_event'])
+    except ValidationError:
+        return False
+    return True
+
+
+def _guess_from_line(line):
+    row = json.loads(line)
+    row['created_at'] = parse_datetime(row['created_at'])
+    return Guess(**row)
+
+
+class GuessBuffer:
+    """
+    Write-behind buffer that turns Guess INSERTs into periodic bulk_creates
+
+    Callers keep GameRound's counters authoritative themselves (see
+    services.record_guess) and hand the Guess rows over here. Rows are
+    flushed by a background thread every flush_seconds, as soon as batch_size
+    rows are waiting, and at interpreter exit.
+
+    With a journal_dir, every buffered row is first appended to a per-process
+    JSONL journal, so rows lost in a crash can be replayed with
+    `manage.py recover_guess_journals`. Each flush moves the journal aside
+    before writing and deletes it once the rows are committed.
+
+    When max_pending rows are already waiting (the database is not keeping
+    up), or a row would not insert cleanly, add() refuses the rows and the
+    caller inserts them directly, so the error surfaces in its own
+    transaction. Rows that still fail at flush time are written to a
+    dead-letter file in journal_dir (or logged and dropped without one)
+    instead of blocking the buffer.
+    """
+
+    def __init__(self, batch_size=200, flush_seconds=2.0, max_pending=None, journal_dir='', background=True):
+        """
+        Args:
+            batch_size: Rows per bulk_create, and the backlog that triggers an early flush
+            flush_seconds: Longest a row waits before it is flushed
+            max_pending: Rows buffered before add() refuses more (default 10 batches)
+            journal_dir: Directory for the crash-recovery journal ('' disables it)
+            background: Start the flusher thread on first use (off in tests)
+        """
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending or 10 * batch_size
+        self.journal_dir = journal_dir
+        self.background = background
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._journal = None
+        self.buffered = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.refused = 0
+        self.failures = 0
+        self.dead_lettered = 0
+
+    @property
+    def journal_path(self):
+        return os.path.join(self.journal_dir, f'guesses-{os.getpid()}.jsonl')
+
+    @property
+    def dead_letter_path(self):
+        # Not named guesses-*, so recover_journals never replays it
+        return os.path.join(self.journal_dir, f'dead-letter-{os.getpid()}.jsonl')
+
+    def accepts(self, guesses):
+        """Whether every row passes the field checks add() makes"""
+        return all(_insertable(guess) for guess in guesses)
+
+    def add(self, guesses):
+        """
+        Queue unsaved Guess rows for the next flush
+
+        Args:
+            guesses: Unsaved Guess instances
+
+        Returns:
+            True if the rows were buffered, False if the buffer is full (or a
+            row is invalid) and the caller should insert them itself
+        """
+        if not self.accepts(guesses):
+            with self._lock:
+                self.refused += len(guesses)
+            return False
+
+        with self._lock:
+            if len(self._pending) + len(guesses) > self.max_pending:
+                self.refused += len(guesses)
+                return False
+            if self.journal_dir:
+                self._write_journal(guesses)
+            self._pending.extend(guesses)
+            self.buffered += len(guesses)
+            backlog = len(self._pending)
+
+        if self.background:
+            self._ensure_thread()
+            if backlog >= self.batch_size:
+                self._wake.set()
+        return True
+
+    def _write_journal(self, guesses):
+        if self._journal is None:
+            os.makedirs(self.journal_dir, exist_ok=True)
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        self._journal.write(''.join(_journal_line(guess) for guess in guesses))
+        self._journal.flush()
+
+    def flush(self):
+        """
+        Write every waiting row with bulk_create
+
+        If the batch is rejected for its contents (a constraint broken because
+        the round was deleted in the meantime, a value the database refuses)
+        the rows are retried one by one and the bad ones dead-lettered. If the
+        database is unreachable the unwritten rows go back to the front of the
+        buffer (and journal) for the next attempt.
+
+        Returns:
+            Number of rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                rotated = None
+                if self._journal is not None:
+                    self._journal.close()
+                    self._journal = None
+                    rotated = f'{self.journal_path}.flushing'
+                    os.replace(self.journal_path, rotated)
+            if not batch:
+                if rotated is not None:
+                    os.remove(rotated)
+                return 0
+
+            try:
+                # A savepoint when called inside a transaction, so a rejected
+                # batch leaves it usable for the row-by-row retry
+                with transaction.atomic():
+                    Guess.objects.bulk_create(batch, batch_size=self.batch_size)
+                written, unsent = batch, []
+            except (OperationalError, InterfaceError):
+                logger.exception('Could not flush %d buffered guesses', len(batch))
+                written, unsent = [], batch
+            except Exception:
+                written, unsent = self._insert_each(batch)
+
+            with self._lock:
+                if unsent:
+                    self.failures += 1
+                    self._pending[:0] = unsent
+                    if rotated is not None:
+                        self._write_journal(unsent)
+                if written:
+                    self.flushed += len(written)
+                    self.flushes += 1
+            if rotated is not None:
+                os.remove(rotated)
+            return len(written)
+
+    def _insert_each(self, batch):
+        """
+        Insert rows one at a time
+
+        A row that fails is dead-lettered; a lost connection stops the loop.
+
+        Returns:
+            (written rows, rows still to send)
+        """
+        written = []
+        dead = []
+        for i, guess in enumerate(batch):
+            try:
+                with transaction.atomic():
+                    guess.save(force_insert=True)
+            except (OperationalError, InterfaceError):
+                logger.exception('Could not flush %d buffered guesses', len(batch) - i)
+                self._dead_letter(dead)
+                return written, batch[i:]
+            except Exception as e:
+                logger.warning(
+                    'Dead-lettering buffered guess for round %s, event %s: %s',
+                    guess.game_round_id, guess.uic_event_id, e
+                )
+                dead.append(guess)
+            else:
+                written.append(guess)
+        self._dead_letter(dead)
+        return written, []
+
+    def _dead_letter(self, guesses):
+        if not guesses:
+            return
+        with self._lock:
+            self.dead_lettered += len(guesses)
+        if not self.journal_dir:
+            return
+        os.makedirs(self.journal_dir, exist_ok=True)
+        with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+            for guess in guesses:
+                row = {field: getattr(guess, field) for field in JOURNAL_FIELDS}
+                f.write(json.dumps(row, default=str) + '\n')
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='guess-buffer', daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            finally:
+                # Each flush may run long after the last; never reuse a dropped connection
+                connection.close()
+
+    def shutdown(self):
+        """Flush whatever is waiting (registered with atexit)"""
+        while self._pending:
+            if not self.flush():
+                break
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+            if not self._pending:
+                os.remove(self.journal_path)
+
+    def stats(self):
+        """
+        Snapshot of buffer counters
+
+        Returns:
+            Dict with rows pending, buffered, flushed, refused and dead-lettered,
+            flush count and failures
+        """
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'batch_size': self.batch_size,
+                'buffered': self.buffered,
+                'flushed': self.flushed,
+                'flushes': self.flushes,
+                'refused': self.refused,
+                'failures': self.failures,
+                'dead_lettered': self.dead_lettered,
+            }
+
+
+def recover_journals(journal_dir, include_live=False):
+    """
+    Insert the rows left in the journals of processes that died before flushing
+
+    A journal is claimed by renaming it first, so two recoveries never replay
+    the same file. Journals of processes that are still running are skipped
+    unless include_live is set.
+
+    Args:
+        journal_dir: GUESS_BUFFER_JOURNAL_DIR
+        include_live: Also replay journals whose process id is still running
+
+    Returns:
+        List of (journal path, rows inserted)
+    """
+    recovered = []
+    for path in sorted(glob.glob(os.path.join(journal_dir, 'guesses-*.jsonl*'))):
+        name = os.path.basename(path)
+        if '.recovering-' in name:
+            continue
+        pid = int(name.split('-', 1)[1].split('.', 1)[0])
+        if not include_live and pid != os.getpid() and _process_alive(pid):
+            continue
+
+        claimed = f'{path}.recovering-{os.getpid()}'
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            continue  # claimed by another recovery
+        with open(claimed, encoding='utf-8') as f:
+            # A crash mid-write can leave a torn last line
+            rows = []
+            for line in f:
+                try:
+                    rows.append(_guess_from_line(line))
+                except (ValueError, TypeError):
+                    logger.warning('Skipping unreadable line in %s', claimed)
+        Guess.objects.bulk_create(rows, batch_size=500)
+        os.remove(claimed)
+        recovered.append((path, len(rows)))
+    return recovered
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Optional write-behind for Guess rows (GUESS_BUFFER_SIZE = 0 inserts them inline)
+guess_buffer = None
+if getattr(settings, 'GUESS_BUFFER_SIZE', 0) > 0:
+    guess_buffer = GuessBuffer(
+        batch_size=settings.GUESS_BUFFER_SIZE,
+        flush_seconds=getattr(settings, 'GUESS_BUFFER_FLUSH_SECONDS', 2.0),
+        journal_dir=getattr(settings, 'GUESS_BUFFER_JOURNAL_DIR', ''),
+    )
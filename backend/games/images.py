@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.db import transaction
+
+from .models import UICEvent, UICEventImageVariant
+from .utils.images import build_variants
+
+
+def store_image_variants(event_id, source_sha256, variants):
+    """
+    Replace an event's stored variants with freshly built ones
+
+    The event's variants_sha256 is set to source_sha256 even when there are no
+    variants (an undecodable image, or one smaller than every variant width),
+    so generate_image_variants does not retry it until the image changes.
+
+    Args:
+        event_id: Primary key of the UICEvent
+        source_sha256: image_sha256 of the image the variants were built from
+        variants: Output of build_variants()
+    """
+    with transaction.atomic():
+        UICEventImageVariant.objects.filter(event_id=event_id).delete()
+        UICEventImageVariant.objects.bulk_create([
+            UICEventImageVariant(event_id=event_id, source_sha256=source_sha256, **variant)
+            for variant in variants
+        ])
+        UICEvent.objects.filter(pk=event_id).update(variants_sha256=source_sha256)
+
+
+def sync_image_variants(event):
+    """
+    Regenerate an event's image variants from its current image
+
+    Args:
+        event: UICEvent with image_data loaded
+
+    Returns:
+        Number of variants stored
+    """
+    variants = []
+    if event.image_data:
+        variants = build_variants(
+            bytes(event.image_data), webp=getattr(settings, 'IMAGE_VARIANT_WEBP', True)
+        )
+    store_image_variants(event.pk, event.image_sha256, variants)
+    event.variants_sha256 = event.image_sha256
+    return len(variants)
+
+
+def pick_variant(event, name=None, width=None, accept_webp=False):
+    """
+    Choose the stored variant that best fits a request
+
+    Args:
+        event: UICEvent (image_data may be deferred)
+        name: Variant name ('thumb', 'mobile', 'desktop')
+        width: Smallest acceptable width in pixels
+        accept_webp: Prefer WebP copies when the client supports them
+
+    Returns:
+        UICEventImageVariant without image_data loaded, or None to use the original
+    """
+    variants = list(
+        UICEventImageVariant.objects.filter(event_id=event.pk, source_sha256=event.image_sha256)
+        .defer('image_data')
+    )
+    if name is not None:
+        variants = [variant for variant in variants if variant.name == name]
+    elif width is not None:
+        # Smallest variant at least as wide as asked; the original if none is
+        variants = [variant for variant in variants if variant.width >= width]
+        if variants:
+            smallest = min(variant.width for variant in variants)
+            variants = [variant for variant in variants if variant.width == smallest]
+    else:
+        return None
+
+    for variant in variants:
+        if (variant.image_format == 'webp') == accept_webp:
+            return variant
+    return variants[0] if variants else None
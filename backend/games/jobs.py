@@ -0,0 +1,205 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Min, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import GameRound, Job
+
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> handler(payload); handlers run in the same transaction that marks the job done
+HANDLERS = {}
+
+
+def handler(kind):
+    """Register a function as the handler for a job kind"""
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(jobs):
+    """
+    Queue jobs, skipping any whose dedupe key is already queued (or was run)
+
+    Call inside the transaction that makes the work necessary, so the jobs
+    exist exactly when that change is committed.
+
+    Args:
+        jobs: List of (kind, payload, dedupe_key)
+    """
+    Job.objects.bulk_create(
+        [Job(kind=kind, payload=payload, dedupe_key=dedupe_key) for kind, payload, dedupe_key in jobs],
+        ignore_conflicts=True
+    )
+
+
+def claim(limit):
+    """
+    Lock the next due jobs for this worker
+
+    Pending jobs whose run_after has passed are taken in id order, as are
+    running jobs whose worker has held them for longer than JOBS_LOCK_SECONDS
+    (it most likely died). On PostgreSQL concurrent workers skip each other's
+    rows instead of waiting on them.
+
+    Returns:
+        List of claimed Jobs
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'JOBS_LOCK_SECONDS', 300))
+    due = Job.objects.filter(
+        Q(status=Job.STATUS_PENDING, run_after__lte=now)
+        | Q(status=Job.STATUS_RUNNING, locked_at__lt=stale)
+    ).order_by('id')
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        jobs = list(due[:limit])
+        Job.objects.filter(id__in=[job.id for job in jobs]).update(
+            status=Job.STATUS_RUNNING, locked_at=now, attempts=F('attempts') + 1
+        )
+    for job in jobs:
+        job.locked_at = now
+    return jobs
+
+
+def run_job(job):
+    """
+    Run one claimed job
+
+    The handler and the job's 'done' marker commit together, and the marker
+    only applies while this worker's claim still stands, so a job's effects
+    are committed exactly once even if a stale claim was taken over. Failures
+    are retried with exponential backoff up to JOBS_MAX_ATTEMPTS, then the job
+    is marked failed.
+
+    Returns:
+        True if the job succeeded
+    """
+    run = HANDLERS.get(job.kind)
+    try:
+        if run is None:
+            raise LookupError(f'No handler for job kind {job.kind!r}')
+        with transaction.atomic():
+            still_ours = Job.objects.filter(
+                id=job.id, status=Job.STATUS_RUNNING, locked_at=job.locked_at
+            ).update(status=Job.STATUS_DONE, finished_at=timezone.now(), last_error='')
+            if not still_ours:
+                logger.warning('Job %s was taken over by another worker; skipping', job.id)
+                return False
+            run(job.payload)
+        return True
+    except Exception as e:
+        logger.exception('Job %s (%s) failed', job.id, job.kind)
+        attempts = job.attempts + 1
+        if attempts >= getattr(settings, 'JOBS_MAX_ATTEMPTS', 5):
+            update = {'status': Job.STATUS_FAILED, 'finished_at': timezone.now()}
+        else:
+            update = {
+                'status': Job.STATUS_PENDING,
+                'run_after': timezone.now() + timedelta(seconds=2 ** attempts),
+            }
+        Job.objects.filter(id=job.id, locked_at=job.locked_at).update(
+            last_error=f'{type(e).__name__}: {e}', locked_at=None, **update
+        )
+        return False
+
+
+def run_pending(limit=100):
+    """
+    Claim and run one batch of due jobs
+
+    Returns:
+        (succeeded, failed) counts; (0, 0) when nothing was due
+    """
+    succeeded = failed = 0
+    for job in claim(limit):
+        if run_job(job):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
+
+
+def purge_done(older_than_days):
+    """Delete finished jobs older than a number of days; returns how many"""
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    deleted, _ = Job.objects.filter(status=Job.STATUS_DONE, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def job_stats():
+    """
+    Queue depth and lag
+
+    Returns:
+        Dict with pending, running and failed counts and the age in seconds
+        of the oldest due job (0 when the queue is drained)
+    """
+    now = timezone.now()
+    counts = {status_name: 0 for status_name in (Job.STATUS_PENDING, Job.STATUS_RUNNING, Job.STATUS_FAILED)}
+    counts.update(
+        Job.objects.exclude(status=Job.STATUS_DONE).order_by().values('status').annotate(
+            total=Count('id')
+        ).values_list('status', 'total')
+    )
+    oldest = Job.objects.filter(status=Job.STATUS_PENDING, run_after__lte=now).aggregate(
+        oldest=Min('created_at')
+    )['oldest']
+    return {
+        **counts,
+        'lag_seconds': round((now - oldest).total_seconds(), 3) if oldest else 0,
+    }
+
+
+# Post-game work enqueued by services.complete_round
+
+POST_GAME_JOBS = ('post_game.profile', 'post_game.leaderboard')
+
+
+def post_game_jobs(game_round_id):
+    """(kind, payload, dedupe_key) for every post-game job of a round"""
+    return [(kind, {'game_round_id': game_round_id}, f'{kind}:{game_round_id}') for kind in POST_GAME_JOBS]
+
+
+@handler('post_game.profile')
+def update_profile(payload):
+    """Add a completed round to its player's games played, total and best score"""
+    from accounts.models import UserProfile
+
+    game_round = GameRound.objects.only('user_id', 'total_score').get(id=payload['game_round_id'])
+    UserProfile.objects.filter(user_id=game_round.user_id).update(
+        games_played=F('games_played') + 1,
+        total_score=F('total_score') + game_round.total_score,
+        best_score=Greatest('best_score', Value(game_round.total_score)),
+    )
+
+
+@handler('post_game.leaderboard')
+def create_leaderboard_entry(payload):
+    """Record a completed round on the leaderboard (once)"""
+    from leaderboards.models import LeaderboardEntry
+
+    game_round = GameRound.objects.get(id=payload['game_round_id'])
+    # Daily challenges count for the day they were dealt
+    if game_round.round_type == GameRound.ROUND_DAILY:
+        entry_date = timezone.localdate(game_round.started_at)
+    else:
+        entry_date = timezone.localdate(game_round.completed_at or timezone.now())
+    LeaderboardEntry.objects.get_or_create(
+        game_round=game_round,
+        defaults={
+            'user_id': game_round.user_id,
+            'score': game_round.total_score,
+            'accuracy': game_round.accuracy,
+            'date': entry_date,
+        }
+    )
@@ -0,0 +1,62 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from games.guess_buffer import GuessBuffer
+from games.models import GameRound, Guess, UICEvent
+
+
+class Command(BaseCommand):
+    help = 'Measure Guess insert throughput through the write-behind buffer at several batch sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=5000,
+            help='Guesses inserted per batch size (default 5000)',
+        )
+        parser.add_argument(
+            '--batch-sizes',
+            type=int,
+            nargs='+',
+            default=[1, 50, 500],
+            help='Flush sizes to compare (default 1 50 500)',
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.order_by('id').first()
+        event = UICEvent.objects.order_by('id').first()
+        if user is None or event is None:
+            raise CommandError('Need at least one user and one event to attach benchmark guesses to')
+
+        rows = max(1, options['rows'])
+        # A throwaway round; deleting it removes every benchmark guess
+        game_round = GameRound.objects.create(user=user)
+        try:
+            results = [(batch_size, self._run(game_round, event, rows, batch_size))
+                       for batch_size in options['batch_sizes']]
+        finally:
+            game_round.delete()
+
+        baseline = results[0][1]
+        for batch_size, elapsed in results:
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ batch {batch_size:>5}: {rows / elapsed:>10.0f} guesses/s "
+                f"({elapsed * 1000:.0f} ms, {baseline / elapsed:.1f}x batch {results[0][0]})"
+            ))
+
+    def _run(self, game_round, event, rows, batch_size):
+        """Seconds to buffer and flush rows guesses, flushing every batch_size"""
+        buffer = GuessBuffer(batch_size=batch_size, background=False)
+        started = time.perf_counter()
+        for i in range(rows):
+            buffer.add([Guess(
+                game_round=game_round,
+                uic_event=event,
+                user_answer=f'benchmark {i}',
+                time_taken=1.0,
+            )])
+            if buffer.stats()['pending'] >= batch_size:
+                buffer.flush()
+        buffer.flush()
+        return time.perf_counter() - started
@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from games.daily import daily_payload, get_daily_challenge
+from games.models import UICEvent
+
+
+class Command(BaseCommand):
+    help = 'Draw daily challenge decks ahead of time and warm the cached payload for today'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            type=str,
+            default=None,
+            help='First day to build, YYYY-MM-DD (defaults to today)',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=1,
+            help='Number of consecutive days to build (default 1)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Redraw decks that already exist',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['date']) if options['date'] else timezone.localdate()
+        except ValueError:
+            raise CommandError('--date must be YYYY-MM-DD')
+
+        if not UICEvent.objects.exists():
+            self.stdout.write(self.style.WARNING('No events to build a daily challenge from'))
+            return
+
+        for offset in range(max(1, options['days'])):
+            day = start + timedelta(days=offset)
+            challenge = get_daily_challenge(day, rebuild=options['force'])
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ {day}: {len(challenge.question_ids)} questions {challenge.question_ids}"
+            ))
+
+        today = timezone.localdate()
+        if start <= today < start + timedelta(days=max(1, options['days'])):
+            payload = daily_payload(today)
+            self.stdout.write(self.style.SUCCESS(f"✓ Cached today's payload ({payload['total_questions']} questions)"))
@@ -0,0 +1,122 @@
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from games.models import Guess, UICEvent
+from games.utils.fuzzy_matcher import DEFAULT_ENGINE, ENGINES, build_matcher
+
+
+class Command(BaseCommand):
+    help = 'Replay historical guesses through every matcher engine and compare verdicts and latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=5000,
+            help='Number of most recent Guess rows to replay (default 5000)',
+        )
+        parser.add_argument(
+            '--engines',
+            nargs='+',
+            default=None,
+            help=f"Engines to compare (default: all of {', '.join(sorted(ENGINES))})",
+        )
+        parser.add_argument(
+            '--baseline',
+            type=str,
+            default=None,
+            help='Engine the others are compared against (default: MATCHER_ENGINE)',
+        )
+        parser.add_argument(
+            '--show',
+            type=int,
+            default=10,
+            help='Number of disagreements to print per engine (default 10)',
+        )
+
+    def handle(self, *args, **options):
+        engines = options['engines'] or sorted(ENGINES)
+        baseline = options['baseline'] or getattr(settings, 'MATCHER_ENGINE', DEFAULT_ENGINE)
+        for name in engines + [baseline]:
+            if name not in ENGINES:
+                raise CommandError(f"Unknown matcher engine '{name}'")
+        if baseline not in engines:
+            engines.insert(0, baseline)
+
+        corpus = list(
+            Guess.objects.order_by('-created_at')
+            .values_list('uic_event_id', 'user_answer')[:options['limit']]
+        )
+        if not corpus:
+            self.stdout.write(self.style.WARNING('No guesses to replay'))
+            return
+
+        answers_by_event = {
+            event_id: (answers, normalized)
+            for event_id, answers, normalized in
+            UICEvent.objects.filter(id__in={event_id for event_id, _ in corpus})
+            .values_list('id', 'acceptable_answers', 'normalized_answers')
+        }
+        self.stdout.write(
+            f"Replaying {len(corpus)} guesses over {len(answers_by_event)} events "
+            f"(baseline: {baseline})\n"
+        )
+
+        verdicts = {}
+        for name in engines:
+            verdicts[name], latencies = self._replay(name, corpus, answers_by_event)
+            correct = sum(1 for verdict in verdicts[name] if verdict[0])
+            self.stdout.write(
+                f"{name:<10} correct {correct:6d}   "
+                f"p50 {self._percentile(latencies, 50):8.1f} us   "
+                f"p99 {self._percentile(latencies, 99):8.1f} us   "
+                f"max {max(latencies):8.1f} us"
+            )
+
+        self.stdout.write('')
+        for name in engines:
+            if name == baseline:
+                continue
+            self._report_disagreements(name, baseline, corpus, verdicts, options['show'])
+
+    def _replay(self, engine, corpus, answers_by_event):
+        """Grade every guess with one engine, timing each call"""
+        matchers = {
+            event_id: build_matcher(answers, engine=engine, normalized_answers=normalized or None)
+            for event_id, (answers, normalized) in answers_by_event.items()
+        }
+
+        results = []
+        latencies = []
+        for event_id, answer in corpus:
+            started = time.perf_counter()
+            results.append(matchers[event_id].is_valid_answer(answer))
+            latencies.append((time.perf_counter() - started) * 1_000_000)
+        return results, latencies
+
+    def _percentile(self, values, percentile):
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def _report_disagreements(self, name, baseline, corpus, verdicts, show):
+        kinds = Counter()
+        examples = []
+        for (event_id, answer), ours, theirs in zip(corpus, verdicts[name], verdicts[baseline]):
+            if ours[0] == theirs[0]:
+                continue
+            kinds['accepts' if ours[0] else 'rejects'] += 1
+            if len(examples) < show:
+                examples.append((event_id, answer, ours, theirs))
+
+        if not kinds:
+            self.stdout.write(self.style.SUCCESS(f"✓ {name} agrees with {baseline} on every verdict"))
+            return
+
+        self.stdout.write(self.style.WARNING(
+            f"{name} disagrees with {baseline} on {sum(kinds.values())} verdicts "
+            f"({kinds['accepts']} extra accepts, {kinds['rejects']} extra rejects)"
+        ))
+        for event_id, answer, ours, theirs in examples:
+            self.stdout.write(f"  event {event_id} {answer!r}: {name} {ours} vs {baseline} {theirs}")
@@ -0,0 +1,93 @@
+import random
+import string
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand
+from games.models import UICEvent
+from games.utils.compact_trie import CompactTrie
+from games.utils.normalize import normalize_answer
+from games.utils.trie import Trie
+
+
+class Command(BaseCommand):
+    help = 'Compare memory and prefix-search latency of Trie and CompactTrie'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--synthetic',
+            type=int,
+            default=0,
+            help='Use N random answers instead of every UICEvent acceptable answer',
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=2000,
+            help='Number of prefix searches to time (default 2000)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=10,
+            help='Result limit passed to CompactTrie.search_prefix (default 10)',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(351)
+
+        if options['synthetic']:
+            alphabet = string.ascii_lowercase + ' '
+            answers = [
+                ''.join(rng.choice(alphabet) for _ in range(rng.randint(3, 40)))
+                for _ in range(options['synthetic'])
+            ]
+        else:
+            answers = [
+                answer
+                for answers in UICEvent.objects.values_list('normalized_answers', flat=True)
+                for answer in answers
+            ]
+
+        if not answers:
+            self.stdout.write(self.style.WARNING('No answers to index'))
+            return
+
+        # Prefixes of real answers, so every search has work to do
+        prefixes = []
+        for _ in range(options['queries']):
+            answer = rng.choice(answers)
+            prefixes.append(answer[:rng.randint(1, max(1, len(answer)))])
+
+        self.stdout.write(f"Indexing {len(answers)} answers, timing {len(prefixes)} prefix searches\n")
+
+        for name, build, search in [
+            ('Trie', self._build_trie, lambda trie, p: trie.search_prefix(p)),
+            ('CompactTrie', self._build_compact,
+             lambda trie, p: trie.search_prefix(p, limit=options['limit'])),
+        ]:
+            tracemalloc.start()
+            started = time.perf_counter()
+            trie = build(answers)
+            build_ms = (time.perf_counter() - started) * 1000
+            size_kb = tracemalloc.get_traced_memory()[0] / 1024
+            tracemalloc.stop()
+
+            started = time.perf_counter()
+            for prefix in prefixes:
+                search(trie, prefix)
+            search_us = (time.perf_counter() - started) * 1_000_000 / len(prefixes)
+
+            self.stdout.write(
+                f"{name:<12} memory {size_kb:10.1f} KB   build {build_ms:8.1f} ms   "
+                f"search_prefix {search_us:8.1f} us/query"
+            )
+
+    def _build_trie(self, answers):
+        trie = Trie()
+        trie.build_from_answers(answers)
+        return trie
+
+    def _build_compact(self, answers):
+        trie = CompactTrie()
+        trie.build_from_answers(answers)
+        return trie
@@ -0,0 +1,71 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from games.models import UICEvent
+from games.utils.answer_index import AnswerIndex, write_answer_index
+from games.utils.matcher_cache import answers_version
+from games.utils.normalize import normalize_answers
+
+
+class Command(BaseCommand):
+    help = 'Compile every UICEvent\'s acceptable answers into a memory-mappable index file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            type=str,
+            default=None,
+            help='Index file to write (defaults to the ANSWER_INDEX_PATH setting)',
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Map the written file and check every event reads back unchanged',
+        )
+
+    def handle(self, *args, **options):
+        path = options['output'] or getattr(settings, 'ANSWER_INDEX_PATH', '')
+        if not path:
+            raise CommandError('Pass --output or set ANSWER_INDEX_PATH')
+
+        events = []
+        for event_id, answers, normalized in UICEvent.objects.values_list(
+                'id', 'acceptable_answers', 'normalized_answers'):
+            if len(normalized) != len(answers):
+                normalized = normalize_answers(answers)
+            events.append((event_id, answers_version(answers), answers, normalized))
+
+        if not events:
+            self.stdout.write(self.style.WARNING('No events to compile'))
+            return
+
+        started = time.perf_counter()
+        try:
+            result = write_answer_index(path, events)
+        except OSError as e:
+            raise CommandError(f"Could not write {path}: {e}")
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Published answer index {result['version']} to {path}: "
+            f"{result['events']} events, {result['bytes'] / 1024:.1f} KiB in {elapsed * 1000:.1f} ms"
+        ))
+
+        if options['verify']:
+            self._verify(path, events)
+
+    def _verify(self, path, events):
+        index = AnswerIndex(path)
+        mismatches = 0
+        for event_id, version, answers, normalized in events:
+            compiled = index.event(event_id)
+            if (compiled is None or compiled.version != version
+                    or compiled.acceptable_answers != answers
+                    or compiled.normalized_answers != normalized
+                    or sorted(compiled.trie.search_prefix('')) != sorted(set(normalized))):
+                mismatches += 1
+                self.stdout.write(self.style.ERROR(f"✗ event {event_id} does not read back"))
+
+        if mismatches:
+            raise CommandError(f"{mismatches} events failed verification")
+        self.stdout.write(self.style.SUCCESS(f"✓ All {len(events)} events read back unchanged"))
@@ -0,0 +1,79 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from games.images import store_image_variants
+from games.models import UICEvent
+from games.utils.images import build_variants
+
+
+class Command(BaseCommand):
+    help = 'Generate downscaled image variants for events that are missing them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate variants for every event, even if they are current',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of images resized in parallel (default 4)',
+        )
+
+    def handle(self, *args, **options):
+        events = UICEvent.objects.exclude(image_sha256='')
+        if not options['force']:
+            # Images that yielded no variants are marked too, so they are not retried
+            events = events.exclude(variants_sha256=F('image_sha256'))
+        event_ids = list(events.values_list('id', flat=True))
+
+        if not event_ids:
+            self.stdout.write(self.style.SUCCESS('✓ All image variants are up to date'))
+            return
+
+        workers = max(1, options['workers'])
+        webp = getattr(settings, 'IMAGE_VARIANT_WEBP', True)
+        self.stdout.write(f"Generating variants for {len(event_ids)} events with {workers} workers")
+
+        # Pillow releases the GIL while decoding and encoding, so threads resize
+        # in parallel; database reads and writes stay on this thread
+        started = time.perf_counter()
+        generated = 0
+        unchanged = 0
+        chunk_size = workers * 4
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for start in range(0, len(event_ids), chunk_size):
+                chunk = UICEvent.objects.filter(id__in=event_ids[start:start + chunk_size]).values_list(
+                    'id', 'name', 'image_sha256', 'image_data'
+                )
+                jobs = [
+                    (event_id, name, image_sha256,
+                     executor.submit(build_variants, bytes(image_data), webp))
+                    for event_id, name, image_sha256, image_data in chunk
+                ]
+                for event_id, name, image_sha256, job in jobs:
+                    try:
+                        variants = job.result()
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f"✗ Error processing {name}: {str(e)}"))
+                        continue
+                    store_image_variants(event_id, image_sha256, variants)
+                    generated += len(variants)
+                    if variants:
+                        self.stdout.write(f"  {name}: {len(variants)} variants")
+                    else:
+                        # Already small (or not decodable); the original is served as is
+                        unchanged += 1
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✓ Generated {generated} variants for {len(event_ids) - unchanged} events in {elapsed:.1f}s"
+        ))
+        if unchanged:
+            self.stdout.write(self.style.WARNING(
+                f"{unchanged} images were too small to downscale or could not be decoded"
+            ))
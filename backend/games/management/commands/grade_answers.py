@@ -0,0 +1,98 @@
+import csv
+import time
+from django.core.management.base import BaseCommand, CommandError
+from games.grading import grade_answers_batch, matcher_cache
+from games.models import Guess
+from games.utils import batch_grader
+
+
+class Command(BaseCommand):
+    help = 'Grade many (event_id, answer) pairs in one batch and report throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--input',
+            type=str,
+            help='CSV file with event_id and answer columns (defaults to replaying Guess rows)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Only grade the first N answers',
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Also grade each answer with is_valid_answer and report any disagreement',
+        )
+
+    def handle(self, *args, **options):
+        pairs = self._load_pairs(options['input'], options['limit'])
+        if not pairs:
+            self.stdout.write(self.style.WARNING('Nothing to grade'))
+            return
+
+        engine = 'numpy' if batch_grader.np is not None else 'pure python'
+        self.stdout.write(f"Grading {len(pairs)} answers ({engine} distances)")
+
+        started = time.perf_counter()
+        verdicts = grade_answers_batch(pairs)
+        elapsed = time.perf_counter() - started
+
+        graded = [verdict for verdict in verdicts if verdict is not None]
+        correct = sum(1 for verdict in graded if verdict[0])
+        self.stdout.write(
+            f"Graded {len(graded)} answers ({correct} correct, "
+            f"{len(verdicts) - len(graded)} unknown events) in {elapsed * 1000:.1f} ms"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Throughput: {len(pairs) / max(elapsed, 1e-9):,.0f} answers/sec")
+        )
+
+        if options['check']:
+            self._check(pairs, verdicts)
+
+    def _load_pairs(self, path, limit):
+        if not path:
+            guesses = Guess.objects.order_by('id').values_list('uic_event_id', 'user_answer')
+            if limit is not None:
+                guesses = guesses[:limit]
+            return list(guesses)
+
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                pairs = [(int(row['event_id']), row['answer']) for row in reader]
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(f"Could not read {path}: {e}")
+
+        return pairs[:limit] if limit is not None else pairs
+
+    def _check(self, pairs, verdicts):
+        from games.models import UICEvent
+
+        events = UICEvent.objects.only('id', 'acceptable_answers', 'normalized_answers').in_bulk(
+            {event_id for event_id, _ in pairs}
+        )
+
+        started = time.perf_counter()
+        mismatches = 0
+        for (event_id, answer), verdict in zip(pairs, verdicts):
+            if event_id not in events:
+                continue
+            expected = matcher_cache.get(events[event_id]).is_valid_answer(answer)
+            if expected != verdict:
+                mismatches += 1
+                self.stdout.write(
+                    self.style.ERROR(f"✗ event {event_id} {answer!r}: batch {verdict} != {expected}")
+                )
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"One-at-a-time grading: {len(pairs) / max(elapsed, 1e-9):,.0f} answers/sec"
+        )
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"{mismatches} verdicts differ"))
+        else:
+            self.stdout.write(self.style.SUCCESS("✓ Batch verdicts match is_valid_answer"))
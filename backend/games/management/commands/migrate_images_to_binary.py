@@ -76,7 +76,7 @@ class Command(BaseCommand):
                 event = None
                 try:
                     # Try exact match first
-                    event = UICEvent.objects.get(name__iexact=event_name)
+                    event = UICEvent.objects.with_images().get(name__iexact=event_name)
                 except UICEvent.DoesNotExist:
                     # If no exact match, skip (admin will need to add images manually)
                     self.stdout.write(
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from games.guess_buffer import recover_journals
+
+
+class Command(BaseCommand):
+    help = 'Insert buffered guesses left in the journals of workers that exited without flushing'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--journal-dir',
+            type=str,
+            default=None,
+            help='Journal directory (defaults to the GUESS_BUFFER_JOURNAL_DIR setting)',
+        )
+        parser.add_argument(
+            '--include-live',
+            action='store_true',
+            help='Also replay journals of processes that still appear to be running',
+        )
+
+    def handle(self, *args, **options):
+        journal_dir = options['journal_dir'] or getattr(settings, 'GUESS_BUFFER_JOURNAL_DIR', '')
+        if not journal_dir:
+            raise CommandError('Pass --journal-dir or set GUESS_BUFFER_JOURNAL_DIR')
+
+        recovered = recover_journals(journal_dir, include_live=options['include_live'])
+        if not recovered:
+            self.stdout.write(self.style.SUCCESS('✓ No journals to recover'))
+            return
+
+        for path, rows in recovered:
+            self.stdout.write(self.style.SUCCESS(f"✓ {path}: inserted {rows} guesses"))
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Recovered {sum(rows for _, rows in recovered)} guesses from {len(recovered)} journals"
+        ))
@@ -0,0 +1,64 @@
+import signal
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from games.jobs import job_stats, purge_done, run_pending
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (post-game profile and leaderboard updates)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the jobs that are due now, then exit',
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=100,
+            help='Jobs claimed at a time (default 100)',
+        )
+        parser.add_argument(
+            '--idle-sleep',
+            type=float,
+            default=1.0,
+            help='Seconds to wait when the queue is empty (default 1)',
+        )
+
+    def handle(self, *args, **options):
+        self._stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        keep_days = getattr(settings, 'JOBS_KEEP_DONE_DAYS', 7)
+        succeeded = failed = 0
+        purged_at = 0.0
+        while not self._stopping:
+            close_old_connections()
+            done, errors = run_pending(limit=options['batch'])
+            succeeded += done
+            failed += errors
+
+            if time.monotonic() - purged_at > 3600:
+                purge_done(keep_days)
+                purged_at = time.monotonic()
+
+            if done or errors:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['idle_sleep'])
+
+        stats = job_stats()
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(
+            f"✓ Ran {succeeded} jobs ({failed} failed); {stats['pending']} pending, "
+            f"{stats['failed']} failed in queue, lag {stats['lag_seconds']:.1f}s"
+        ))
+
+    def _stop(self, signum, frame):
+        # Finish the current batch, then exit
+        self._stopping = True
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.14 on 2026-10-18 12:03
+
+from django.db import migrations, models
+
+from games.utils.normalize import normalize_answers
+
+
+def populate_normalized_answers(apps, schema_editor):
+    """
+    Data migration: store the normalized form of every event's acceptable answers
+    """
+    UICEvent = apps.get_model('games', 'UICEvent')
+    for event in UICEvent.objects.only('id', 'acceptable_answers'):
+        event.normalized_answers = normalize_answers(event.acceptable_answers)
+        event.save(update_fields=['normalized_answers'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0005_remove_uicevent_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uicevent',
+            name='normalized_answers',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='normalize_answer() form of each acceptable answer, kept in sync on save'),
+        ),
+        migrations.RunPython(populate_normalized_answers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.14 on 2026-10-18 15:40
+
+import hashlib
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def populate_image_hashes(apps, schema_editor):
+    """
+    Data migration: hash every stored image for the image endpoint's ETag
+    """
+    UICEvent = apps.get_model('games', 'UICEvent')
+    now = timezone.now()
+    for event in UICEvent.objects.only('id', 'image_data').exclude(image_data=None):
+        event.image_sha256 = hashlib.sha256(bytes(event.image_data)).hexdigest()
+        event.image_updated_at = now
+        event.save(update_fields=['image_sha256', 'image_updated_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0006_uicevent_normalized_answers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uicevent',
+            name='image_sha256',
+            field=models.CharField(blank=True, editable=False, help_text="SHA-256 of image_data, used as the image endpoint's ETag", max_length=64),
+        ),
+        migrations.AddField(
+            model_name='uicevent',
+            name='image_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When image_data last changed (Last-Modified of the image endpoint)', null=True),
+        ),
+        migrations.RunPython(populate_image_hashes, migrations.RunPython.noop),
+    ]
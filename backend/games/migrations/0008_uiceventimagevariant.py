@@ -0,0 +1,33 @@
+# Generated by Django 5.0.14 on 2026-10-18 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0007_uicevent_image_sha256'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UICEventImageVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Derivative name (thumb, mobile, desktop)', max_length=20)),
+                ('image_format', models.CharField(choices=[('jpg', 'JPEG'), ('jpeg', 'JPEG'), ('png', 'PNG'), ('gif', 'GIF'), ('webp', 'WebP')], max_length=10)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('image_data', models.BinaryField()),
+                ('image_sha256', models.CharField(max_length=64)),
+                ('source_sha256', models.CharField(help_text='image_sha256 of the event image this variant was generated from', max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_variants', to='games.uicevent')),
+            ],
+            options={
+                'ordering': ['event', 'width', 'image_format'],
+                'unique_together': {('event', 'name', 'image_format')},
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.14 on 2026-10-18 18:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum
+
+
+def populate_event_stats(apps, schema_editor):
+    """
+    Data migration: fold the existing Guess history into per-event totals
+    """
+    Guess = apps.get_model('games', 'Guess')
+    EventStats = apps.get_model('games', 'EventStats')
+    totals = Guess.objects.values('uic_event').annotate(
+        attempts=Count('id'),
+        correct=Count('id', filter=Q(is_correct=True)),
+        time_sum=Sum('time_taken'),
+        time_sq_sum=Sum(F('time_taken') * F('time_taken')),
+    )
+    EventStats.objects.bulk_create([
+        EventStats(
+            event_id=row['uic_event'],
+            attempts=row['attempts'],
+            correct=row['correct'],
+            time_sum=row['time_sum'] or 0.0,
+            time_sq_sum=row['time_sq_sum'] or 0.0,
+        )
+        for row in totals
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0008_uiceventimagevariant'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventStats',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='games.uicevent')),
+                ('attempts', models.IntegerField(default=0)),
+                ('correct', models.IntegerField(default=0)),
+                ('time_sum', models.FloatField(default=0.0, help_text='Sum of time_taken over all guesses (seconds)')),
+                ('time_sq_sum', models.FloatField(default=0.0, help_text='Sum of squared time_taken, for the variance')),
+            ],
+            options={
+                'verbose_name_plural': 'Event stats',
+            },
+        ),
+        migrations.RunPython(populate_event_stats, migrations.RunPython.noop),
+    ]
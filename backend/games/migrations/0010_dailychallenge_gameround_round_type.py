@@ -0,0 +1,30 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0009_eventstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyChallenge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('question_ids', models.JSONField(default=list, help_text='UICEvent ids in question order')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='gameround',
+            name='round_type',
+            field=models.CharField(choices=[('standard', 'Standard'), ('daily', 'Daily challenge')], default='standard', max_length=16),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0010_dailychallenge_gameround_round_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gameround',
+            name='question_ids',
+            field=models.JSONField(blank=True, default=list, help_text='UICEvent ids dealt, in question order'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-18 21:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0011_gameround_question_ids'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='guess',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.14 on 2026-10-18 22:40
+
+from django.db import migrations
+
+from games.utils.normalize import normalize_answers
+
+
+def renormalize_answers(apps, schema_editor):
+    """
+    Data migration: recompute normalized_answers after normalize_answer() began
+    expanding compatibility characters ('™', 'ﬁ', 'Ⅸ') before casefolding
+    """
+    UICEvent = apps.get_model('games', 'UICEvent')
+    for event in UICEvent.objects.only('id', 'acceptable_answers', 'normalized_answers'):
+        normalized = normalize_answers(event.acceptable_answers)
+        if normalized != event.normalized_answers:
+            event.normalized_answers = normalized
+            event.save(update_fields=['normalized_answers'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0013_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(renormalize_answers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.14 on 2026-10-18 23:00
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def mark_current_variants(apps, schema_editor):
+    """
+    Data migration: mark events whose stored variants already match their image
+    """
+    UICEvent = apps.get_model('games', 'UICEvent')
+    UICEventImageVariant = apps.get_model('games', 'UICEventImageVariant')
+    current = UICEventImageVariant.objects.filter(
+        event_id=OuterRef('pk'), source_sha256=OuterRef('image_sha256')
+    )
+    for event in UICEvent.objects.filter(Exists(current)).only('id', 'image_sha256'):
+        event.variants_sha256 = event.image_sha256
+        event.save(update_fields=['variants_sha256'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0014_renormalize_answers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uicevent',
+            name='variants_sha256',
+            field=models.CharField(blank=True, editable=False, help_text='image_sha256 the image variants were last generated from, even if none could be made', max_length=64),
+        ),
+        migrations.RunPython(mark_current_variants, migrations.RunPython.noop),
+    ]
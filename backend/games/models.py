@@ -1,4 +1,20 @@
+import hashlib
 from django.db import models
+from django.utils import timezone
+from .utils.normalize import normalize_answers
+
+
+class UICEventQuerySet(models.QuerySet):
+    def with_images(self):
+        """Also load image_data (deferred by default)"""
+        return self.defer(None)
+
+
+class UICEventManager(models.Manager.from_queryset(UICEventQuerySet)):
+    """Never reads image blobs unless a caller asks for them with with_images()"""
+
+    def get_queryset(self):
+        return super().get_queryset().defer('image_data')
 
 
 # Information about UIC events
@@ -21,20 +37,150 @@ class UICEvent(models.Model):
         choices=IMAGE_FORMAT_CHOICES,
         help_text="Image file format (jpg, png, gif, webp)"
     )
+    image_sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="SHA-256 of image_data, used as the image endpoint's ETag"
+    )
+    image_updated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="When image_data last changed (Last-Modified of the image endpoint)"
+    )
+    variants_sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="image_sha256 the image variants were last generated from, even if none could be made"
+    )
     acceptable_answers = models.JSONField(default=list)
+    normalized_answers = models.JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        help_text="normalize_answer() form of each acceptable answer, kept in sync on save"
+    )
     points_value = models.IntegerField(default=100)
     event_date = models.DateTimeField(auto_now_add=True)
 
+    objects = UICEventManager()
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        deferred = self.get_deferred_fields()
+        update_fields = kwargs.get('update_fields')
+
+        # Normalize answers once here so grading never has to
+        if 'acceptable_answers' not in deferred:
+            self.normalized_answers = normalize_answers(self.acceptable_answers)
+            if update_fields is not None and 'acceptable_answers' in update_fields:
+                update_fields = kwargs['update_fields'] = {*update_fields, 'normalized_answers'}
+
+        # Hash the image so it can be served with a strong ETag
+        if 'image_data' not in deferred:
+            image_sha256 = hashlib.sha256(bytes(self.image_data)).hexdigest() if self.image_data else ''
+            # Checked by the post_save handler that regenerates image variants
+            self._image_changed = image_sha256 != self.image_sha256
+            if self._image_changed:
+                self.image_sha256 = image_sha256
+                self.image_updated_at = timezone.now()
+            if update_fields is not None and 'image_data' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'image_sha256', 'image_updated_at'}
+        super().save(*args, **kwargs)
+
+    @property
+    def image_content_type(self):
+        """MIME type of image_data"""
+        return 'image/jpeg' if self.image_format in ('jpg', 'jpeg') else f'image/{self.image_format}'
+
     class Meta:
         ordering = ['name']
 
 
+# Downscaled copies of an event's image, generated when the image changes
+class UICEventImageVariant(models.Model):
+    event = models.ForeignKey(UICEvent, on_delete=models.CASCADE, related_name='image_variants')
+    name = models.CharField(max_length=20, help_text="Derivative name (thumb, mobile, desktop)")
+    image_format = models.CharField(max_length=10, choices=UICEvent.IMAGE_FORMAT_CHOICES)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    image_data = models.BinaryField()
+    image_sha256 = models.CharField(max_length=64)
+    source_sha256 = models.CharField(
+        max_length=64,
+        help_text="image_sha256 of the event image this variant was generated from"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.event.name} ({self.name}, {self.image_format})"
+
+    @property
+    def image_content_type(self):
+        """MIME type of image_data"""
+        return 'image/jpeg' if self.image_format in ('jpg', 'jpeg') else f'image/{self.image_format}'
+
+    class Meta:
+        ordering = ['event', 'width', 'image_format']
+        unique_together = ['event', 'name', 'image_format']
+
+
+# Running guess totals per event, updated with F() expressions on every guess
+class EventStats(models.Model):
+    event = models.OneToOneField(UICEvent, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    attempts = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+    time_sum = models.FloatField(default=0.0, help_text="Sum of time_taken over all guesses (seconds)")
+    time_sq_sum = models.FloatField(default=0.0, help_text="Sum of squared time_taken, for the variance")
+
+    def __str__(self):
+        return f"{self.event.name}: {self.correct}/{self.attempts}"
+
+    @property
+    def accuracy(self):
+        if self.attempts == 0:
+            return 0
+        return (self.correct / self.attempts) * 100
+
+    @property
+    def average_time(self):
+        if self.attempts == 0:
+            return 0
+        return self.time_sum / self.attempts
+
+    class Meta:
+        verbose_name_plural = "Event stats"
+
+
+# The shared question deck for one day's daily challenge
+class DailyChallenge(models.Model):
+    date = models.DateField(unique=True)
+    question_ids = models.JSONField(default=list, help_text="UICEvent ids in question order")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Daily challenge {self.date}"
+
+    class Meta:
+        ordering = ['-date']
+
+
 # A single game session
 class GameRound(models.Model):
+    ROUND_STANDARD = 'standard'
+    ROUND_DAILY = 'daily'
+    ROUND_TYPES = [
+        (ROUND_STANDARD, 'Standard'),
+        (ROUND_DAILY, 'Daily challenge'),
+    ]
+
     user = models.ForeignKey('auth.User', on_delete=models.CASCADE, related_name='game_rounds')
+    round_type = models.CharField(max_length=16, choices=ROUND_TYPES, default=ROUND_STANDARD)
+    question_ids = models.JSONField(default=list, blank=True, help_text="UICEvent ids dealt, in question order")
     total_score = models.IntegerField(default=0)
     questions_answered = models.IntegerField(default=0)
     correct_answers = models.IntegerField(default=0)
@@ -63,7 +209,8 @@ class Guess(models.Model):
     is_correct = models.BooleanField(default=False)
     time_taken = models.FloatField(help_text="Time in seconds")
     points_earned = models.IntegerField(default=0)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: buffered guesses keep the time they were made, not when they were flushed
+    created_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         return f"Guess: {self.user_answer} ({'Correct' if self.is_correct else 'Incorrect'})"
@@ -72,3 +219,37 @@ class Guess(models.Model):
         ordering = ['created_at']
         verbose_name_plural = "Guesses"
 
+
+
+# Background work queued in the database and run by `manage.py run_jobs`
+class Job(models.Model):
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUSES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+    dedupe_key = models.CharField(max_length=128, unique=True, help_text="Enqueuing the same key twice is a no-op")
+    status = models.CharField(max_length=16, choices=STATUSES, default=STATUS_PENDING)
+    attempts = models.IntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.kind} ({self.status})"
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+from .grading import grading_pool, matcher_cache
+from .models import GameRound, UICEvent
+
+
+# What guess handling needs from a dealt event: grading inputs, points and the
+# fields echoed back in the response. Duck-types as a UICEvent for grade_guess().
+DealtEvent = namedtuple(
+    'DealtEvent',
+    ['pk', 'name', 'description', 'acceptable_answers', 'normalized_answers', 'points_value']
+)
+DEALT_EVENT_FIELDS = ('id', 'name', 'description', 'acceptable_answers', 'normalized_answers', 'points_value')
+
+# A round's owner and its dealt events, in question order
+RoundState = namedtuple('RoundState', ['user_id', 'question_ids', 'events'])
+
+
+def dealt_event(uic_event):
+    """DealtEvent snapshot of a UICEvent loaded with at least DEALT_EVENT_FIELDS"""
+    return DealtEvent(
+        pk=uic_event.pk,
+        name=uic_event.name,
+        description=uic_event.description,
+        acceptable_answers=uic_event.acceptable_answers,
+        normalized_answers=uic_event.normalized_answers,
+        points_value=uic_event.points_value,
+    )
+
+
+class RoundStateCache:
+    """
+    Bounded LRU of per-round question sets, with a TTL
+
+    start_game primes an entry with the events it just dealt, so guesses on
+    that round resolve their event from memory. A miss (another worker, an
+    expired entry) costs one GameRound read and one UICEvent in_bulk, after
+    which the round is served from memory again. GameRound.question_ids is
+    the source of truth.
+    """
+
+    def __init__(self, max_size=2048, ttl_seconds=3600):
+        """
+        Args:
+            max_size: Maximum number of rounds kept in memory
+            ttl_seconds: How long an entry is trusted before it is reloaded
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def prime(self, game_round, events):
+        """
+        Remember a freshly dealt round
+
+        Args:
+            game_round: GameRound with question_ids set
+            events: UICEvents (or DealtEvents) dealt, in any order
+        """
+        by_id = {event.pk: event if isinstance(event, DealtEvent) else dealt_event(event) for event in events}
+        state = RoundState(game_round.user_id, list(game_round.question_ids), by_id)
+        self._store(game_round.pk, state)
+
+    def get(self, game_round_id, user):
+        """
+        Question set of a round owned by user
+
+        Args:
+            game_round_id: Primary key of the GameRound
+            user: Player the round must belong to
+
+        Returns:
+            RoundState, or None if the round does not exist or is not the user's
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(game_round_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(game_round_id)
+                self.hits += 1
+                state = entry[1]
+                return state if state.user_id == user.pk else None
+            self.misses += 1
+
+        row = GameRound.objects.filter(id=game_round_id, user=user).values_list('question_ids', flat=True).first()
+        if row is None:
+            return None
+        events = UICEvent.objects.only(*DEALT_EVENT_FIELDS).in_bulk(row)
+        state = RoundState(user.pk, list(row), {pk: dealt_event(event) for pk, event in events.items()})
+        self._store(game_round_id, state)
+        return state
+
+    def _store(self, game_round_id, state):
+        # Warm the compiled matchers now rather than on the first guess
+        if grading_pool is None:
+            for event in state.events.values():
+                matcher_cache.get(event)
+
+        with self._lock:
+            self._entries[game_round_id] = (time.monotonic() + self.ttl_seconds, state)
+            self._entries.move_to_end(game_round_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def forget_event(self, event_id):
+        """Drop every round that dealt an event (it was edited or deleted)"""
+        with self._lock:
+            stale = [key for key, (_, state) in self._entries.items() if event_id in state.events]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop every round and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """
+        Snapshot of cache counters
+
+        Returns:
+            Dict with size, max_size, ttl_seconds, hits and misses
+        """
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+# Process-wide round state, primed by start_game and invalidated by games.signals
+round_states = RoundStateCache(
+    max_size=getattr(settings, 'ROUND_STATE_CACHE_SIZE', 2048),
+    ttl_seconds=getattr(settings, 'ROUND_STATE_TTL_SECONDS', 3600)
+)
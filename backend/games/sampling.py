@@ -0,0 +1,185 @@
+import random
+import threading
+
+from django.db import transaction
+
+from accounts.models import UserProfile
+from .difficulty import DIFFICULTY_MIXED, DIFFICULTY_TARGETS, difficulty_sampler
+from .models import UICEvent
+from .utils.seen_set import SeenSet
+
+
+# Question selection modes for start_game
+SELECTION_RANDOM = 'random'  # uniform over the whole catalog
+SELECTION_UNSEEN = 'unseen'  # events the player has not been asked yet
+# ...plus 'easy', 'medium', 'hard' and 'mixed' (see games.difficulty)
+SELECTION_MODES = (SELECTION_RANDOM, SELECTION_UNSEEN, *DIFFICULTY_TARGETS, DIFFICULTY_MIXED)
+
+
+class QuestionSampler:
+    """
+    Picks a round's questions without scanning the event table
+
+    Keeps every eligible event id in an in-memory array, loaded once and then
+    kept current by the signal handlers in games.signals. Removal swaps the
+    last id into the freed slot, so adds, removes and a k-question sample are
+    all independent of catalog size.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = None
+        self._positions = None
+
+    def _load(self):
+        if self._ids is None:
+            self._ids = list(UICEvent.objects.order_by().values_list('id', flat=True))
+            self._positions = {event_id: index for index, event_id in enumerate(self._ids)}
+
+    def __len__(self):
+        """Number of eligible events"""
+        with self._lock:
+            self._load()
+            return len(self._ids)
+
+    def add(self, event_id):
+        """
+        Make an event eligible if the id array has been loaded
+
+        Args:
+            event_id: Primary key of the saved UICEvent
+        """
+        with self._lock:
+            if self._ids is not None and event_id not in self._positions:
+                self._positions[event_id] = len(self._ids)
+                self._ids.append(event_id)
+
+    def discard(self, event_id):
+        """
+        Stop sampling an event
+
+        Args:
+            event_id: Primary key of the deleted UICEvent
+        """
+        with self._lock:
+            if self._ids is None or event_id not in self._positions:
+                return
+            index = self._positions.pop(event_id)
+            last = self._ids.pop()
+            if last != event_id:
+                self._ids[index] = last
+                self._positions[last] = index
+
+    def reset(self):
+        """Forget the id array; the next sample reloads it from the database"""
+        with self._lock:
+            self._ids = None
+            self._positions = None
+
+    def sample(self, k):
+        """
+        Pick k distinct event ids in random order (all of them if fewer exist)
+
+        Args:
+            k: Number of questions wanted
+
+        Returns:
+            List of event ids
+        """
+        with self._lock:
+            self._load()
+            # random.sample() does O(k) work for k much smaller than the population
+            return random.sample(self._ids, min(k, len(self._ids)))
+
+    def sample_unseen(self, k, seen):
+        """
+        Pick up to k distinct event ids the player has not seen yet
+
+        Draws random slots and skips seen ids, which takes O(k) draws while most
+        of the catalog is unseen. If the draws keep hitting seen ids the
+        (in-memory) id array is filtered instead.
+
+        Args:
+            k: Number of questions wanted
+            seen: Container of event ids to avoid (e.g. a SeenSet)
+
+        Returns:
+            List of event ids, shorter than k once fewer than k are unseen
+        """
+        with self._lock:
+            self._load()
+            ids = self._ids
+            chosen = []
+            picked = set()
+            for _ in range(4 * k + 8):
+                if len(chosen) >= k or not ids:
+                    break
+                event_id = ids[random.randrange(len(ids))]
+                if event_id not in picked and event_id not in seen:
+                    picked.add(event_id)
+                    chosen.append(event_id)
+
+            if len(chosen) < k:
+                unseen = [event_id for event_id in ids if event_id not in seen and event_id not in picked]
+                chosen += random.sample(unseen, min(k - len(chosen), len(unseen)))
+            return chosen
+
+
+question_sampler = QuestionSampler()
+
+
+def pick_questions(user, k, selection=SELECTION_RANDOM):
+    """
+    Choose a round's event ids
+
+    In SELECTION_UNSEEN mode the player's seen-set is read from their profile
+    (no Guess history query). Once fewer than k events are left unseen the
+    seen-set starts over and the round is topped up from the rest. Difficulty
+    modes draw from the weighted DifficultySampler.
+
+    Args:
+        user: Player starting the round
+        k: Number of questions wanted
+        selection: One of SELECTION_MODES
+
+    Returns:
+        List of event ids
+    """
+    if selection == SELECTION_UNSEEN:
+        profile = UserProfile.objects.filter(user=user).only('id', 'seen_events').first()
+        if profile is not None:
+            seen = SeenSet(profile.seen_events)
+            chosen = question_sampler.sample_unseen(k, seen)
+            if len(chosen) < min(k, len(question_sampler)):
+                profile.seen_events = b''
+                profile.save(update_fields=['seen_events'])
+                chosen += question_sampler.sample_unseen(k - len(chosen), set(chosen))
+            return chosen
+
+    if selection in DIFFICULTY_TARGETS or selection == DIFFICULTY_MIXED:
+        return difficulty_sampler.sample(k, selection)
+
+    return question_sampler.sample(k)
+
+
+def mark_seen(user, *event_ids):
+    """
+    Add events to the player's seen-set
+
+    The profile row is locked while its bitset is rewritten, so concurrent
+    calls for the same player cannot drop each other's bits. Called inside
+    the guess transaction by services.record_guess and record_guesses.
+
+    Args:
+        user: Player (or user id) who was asked the events
+        *event_ids: Primary keys of the UICEvents
+    """
+    with transaction.atomic(savepoint=False):
+        profile = UserProfile.objects.select_for_update().filter(user=user).only('id', 'seen_events').first()
+        if profile is None:
+            return
+        seen = SeenSet(profile.seen_events)
+        added = [seen.add(event_id) for event_id in event_ids]
+        if any(added):
+            profile.seen_events = seen.to_bytes()
+            profile.save(update_fields=['seen_events'])
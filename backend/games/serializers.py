@@ -1,19 +1,53 @@
 import base64
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.urls import reverse
 from .models import UICEvent, GameRound, Guess
+from .utils.normalize import normalize_answer, normalize_answers
+
+
+# Image modes for UICEventSerializer (context['image_mode'])
+IMAGE_MODE_INLINE = 'inline'  # image_base64 data URL in the JSON
+IMAGE_MODE_URL = 'url'        # only image_url, fetched (and cached) separately
 
 
 class UICEventSerializer(serializers.ModelSerializer):
-    """Serializer for UICEvent model (read-only, no frontend writes)"""
+    """
+    Serializer for UICEvent model (read-only, no frontend writes)
+
+    In IMAGE_MODE_URL image_base64 is left out, so image_data is never read.
+    UICEvent.objects defers image_data, so IMAGE_MODE_INLINE callers should
+    pass events loaded with with_images(). The mode comes from the image_mode
+    argument, else context['image_mode'], else inline.
+    """
     image_base64 = serializers.SerializerMethodField()
+    image_url = serializers.SerializerMethodField()
 
     class Meta:
         model = UICEvent
-        fields = ['id', 'name', 'description', 'organization', 'image_base64', 
+        fields = ['id', 'name', 'description', 'organization', 'image_base64', 'image_url',
                   'image_format', 'acceptable_answers', 'points_value', 'event_date']
         read_only_fields = fields  # All fields are read-only
 
+    def __init__(self, *args, image_mode=None, **kwargs):
+        self.image_mode = image_mode
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        image_mode = self.image_mode or self.context.get('image_mode', IMAGE_MODE_INLINE)
+        if image_mode == IMAGE_MODE_URL:
+            fields.pop('image_base64')
+        return fields
+
+    def get_image_url(self, obj):
+        """URL of the image endpoint, versioned by content hash so it can be cached forever"""
+        if not obj.image_sha256:
+            return None
+        url = f"{reverse('event_image', args=[obj.pk])}?v={obj.image_sha256[:16]}"
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
     def get_image_base64(self, obj):
         """Convert binary image data to base64 data URL for JSON response"""
         if obj.image_data:
@@ -24,7 +58,7 @@ class UICEventSerializer(serializers.ModelSerializer):
 
 class GuessSerializer(serializers.ModelSerializer):
     """Serializer for Guess model"""
-    uic_event_detail = UICEventSerializer(source='uic_event', read_only=True)
+    uic_event_detail = UICEventSerializer(source='uic_event', read_only=True, image_mode=IMAGE_MODE_URL)
 
     class Meta:
         model = Guess
@@ -38,10 +72,8 @@ class GuessSerializer(serializers.ModelSerializer):
 
         # Validate answer against acceptable answers
         uic_event = guess.uic_event
-        user_answer_lower = guess.user_answer.lower().strip()
-        acceptable_answers_lower = [ans.lower().strip() for ans in uic_event.acceptable_answers]
-
-        guess.is_correct = user_answer_lower in acceptable_answers_lower
+        normalized_answers = uic_event.normalized_answers or normalize_answers(uic_event.acceptable_answers)
+        guess.is_correct = normalize_answer(guess.user_answer) in normalized_answers
         guess.points_earned = uic_event.points_value if guess.is_correct else 0
         guess.save()
 
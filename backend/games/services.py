@@ -0,0 +1,253 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import status
+
+from .guess_buffer import guess_buffer
+from .difficulty import record_attempt
+from .jobs import enqueue, post_game_jobs
+from .models import GameRound, Guess
+from .sampling import mark_seen
+
+
+class RoundRejected(Exception):
+    """The round cannot take this request"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class GuessRejected(RoundRejected):
+    """The round cannot take another guess"""
+
+
+def _count_guesses(game_round_id, user, count, correct, points):
+    """
+    Add guesses to a round's counters in a single conditional UPDATE
+
+    The WHERE clause checks ownership, completion and that all count guesses
+    fit under the question limit, so concurrent guesses on the same round can
+    neither lose increments nor push it past the limit.
+
+    Returns:
+        (total_score, questions_answered) after the update, or None if no
+        row matched
+    """
+    meta = GameRound._meta
+    qn = connection.ops.quote_name
+    table = qn(meta.db_table)
+    column = {name: qn(meta.get_field(name).column) for name in (
+        'id', 'user', 'is_completed', 'questions_answered', 'correct_answers', 'total_score'
+    )}
+    params = [count, correct, points, game_round_id, user.pk, False, settings.GAMES_ROUND_SIZE - count]
+    sql = (
+        f"UPDATE {table} SET "
+        f"{column['questions_answered']} = {column['questions_answered']} + %s, "
+        f"{column['correct_answers']} = {column['correct_answers']} + %s, "
+        f"{column['total_score']} = {column['total_score']} + %s "
+        f"WHERE {column['id']} = %s AND {column['user']} = %s "
+        f"AND {column['is_completed']} = %s AND {column['questions_answered']} <= %s"
+    )
+
+    with connection.cursor() as cursor:
+        if _update_returning():
+            cursor.execute(f"{sql} RETURNING {column['total_score']}, {column['questions_answered']}", params)
+            return cursor.fetchone()
+        cursor.execute(sql, params)
+        if not cursor.rowcount:
+            return None
+    return GameRound.objects.filter(id=game_round_id).values_list(
+        'total_score', 'questions_answered'
+    ).first()
+
+
+def _update_returning():
+    """Whether the database hands back the new counters with UPDATE ... RETURNING"""
+    if connection.vendor == 'postgresql':
+        return True
+    return connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 35)
+
+
+def record_guess(game_round_id, user, uic_event, user_answer, time_taken, is_correct):
+    """
+    Store a graded guess and add it to its round, in one transaction
+
+    The round itself costs two statements: the counter UPDATE (which also
+    checks the round belongs to the user, is still open and has questions
+    left) and the Guess INSERT. The same transaction adds the guess to the
+    event's EventStats with an F() UPDATE and marks the event seen by the
+    player (a locked read of the profile, written only if the event is new).
+    With the write-behind buffer on (GUESS_BUFFER_SIZE) the Guess INSERT is
+    deferred to its next bulk flush; everything else is still done here.
+
+    Args:
+        game_round_id: Primary key of the GameRound
+        user: Player submitting the guess
+        uic_event: UICEvent (or round_state.DealtEvent) being answered
+        user_answer: Answer as typed
+        time_taken: Seconds the player took
+        is_correct: Verdict from grade_guess()
+
+    Returns:
+        (guess, total_score, questions_answered)
+
+    Raises:
+        GuessRejected: If the round is missing, not the user's, completed, or
+            already has GAMES_ROUND_SIZE guesses
+    """
+    points = uic_event.points_value if is_correct else 0
+
+    with transaction.atomic():
+        counters = _count_guesses(game_round_id, user, 1, 1 if is_correct else 0, points)
+        if counters is None:
+            _reject(game_round_id, user, 1)
+
+        guess = Guess(
+            game_round_id=game_round_id,
+            uic_event_id=uic_event.pk,
+            user_answer=user_answer,
+            time_taken=time_taken,
+            is_correct=is_correct,
+            points_earned=points
+        )
+        _store_guesses([guess])
+        record_attempt(uic_event.pk, is_correct, time_taken)
+        mark_seen(user, uic_event.pk)
+
+    total_score, questions_answered = counters
+    return guess, total_score, questions_answered
+
+
+def record_guesses(game_round_id, user, graded):
+    """
+    Store several graded guesses for one round, all or nothing
+
+    Same statements as record_guess(): one counter UPDATE for the whole
+    batch, one bulk INSERT, an EventStats update per guess (in event id
+    order, so concurrent batches lock rows in the same order) and one
+    seen-set update.
+
+    Args:
+        game_round_id: Primary key of the GameRound
+        user: Player submitting the guesses
+        graded: List of (uic_event, user_answer, time_taken, is_correct), with
+            UICEvents or round_state.DealtEvents
+
+    Returns:
+        (guesses, total_score, questions_answered), with the counters as of
+        after the last guess
+
+    Raises:
+        GuessRejected: As record_guess(), or if the batch does not fit in the
+            questions left
+    """
+    guesses = [
+        Guess(
+            game_round_id=game_round_id,
+            uic_event_id=uic_event.pk,
+            user_answer=user_answer,
+            time_taken=time_taken,
+            is_correct=is_correct,
+            points_earned=uic_event.points_value if is_correct else 0
+        )
+        for uic_event, user_answer, time_taken, is_correct in graded
+    ]
+
+    with transaction.atomic():
+        counters = _count_guesses(
+            game_round_id, user, len(guesses),
+            sum(guess.is_correct for guess in guesses),
+            sum(guess.points_earned for guess in guesses)
+        )
+        if counters is None:
+            _reject(game_round_id, user, len(guesses))
+        _store_guesses(guesses)
+        for guess in sorted(guesses, key=lambda guess: guess.uic_event_id):
+            record_attempt(guess.uic_event_id, guess.is_correct, guess.time_taken)
+        mark_seen(user, *(guess.uic_event_id for guess in guesses))
+
+    total_score, questions_answered = counters
+    return guesses, total_score, questions_answered
+
+
+def _store_guesses(guesses):
+    """
+    Hand Guess rows to the write-behind buffer, or insert them now
+
+    The handoff waits for the surrounding transaction to commit, so a guess
+    whose counter update rolls back is never written. Rows the buffer would
+    refuse as invalid are inserted inside the transaction instead.
+    """
+    if guess_buffer is None or not guess_buffer.accepts(guesses):
+        Guess.objects.bulk_create(guesses)
+        return
+    transaction.on_commit(lambda: _hand_off(guesses))
+
+
+def _hand_off(guesses):
+    if not guess_buffer.add(guesses):
+        Guess.objects.bulk_create(guesses)
+
+
+def _reject(game_round_id, user, count):
+    """Work out why the counter update matched nothing and raise GuessRejected"""
+    state = GameRound.objects.filter(id=game_round_id, user=user).values_list(
+        'is_completed', 'questions_answered'
+    ).first()
+    if state is None:
+        raise GuessRejected('Game round not found', status.HTTP_404_NOT_FOUND)
+    is_completed, questions_answered = state
+    if is_completed:
+        raise GuessRejected('Game round is already completed', status.HTTP_400_BAD_REQUEST)
+    remaining = max(0, settings.GAMES_ROUND_SIZE - questions_answered)
+    raise GuessRejected(
+        f'Game round has {remaining} of {settings.GAMES_ROUND_SIZE} questions left, got {count} guesses',
+        status.HTTP_400_BAD_REQUEST
+    )
+
+
+def complete_round(game_round_id, user):
+    """
+    Mark a round completed and queue its post-game work
+
+    The round is closed with one conditional UPDATE, and the profile and
+    leaderboard updates are enqueued in the same transaction for
+    `manage.py run_jobs`. is_personal_best compares against the profile's
+    best score as of now, which may not include rounds still in the queue.
+
+    Args:
+        game_round_id: Primary key of the GameRound
+        user: Player completing the round
+
+    Returns:
+        Dict with the final score, counts, accuracy and whether it is a personal best
+
+    Raises:
+        RoundRejected: If the round is missing, not the user's or already completed
+    """
+    from accounts.models import UserProfile
+
+    with transaction.atomic():
+        completed = GameRound.objects.filter(id=game_round_id, user=user, is_completed=False).update(
+            is_completed=True, completed_at=timezone.now()
+        )
+        if not completed:
+            if GameRound.objects.filter(id=game_round_id, user=user).exists():
+                raise RoundRejected('Game round is already completed', status.HTTP_400_BAD_REQUEST)
+            raise RoundRejected('Game round not found', status.HTTP_404_NOT_FOUND)
+        enqueue(post_game_jobs(game_round_id))
+
+    total_score, questions_answered, correct_answers = GameRound.objects.filter(id=game_round_id).values_list(
+        'total_score', 'questions_answered', 'correct_answers'
+    ).get()
+    best_score = UserProfile.objects.filter(user=user).values_list('best_score', flat=True).first() or 0
+
+    return {
+        'final_score': total_score,
+        'questions_answered': questions_answered,
+        'correct_answers': correct_answers,
+        'accuracy': (correct_answers / questions_answered) * 100 if questions_answered > 0 else 0,
+        'is_personal_best': total_score >= best_score
+    }
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import catalog_index
+from .daily import forget_daily_payload
+from .difficulty import difficulty_sampler
+from .grading import matcher_cache
+from .images import sync_image_variants
+from .round_state import round_states
+from .sampling import question_sampler
+from .models import UICEvent
+
+
+@receiver(post_save, sender=UICEvent)
+def refresh_event_grading_state(sender, instance, **kwargs):
+    """Drop compiled grading state and re-index an event whenever it is saved (admin included)"""
+    matcher_cache.invalidate(instance.pk)
+    catalog_index.refresh_event(instance)
+    question_sampler.add(instance.pk)
+    round_states.forget_event(instance.pk)
+    if kwargs.get('created'):
+        difficulty_sampler.invalidate()
+
+
+@receiver(post_save, sender=UICEvent)
+def refresh_image_variants(sender, instance, **kwargs):
+    """Regenerate downscaled image variants when an uploaded or migrated image changes"""
+    if getattr(instance, '_image_changed', False):
+        sync_image_variants(instance)
+        instance._image_changed = False
+
+
+@receiver(post_save, sender=UICEvent)
+@receiver(post_delete, sender=UICEvent)
+def refresh_daily_payload(sender, instance, **kwargs):
+    """Re-serialize today's daily challenge on next use, in case this event is in it"""
+    forget_daily_payload()
+
+
+@receiver(post_delete, sender=UICEvent)
+def drop_event_grading_state(sender, instance, **kwargs):
+    """Drop compiled grading state and index entries for a deleted event"""
+    matcher_cache.invalidate(instance.pk)
+    catalog_index.drop_event(instance.pk)
+    question_sampler.discard(instance.pk)
+    round_states.forget_event(instance.pk)
+    difficulty_sampler.invalidate()
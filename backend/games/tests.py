@@ -1,3 +1,1442 @@
-from django.test import TestCase
+import io
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock, skipIf
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from accounts.models import UserProfile
+from .catalog import CatalogIndex, catalog_index
+from .difficulty import DifficultySampler, difficulty_sampler, record_attempt
+from .grading import grade_guess
+from .guess_buffer import GuessBuffer, recover_journals
+from .jobs import job_stats, run_pending
+from .models import DailyChallenge, EventStats, GameRound, Guess, Job, UICEvent
+from .round_state import round_states
+from .sampling import question_sampler
+from .services import GuessRejected, record_guess
+from .utils import batch_grader
+from .utils.batch_grader import BatchGrader, batch_distances
+from .utils.budget import ValidationBudget
+from .utils.answer_index import AnswerIndex, write_answer_index
+from .utils.autocomplete import AutocompleteIndex
+from .utils.compact_trie import CompactTrie
+from .utils.distance import damerau_distance
+from .utils.edit_automaton import AutomatonMatcher
+from .utils.grading_pool import GradingPool, run_grading
+from .utils.fuzz_finder import FuzzyMatcher
+from .utils.fuzzy_matcher import ENGINES, build_matcher, register_engine
+from .utils.normalize import normalize_answer, normalize_answers
+from .utils.matcher_cache import MatcherCache, answers_version
+from .utils.seen_set import SeenSet
+from .utils.symspell import SymSpellIndex, rank_suggestions
+from .utils.token_matcher import TokenKeyIndex, TokenSetMatcher
+from .utils.verdict_cache import VerdictCache
 
-# Create your tests here.
+# Big enough that reading it by accident would matter
+IMAGE_BYTES = b'\x89PNG' + bytes(256 * 1024)
+
+# image_data read as a column, not just measured with LENGTH()
+IMAGE_COLUMN = re.compile(r'(?<!LENGTH\()"games_uicevent"\."image_data"', re.IGNORECASE)
+
+
+class BlobFreeEventQueryTests(TestCase):
+    """Endpoints must never pull image_data from the database unless they return image bytes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player@uic.edu', 'player@uic.edu', 'pw')
+        UserProfile.objects.create(user=cls.user)
+        cls.admin = User.objects.create_superuser('admin', 'admin@uic.edu', 'pw')
+        cls.events = [
+            UICEvent.objects.create(
+                name=f'Event {i}', description='d', organization='o',
+                acceptable_answers=[f'Event {i}'], image_data=IMAGE_BYTES, image_format='png'
+            )
+            for i in range(12)
+        ]
+
+    def setUp(self):
+        catalog_index.reset()
+        question_sampler.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def image_reads(self, method, url, data=None, client=None, **extra):
+        """Call an endpoint and return (response, SELECTs that read image_data)"""
+        client = client or self.client
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, method)(url, data, format='json', **extra)
+        reads = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].lstrip().upper().startswith('SELECT') and IMAGE_COLUMN.search(query['sql'])
+        ]
+        return response, reads
+
+    def start_round(self):
+        response = self.client.post('/api/games/start/?images=url', {}, format='json')
+        return response.data['game_round_id'], response.data['questions']
+
+    def test_manager_defers_image_data(self):
+        event = UICEvent.objects.get(pk=self.events[0].pk)
+        self.assertIn('image_data', event.get_deferred_fields())
+        event = UICEvent.objects.with_images().get(pk=self.events[0].pk)
+        self.assertEqual(bytes(event.image_data), IMAGE_BYTES)
+
+    def test_events_in_url_mode_read_no_images(self):
+        response, reads = self.image_reads('get', '/api/games/events/?images=url')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(reads, [])
+        self.assertNotIn('image_base64', response.data[0])
+
+    def test_events_inline_read_images_in_one_query(self):
+        response, reads = self.image_reads('get', '/api/games/events/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(reads), 1)
+
+    def test_start_game_reads_only_selected_images(self):
+        response, reads = self.image_reads('post', '/api/games/start/?images=url', {})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(reads, [])
+
+        response, reads = self.image_reads('post', '/api/games/start/', {})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(reads), 1)
+        self.assertIn(' IN (', reads[0])
+
+    def test_guess_and_complete_read_no_images(self):
+        game_round_id, questions = self.start_round()
+        response, reads = self.image_reads('post', '/api/games/guess/', {
+            'game_round_id': game_round_id,
+            'uic_event_id': questions[0]['id'],
+            'answer': questions[0]['name'],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_correct'])
+        self.assertEqual(reads, [])
+
+        response, reads = self.image_reads('post', '/api/games/complete/', {'game_round_id': game_round_id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(reads, [])
+
+    def test_suggest_and_autocomplete_read_no_images(self):
+        for url in ('/api/games/suggest/?q=evnt', '/api/games/autocomplete/?q=ev'):
+            response, reads = self.image_reads('get', url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(reads, [])
+
+    def test_image_endpoint_reads_one_image(self):
+        url = f'/api/games/events/{self.events[0].pk}/image'
+        response, reads = self.image_reads('get', url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(reads), 1)
+
+        response, reads = self.image_reads('get', url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(reads, [])
+
+    def test_admin_reads_no_images(self):
+        client = APIClient()
+        client.force_login(self.admin)
+        response, reads = self.image_reads('get', '/admin/games/uicevent/', client=client)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(reads, [])
+
+        response, reads = self.image_reads(
+            'get', f'/admin/games/uicevent/{self.events[0].pk}/change/', client=client
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(reads, [])
+        self.assertContains(response, '256.0 KB')
+
+
+class QuestionSamplerTests(TestCase):
+    """Round questions come from the in-memory id array, sized by GAMES_ROUND_SIZE"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player@uic.edu', 'player@uic.edu', 'pw')
+        cls.events = [
+            UICEvent.objects.create(
+                name=f'Event {i}', description='d', organization='o', acceptable_answers=[f'Event {i}']
+            )
+            for i in range(6)
+        ]
+
+    def setUp(self):
+        question_sampler.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_sampler_follows_saves_and_deletes(self):
+        self.assertEqual(len(question_sampler), 6)
+        event = UICEvent.objects.create(name='New', description='d', organization='o')
+        self.events[0].delete()
+
+        sampled = question_sampler.sample(100)
+        self.assertEqual(len(sampled), 6)
+        self.assertIn(event.pk, sampled)
+        self.assertNotIn(self.events[0].pk, sampled)
+
+    @override_settings(GAMES_ROUND_SIZE=4)
+    def test_round_size_setting(self):
+        len(question_sampler)  # load the id array
+        with self.assertNumQueries(2):  # round insert and one fetch of the chosen events
+            response = self.client.post('/api/games/start/?images=url', {}, format='json')
+        self.assertEqual(response.data['total_questions'], 4)
+        self.assertEqual(len({question['id'] for question in response.data['questions']}), 4)
+
+        question = response.data['questions'][0]
+        response = self.client.post('/api/games/guess/', {
+            'game_round_id': response.data['game_round_id'],
+            'uic_event_id': question['id'],
+            'answer': question['name'],
+        }, format='json')
+        self.assertEqual(response.data['questions_remaining'], 3)
+
+
+@override_settings(GAMES_ROUND_SIZE=2)
+class UnseenSelectionTests(TestCase):
+    """'unseen' rounds skip events the player was already asked, without reading Guess history"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player@uic.edu', 'player@uic.edu', 'pw')
+        UserProfile.objects.create(user=cls.user)
+        for i in range(5):
+            UICEvent.objects.create(
+                name=f'Event {i}', description='d', organization='o', acceptable_answers=[f'Event {i}']
+            )
+
+    def setUp(self):
+        question_sampler.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def play_round(self):
+        response = self.client.post('/api/games/start/?images=url', {'selection': 'unseen'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        ids = [question['id'] for question in response.data['questions']]
+        for question in response.data['questions']:
+            self.client.post('/api/games/guess/', {
+                'game_round_id': response.data['game_round_id'],
+                'uic_event_id': question['id'],
+                'answer': 'no idea',
+            }, format='json')
+        return ids
+
+    def test_no_repeats_until_exhausted(self):
+        first, second = self.play_round(), self.play_round()
+        self.assertEqual(len(set(first + second)), 4)
+        self.assertEqual(len(SeenSet(UserProfile.objects.get(user=self.user).seen_events)), 4)
+
+        # One unseen event left: it is asked again alongside a repeat, and the seen-set restarts
+        third = self.play_round()
+        self.assertEqual(len(set(third)), 2)
+        self.assertEqual(len(set(first + second + third)), 5)
+
+    def test_start_does_not_query_guesses(self):
+        self.play_round()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post('/api/games/start/?images=url', {'selection': 'unseen'}, format='json')
+        self.assertFalse(any('games_guess' in query['sql'] for query in queries.captured_queries))
+
+    def test_unknown_selection_is_rejected(self):
+        response = self.client.post('/api/games/start/', {'selection': 'hardest'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_seen_set(self):
+        seen = SeenSet()
+        self.assertTrue(seen.add(9))
+        self.assertFalse(seen.add(9))
+        self.assertIn(9, SeenSet(seen.to_bytes()))
+        self.assertNotIn(8, seen)
+        self.assertNotIn(1000, seen)
+        self.assertEqual(len(seen), 1)
+
+
+@override_settings(GAMES_ROUND_SIZE=3)
+class DifficultySelectionTests(TestCase):
+    """Difficulty modes weight events by running EventStats totals kept up to date per guess"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player@uic.edu', 'player@uic.edu', 'pw')
+        UserProfile.objects.create(user=cls.user)
+        cls.events = [
+            UICEvent.objects.create(
+                name=f'Event {i}', description='d', organization='o', acceptable_answers=[f'Event {i}']
+            )
+            for i in range(12)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        question_sampler.reset()
+        difficulty_sampler.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_guesses_update_running_totals(self):
+        response = self.client.post('/api/games/start/?images=url', {}, format='json')
+        question = response.data['questions'][0]
+        for answer, time_taken in (('no idea', 10), (question['name'], 4)):
+            self.client.post('/api/games/guess/', {
+                'game_round_id': response.data['game_round_id'],
+                'uic_event_id': question['id'],
+                'answer': answer,
+                'time_taken': time_taken,
+            }, format='json')
+
+        stats = EventStats.objects.get(event_id=question['id'])
+        self.assertEqual((stats.attempts, stats.correct), (2, 1))
+        self.assertEqual(stats.time_sum, 14)
+        self.assertEqual(stats.time_sq_sum, 116)
+
+    def test_hard_rounds_favour_missed_events(self):
+        hard, easy = self.events[:3], self.events[3:]
+        EventStats.objects.bulk_create(
+            [EventStats(event=event, attempts=40, correct=2, time_sum=800) for event in hard]
+            + [EventStats(event=event, attempts=40, correct=38, time_sum=120) for event in easy]
+        )
+        hard_ids = {event.pk for event in hard}
+
+        picked = []
+        for _ in range(20):
+            response = self.client.post('/api/games/start/?images=url', {'selection': 'hard'}, format='json')
+            self.assertEqual(response.status_code, 201)
+            picked += [question['id'] for question in response.data['questions']]
+        self.assertGreater(sum(event_id in hard_ids for event_id in picked) / len(picked), 0.8)
+
+    def test_start_reads_stats_once(self):
+        self.client.post('/api/games/start/?images=url', {'selection': 'mixed'}, format='json')
+        rebuilds = difficulty_sampler.rebuilds
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/games/start/?images=url', {'selection': 'mixed'}, format='json')
+        self.assertEqual(len(response.data['questions']), 3)
+        self.assertEqual(difficulty_sampler.rebuilds, rebuilds)
+        self.assertFalse(any(
+            'games_guess' in query['sql'] or 'games_eventstats' in query['sql']
+            for query in queries.captured_queries
+        ))
+
+
+    @override_settings(DIFFICULTY_REBUILD_MIN_ATTEMPTS=2)
+    def test_rebuilds_after_attempts_from_any_worker(self):
+        sampler = DifficultySampler(background=False)
+        sampler.sample(3, 'hard')
+        self.assertEqual(sampler.rebuilds, 1)
+
+        # Another worker's guess is counted through the shared cache
+        record_attempt(self.events[0].pk, False, 5)
+        sampler.sample(3, 'hard')
+        self.assertEqual(sampler.rebuilds, 1)
+        DifficultySampler().note_attempt()
+        sampler.sample(3, 'hard')
+        self.assertEqual(sampler.rebuilds, 2)
+        self.assertEqual(sampler._table.attempts, 1)
+
+    def test_stale_table_is_rebuilt_without_blocking_draws(self):
+        sampler = DifficultySampler()
+        sampler.sample(3, 'easy')
+        old_table = sampler._table
+        release = threading.Event()
+        rebuilt = old_table._replace(ids=old_table.ids[:1])
+
+        def slow_build():
+            release.wait(5)
+            return rebuilt
+
+        sampler.invalidate()
+        with mock.patch.object(sampler, '_build', side_effect=slow_build):
+            self.assertEqual(len(sampler.sample(3, 'easy')), 3)  # served from the old table
+            self.assertIs(sampler._table, old_table)
+            release.set()
+            for thread in threading.enumerate():
+                if thread.name == 'difficulty-rebuild':
+                    thread.join(5)
+        self.assertIs(sampler._table, rebuilt)
+        self.assertEqual(sampler.sample(3, 'easy'), rebuilt.ids)
+
+
+@override_settings(GAMES_ROUND_SIZE=3)
+class DailyChallengeTests(TestCase):
+    """Every player gets the same daily deck, served from one cached payload"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = []
+        for email in ('one@uic.edu', 'two@uic.edu'):
+            user = User.objects.create_user(email, email, 'pw')
+            UserProfile.objects.create(user=user)
+            cls.users.append(user)
+        for i in range(8):
+            UICEvent.objects.create(
+                name=f'Event {i}', description='d', organization='o', acceptable_answers=[f'Event {i}'],
+                image_data=IMAGE_BYTES, image_format='png'
+            )
+
+    def setUp(self):
+        cache.clear()
+        question_sampler.reset()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_same_deck_for_everyone(self):
+        first = self.client_for(self.users[0]).post('/api/games/start/', {'round_type': 'daily'}, format='json')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(first.data['total_questions'], 3)
+        self.assertNotIn('image_base64', first.data['questions'][0])
+
+        client = self.client_for(self.users[1])
+        with self.assertNumQueries(1):  # just the round insert
+            second = client.post('/api/games/start/', {'round_type': 'daily'}, format='json')
+        self.assertEqual(second.data['questions'], first.data['questions'])
+        self.assertNotEqual(second.data['game_round_id'], first.data['game_round_id'])
+        self.assertEqual(DailyChallenge.objects.count(), 1)
+
+    def test_daily_leaderboard(self):
+        for user, answer_correctly in zip(self.users, (True, False)):
+            client = self.client_for(user)
+            response = client.post('/api/games/start/', {'round_type': 'daily'}, format='json')
+            question = response.data['questions'][0]
+            client.post('/api/games/guess/', {
+                'game_round_id': response.data['game_round_id'],
+                'uic_event_id': question['id'],
+                'answer': question['name'] if answer_correctly else 'no idea',
+            }, format='json')
+            client.post('/api/games/complete/', {'game_round_id': response.data['game_round_id']}, format='json')
+        # A standard round played today stays off the daily board
+        client = self.client_for(self.users[1])
+        response = client.post('/api/games/start/?images=url', {}, format='json')
+        client.post('/api/games/complete/', {'game_round_id': response.data['game_round_id']}, format='json')
+        run_pending()
+
+        response = client.get('/api/leaderboards/daily/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry['user_email'] for entry in response.data['entries']], ['one@uic.edu', 'two@uic.edu'])
+        self.assertEqual(self.client_for(self.users[0]).get('/api/leaderboards/daily/?date=bad').status_code, 400)
+
+    def test_event_edit_clears_payload(self):
+        client = self.client_for(self.users[0])
+        question_id = client.post('/api/games/start/', {'round_type': 'daily'}, format='json').data['questions'][0]['id']
+        UICEvent.objects.filter(pk=question_id).update(description='changed')
+        UICEvent.objects.get(pk=question_id).save()
+
+        response = client.post('/api/games/start/', {'round_type': 'daily'}, format='json')
+        self.assertEqual(response.data['questions'][0]['description'], 'changed')
+
+
+def statement_tables(queries):
+    """[(verb, first table), ...] for captured queries; savepoints have no table"""
+    statements = []
+    for query in queries.captured_queries:
+        verb = query['sql'].split()[0]
+        table = None if verb in ('SAVEPOINT', 'RELEASE') else re.search(r'"(\w+)"', query['sql']).group(1)
+        statements.append((verb, table))
+    return statements
+
+
+@override_settings(GAMES_ROUND_SIZE=3)
+class RecordGuessTests(TestCase):
+    """Guesses are stored with one conditional counter UPDATE and one INSERT, plus the stats and seen-set updates"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player@uic.edu', 'player@uic.edu', 'pw')
+        UserProfile.objects.create(user=cls.user)
+        cls.event = UICEvent.objects.create(
+            name='Event', description='d', organization='o', acceptable_answers=['Event'], points_value=10
+        )
+        EventStats.objects.create(event=cls.event)
+
+    def setUp(self):
+        round_states.clear()
+        self.game_round = GameRound.objects.create(user=self.user, question_ids=[self.event.pk])
+        round_states.prime(self.game_round, [self.event])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def guess(self, answer='Event'):
+        return self.client.post('/api/games/guess/', {
+            'game_round_id': self.game_round.pk, 'uic_event_id': self.event.pk, 'answer': answer,
+        }, format='json')
+
+    def statements(self, answer='Event'):
+        """Run a guess and return (response, [(verb, table), ...] for every query it ran)"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guess(answer)
+        return response, statement_tables(queries)
+
+    def test_counters_and_limit(self):
+        # Everything the request runs, in one transaction (a savepoint inside the test case)
+        response, statements = self.statements()
+        self.assertEqual(statements, [
+            ('SAVEPOINT', None),
+            ('UPDATE', 'games_gameround'),
+            ('INSERT', 'games_guess'),
+            ('UPDATE', 'games_eventstats'),
+            ('SELECT', 'accounts_userprofile'),
+            ('UPDATE', 'accounts_userprofile'),
+            ('RELEASE', None),
+        ])
+        self.assertEqual((response.data['current_score'], response.data['questions_remaining']), (10, 2))
+
+        # The event is already seen, so the profile is not rewritten
+        _, statements = self.statements('no idea')
+        self.assertNotIn(('UPDATE', 'accounts_userprofile'), statements)
+        self.assertEqual(len(statements), 6)
+
+        self.guess()
+        response = self.guess()
+        self.assertEqual(response.status_code, 400)
+
+        self.game_round.refresh_from_db()
+        self.assertEqual(
+            (self.game_round.questions_answered, self.game_round.correct_answers, self.game_round.total_score),
+            (3, 2, 20)
+        )
+        self.assertEqual(Guess.objects.filter(game_round=self.game_round).count(), 3)
+        self.assertEqual(EventStats.objects.get(event=self.event).attempts, 3)
+        self.assertIn(self.event.pk, SeenSet(UserProfile.objects.get(user=self.user).seen_events))
+
+    def test_counters_without_returning(self):
+        with mock.patch('games.services._update_returning', return_value=False):
+            response = self.guess()
+        self.assertEqual((response.data['current_score'], response.data['questions_remaining']), (10, 2))
+        with self.assertRaises(GuessRejected):
+            with mock.patch('games.services._update_returning', return_value=False):
+                record_guess(self.game_round.pk + 1, self.user, self.event, 'Event', 1, True)
+
+    def test_rejects_other_users_and_completed_rounds(self):
+        other = User.objects.create_user('other@uic.edu', 'other@uic.edu', 'pw')
+        with self.assertRaises(GuessRejected) as raised:
+            record_guess(self.game_round.pk, other, self.event, 'Event', 1, True)
+        self.assertEqual(raised.exception.status_code, 404)
+
+        GameRound.objects.filter(pk=self.game_round.pk).update(is_completed=True)
+        self.assertEqual(self.guess().status_code, 400)
+        self.assertFalse(Guess.objects.exists())
+
+
+@skipIf(connection.vendor == 'sqlite', 'SQLite serializes writers, so there is no race to test')
+@override_settings(GAMES_ROUND_SIZE=5)
+class ConcurrentGuessTests(TransactionTestCase):
+    """Simultaneous guesses on one round keep exact counters and respect the limit"""
+
+    def test_concurrent_guesses(self):
+        user = User.objects.create_user('player@uic.edu', 'player@uic.edu', 'pw')
+        event = UICEvent.objects.create(
+            name='Event', description='d', organization='o', acceptable_answers=['Event'], points_value=10
+        )
+        game_round = GameRound.objects.create(user=user)
+        barrier = threading.Barrier(12)
+        outcomes = []
+
+        def submit():
+            try:
+                barrier.wait()
+                record_guess(game_round.pk, user, event, 'Event', 1, True)
+                outcomes.append('stored')
+            except GuessRejected:
+                outcomes.append('rejected')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        game_round.refresh_from_db()
+        self.assertEqual(outcomes.count('stored'), 5)
+        self.assertEqual(outcomes.count('rejected'), 7)
+        self.assertEqual(
+            (game_round.questions_answered, game_round.correct_answers, game_round.total_score), (5, 5, 50)
+        )
+        self.assertEqual(Guess.objects.filter(game_round=game_round).count(), 5)
+
+
+@override_settings(GAMES_ROUND_SIZE=3)
+class BatchGuessTests(TestCase):
+    """A whole round can be graded (and completed) in one request"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player@uic.edu', 'player@uic.edu', 'pw')
+        UserProfile.objects.create(user=cls.user)
+        cls.events = [
+            UICEvent.objects.create(
+                name=f'Event {i}', description='d', organization='o',
+                acceptable_answers=[f'Event {i}'], points_value=10
+            )
+            for i in range(3)
+        ]
+        EventStats.objects.bulk_create([EventStats(event=event) for event in cls.events])
+
+    def setUp(self):
+        round_states.clear()
+        self.game_round = GameRound.objects.create(
+            user=self.user, question_ids=[event.pk for event in self.events]
+        )
+        round_states.prime(self.game_round, self.events)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def batch(self, answers, **extra):
+        return self.client.post('/api/games/guesses/batch/', {
+            'game_round_id': self.game_round.pk,
+            'guesses': [
+                {'uic_event_id': event.pk, 'answer': answer, 'time_taken': 3}
+                for event, answer in zip(self.events, answers)
+            ],
+            **extra,
+        }, format='json')
+
+    def test_grades_and_completes_in_one_request(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.batch(['Event 0', 'no idea', 'Event 2'])
+        self.assertEqual(response.status_code, 200)
+        # Counter update and bulk insert for the whole batch, then one stats
+        # update per guess and one seen-set update
+        self.assertEqual(statement_tables(queries), [
+            ('SAVEPOINT', None),
+            ('UPDATE', 'games_gameround'),
+            ('INSERT', 'games_guess'),
+            *[('UPDATE', 'games_eventstats')] * 3,
+            ('SELECT', 'accounts_userprofile'),
+            ('UPDATE', 'accounts_userprofile'),
+            ('RELEASE', None),
+        ])
+
+        results = response.data['results']
+        self.assertEqual([result['is_correct'] for result in results], [True, False, True])
+        self.assertEqual([result['current_score'] for result in results], [10, 10, 20])
+        self.assertEqual([result['questions_remaining'] for result in results], [2, 1, 0])
+
+        single = self.client.post('/api/games/guess/', {
+            'game_round_id': GameRound.objects.create(user=self.user, question_ids=[self.events[0].pk]).pk,
+            'uic_event_id': self.events[0].pk,
+            'answer': 'Event 0',
+        }, format='json')
+        self.assertEqual(set(results[0]), set(single.data))
+
+        self.game_round.refresh_from_db()
+        self.assertEqual((self.game_round.questions_answered, self.game_round.total_score), (3, 20))
+        self.assertFalse(self.game_round.is_completed)
+
+    def test_complete_flag(self):
+        response = self.batch(['Event 0', 'Event 1'], complete=True)
+        self.assertEqual(response.data['completion']['final_score'], 20)
+        self.game_round.refresh_from_db()
+        self.assertTrue(self.game_round.is_completed)
+
+    def test_invalid_entries_are_refused_before_grading(self):
+        entries = [
+            {'uic_event_id': self.events[0].pk, 'answer': 'Event 0', 'time_taken': 3},
+            {'uic_event_id': self.events[1].pk, 'answer': None, 'time_taken': 3},
+            {'uic_event_id': self.events[2].pk, 'time_taken': 3},
+            {'uic_event_id': self.events[0].pk, 'answer': 'x' * 201},
+            {'uic_event_id': self.events[1].pk, 'answer': 'Event 1', 'time_taken': -1},
+            {'uic_event_id': self.events[2].pk, 'answer': 'Event 2', 'time_taken': 'soon'},
+        ]
+        with mock.patch('games.views.grade_guess') as grade:
+            response = self.client.post('/api/games/guesses/batch/', {
+                'game_round_id': self.game_round.pk, 'guesses': entries,
+            }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['invalid'], [1, 2, 3, 4, 5])
+        grade.assert_not_called()
+        self.assertFalse(Guess.objects.exists())
+
+    def test_time_taken_is_coerced_to_int(self):
+        response = self.client.post('/api/games/guesses/batch/', {
+            'game_round_id': self.game_round.pk,
+            'guesses': [{'uic_event_id': self.events[0].pk, 'answer': 'Event 0', 'time_taken': '7'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Guess.objects.get().time_taken, 7)
+
+    def test_batch_is_all_or_nothing(self):
+        self.batch(['Event 0'])
+        response = self.batch(['Event 0', 'Event 1', 'Event 2'])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Guess.objects.filter(game_round=self.game_round).count(), 1)
+
+        response = self.client.post('/api/games/guesses/batch/', {
+            'game_round_id': self.game_round.pk, 'guesses': [{'uic_event_id': 0, 'answer': 'x'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class RoundStateTests(TestCase):
+    """Guesses resolve their event from the round's dealt question set, not the UICEvent table"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player@uic.edu', 'player@uic.edu', 'pw')
+        UserProfile.objects.create(user=cls.user)
+        for i in range(10):
+            UICEvent.objects.create(
+                name=f'Event {i}', description='d', organization='o', acceptable_answers=[f'Event {i}']
+            )
+
+    def setUp(self):
+        round_states.clear()
+        question_sampler.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def guess(self, game_round_id, event_id, answer='x'):
+        return self.client.post('/api/games/guess/', {
+            'game_round_id': game_round_id, 'uic_event_id': event_id, 'answer': answer,
+        }, format='json')
+
+    def test_guesses_do_not_query_events(self):
+        response = self.client.post('/api/games/start/?images=url', {}, format='json')
+        game_round_id, questions = response.data['game_round_id'], response.data['questions']
+        self.assertEqual(GameRound.objects.get(pk=game_round_id).question_ids, [q['id'] for q in questions])
+
+        for question in questions[:3]:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.guess(game_round_id, question['id'], question['name'])
+            self.assertTrue(response.data['is_correct'])
+            self.assertFalse(any('games_uicevent' in query['sql'] for query in queries.captured_queries))
+
+    def test_rejects_events_outside_the_round(self):
+        response = self.client.post('/api/games/start/?images=url', {}, format='json')
+        dealt = {question['id'] for question in response.data['questions']}
+        other = UICEvent.objects.exclude(pk__in=dealt).first()
+        self.assertEqual(self.guess(response.data['game_round_id'], other.pk).status_code, 400)
+
+        # Another worker (or an expired entry) reloads the round once
+        round_states.clear()
+        self.assertEqual(self.guess(response.data['game_round_id'], min(dealt)).status_code, 200)
+        self.assertEqual(round_states.stats()['misses'], 1)
+
+        intruder = User.objects.create_user('other@uic.edu', 'other@uic.edu', 'pw')
+        self.client.force_authenticate(intruder)
+        self.assertEqual(self.guess(response.data['game_round_id'], min(dealt)).status_code, 404)
+
+    def test_edited_event_is_reloaded(self):
+        response = self.client.post('/api/games/start/?images=url', {}, format='json')
+        question = response.data['questions'][0]
+        event = UICEvent.objects.get(pk=question['id'])
+        event.acceptable_answers = ['Renamed']
+        event.save()
+
+        response = self.guess(response.data['game_round_id'], question['id'], 'Renamed')
+        self.assertTrue(response.data['is_correct'])
+
+
+@override_settings(GAMES_ROUND_SIZE=5)
+class GuessBufferTests(TestCase):
+    """Buffered guesses reach the database in bulk; round scores never wait for them"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player@uic.edu', 'player@uic.edu', 'pw')
+        UserProfile.objects.create(user=cls.user)
+        cls.event = UICEvent.objects.create(
+            name='Event', description='d', organization='o', acceptable_answers=['Event'], points_value=10
+        )
+
+    def setUp(self):
+        self.game_round = GameRound.objects.create(user=self.user)
+        self.journal_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.journal_dir, ignore_errors=True)
+        self.buffer = GuessBuffer(batch_size=50, journal_dir=self.journal_dir, background=False)
+        patcher = mock.patch('games.services.guess_buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record(self, answer, is_correct):
+        # Rows reach the buffer when the guess transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            record_guess(self.game_round.pk, self.user, self.event, answer, 2, is_correct)
+
+    def test_counters_are_immediate_and_rows_flush_in_bulk(self):
+        for answer in ('Event', 'no idea', 'Event'):
+            self.record(answer, answer == 'Event')
+        self.game_round.refresh_from_db()
+        self.assertEqual((self.game_round.questions_answered, self.game_round.total_score), (3, 20))
+        self.assertFalse(Guess.objects.exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(statement_tables(queries), [('SAVEPOINT', None), ('INSERT', 'games_guess'), ('RELEASE', None)])
+        self.assertEqual(Guess.objects.filter(game_round=self.game_round).count(), 3)
+        self.assertEqual(os.listdir(self.journal_dir), [])
+
+    def test_full_buffer_inserts_directly(self):
+        self.buffer.max_pending = 1
+        self.record('Event', True)
+        self.record('Event', True)
+        self.assertEqual(Guess.objects.count(), 1)
+        self.assertEqual(self.buffer.stats()['refused'], 1)
+
+    def test_invalid_rows_are_not_buffered(self):
+        guess = Guess(
+            game_round=self.game_round, uic_event=self.event, user_answer='x' * 201,
+            is_correct=False, time_taken=2, points_earned=0
+        )
+        self.assertFalse(self.buffer.add([guess]))
+        self.assertEqual(self.buffer.stats()['pending'], 0)
+        self.assertEqual(self.buffer.stats()['refused'], 1)
+
+    def test_row_failing_at_flush_is_dead_lettered(self):
+        good = Guess(
+            game_round=self.game_round, uic_event=self.event, user_answer='Event',
+            is_correct=True, time_taken=2, points_earned=10
+        )
+        bad = Guess(
+            game_round=self.game_round, uic_event=self.event, user_answer='Event',
+            is_correct=True, time_taken='soon', points_earned=10
+        )
+        # Skip add()'s validation to model a row the database rejects anyway
+        self.buffer._pending.extend([good, bad])
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(Guess.objects.count(), 1)
+        stats = self.buffer.stats()
+        self.assertEqual((stats['pending'], stats['dead_lettered'], stats['failures']), (0, 1, 0))
+        self.assertEqual(recover_journals(self.journal_dir), [])
+        with open(self.buffer.dead_letter_path, encoding='utf-8') as f:
+            self.assertEqual(json.loads(f.read())['time_taken'], 'soon')
+
+    def test_rolled_back_guess_is_never_buffered(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            record_guess(self.game_round.pk, self.user, self.event, 'Event', 2, True)
+            raise RuntimeError('request failed after the guess')
+        self.assertEqual(self.buffer.stats()['pending'], 0)
+        self.game_round.refresh_from_db()
+        self.assertEqual(self.game_round.questions_answered, 0)
+
+    def test_recover_journal_after_crash(self):
+        self.record('Event', True)
+        # Simulate a worker that died before flushing: its journal is left behind under a dead pid
+        self.buffer._journal.close()
+        os.rename(self.buffer.journal_path, os.path.join(self.journal_dir, 'guesses-999999999.jsonl'))
+
+        recovered = recover_journals(self.journal_dir)
+        self.assertEqual([rows for _, rows in recovered], [1])
+        guess = Guess.objects.get()
+        self.assertEqual((guess.game_round_id, guess.points_earned, guess.is_correct), (self.game_round.pk, 10, True))
+        self.assertEqual(os.listdir(self.journal_dir), [])
+
+
+class PostGameJobTests(TestCase):
+    """complete_game only closes the round; profile and leaderboard updates run from the job queue"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player@uic.edu', 'player@uic.edu', 'pw')
+        UserProfile.objects.create(user=cls.user, best_score=15)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def complete(self, total_score):
+        game_round = GameRound.objects.create(user=self.user, total_score=total_score, questions_answered=2)
+        response = self.client.post('/api/games/complete/', {'game_round_id': game_round.pk}, format='json')
+        return game_round, response
+
+    def test_completion_is_deferred_to_jobs(self):
+        from leaderboards.models import LeaderboardEntry
+
+        game_round, response = self.complete(20)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_personal_best'])
+        self.assertFalse(LeaderboardEntry.objects.exists())
+        self.assertEqual(job_stats()['pending'], 2)
+
+        self.assertEqual(run_pending(), (2, 0))
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.games_played, profile.total_score, profile.best_score), (1, 20, 20))
+        self.assertEqual(LeaderboardEntry.objects.get().game_round, game_round)
+        self.assertEqual(job_stats(), {'pending': 0, 'running': 0, 'failed': 0, 'lag_seconds': 0})
+
+    def test_completing_twice_is_rejected_and_enqueues_once(self):
+        game_round, _ = self.complete(5)
+        response = self.client.post('/api/games/complete/', {'game_round_id': game_round.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Job.objects.count(), 2)
+
+        run_pending()
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.games_played, profile.best_score), (1, 15))
+
+    def test_failed_jobs_are_retried_later(self):
+        Job.objects.create(kind='post_game.profile', payload={'game_round_id': 0}, dedupe_key='x')
+
+        with self.assertLogs('games.jobs', 'ERROR'):
+            self.assertEqual(run_pending(), (0, 1))
+        job = Job.objects.get(dedupe_key='x')
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_PENDING, 1))
+        self.assertIn('DoesNotExist', job.last_error)
+        self.assertEqual(run_pending(), (0, 0))  # backing off
+
+
+class NormalizationTests(SimpleTestCase):
+    """normalize_answer() is idempotent and its output is what the trie stores"""
+
+    ANSWERS = ['Hack™ Club', 'ﬁnance Office', 'Super Bowl Ⅸ', 'The Café-Society!', 'Straße & Co']
+
+    def test_idempotent(self):
+        for answer in self.ANSWERS:
+            normalized = normalize_answer(answer)
+            self.assertEqual(normalize_answer(normalized), normalized, answer)
+        self.assertEqual(
+            normalize_answers(self.ANSWERS),
+            ['hacktm club', 'finance office', 'super bowl ix', 'cafe society', 'strasse and co']
+        )
+
+    def test_idempotent_over_every_code_point(self):
+        # Runs of 64 neighbouring code points, so combining marks meet their bases
+        text = ''.join(chr(code) for code in range(0x30000) if not 0xD800 <= code < 0xE000)
+        for start in range(0, len(text), 64):
+            chunk = normalize_answer(text[start:start + 64])
+            self.assertEqual(normalize_answer(chunk), chunk, hex(ord(text[start])))
+
+    def test_trie_keys_are_normalized_answers(self):
+        trie = CompactTrie()
+        trie.build_from_answers(normalize_answers(self.ANSWERS))
+        self.assertEqual(sorted(trie.search_prefix('')), sorted(normalize_answers(self.ANSWERS)))
+        self.assertEqual(trie.search_prefix('Hack'), [])
+
+    def test_compatibility_characters_grade(self):
+        matcher = AutomatonMatcher(self.ANSWERS)
+        for guess, expected in [
+            ('Hack™ Club', 'Hack™ Club'), ('hacktm', 'Hack™ Club'), ('finance office', 'ﬁnance Office'),
+            ('super bowl IX', 'Super Bowl Ⅸ'), ('SUPER BOWL Ⅸ', 'Super Bowl Ⅸ'),
+        ]:
+            is_correct, matched, _ = matcher.is_valid_answer(guess)
+            self.assertTrue(is_correct, guess)
+            self.assertEqual(matched, expected)
+
+
+class EmptyGuessTests(SimpleTestCase):
+    """A guess with nothing left after normalization matches no answer"""
+
+    def test_punctuation_and_whitespace_are_wrong(self):
+        for engine in (AutomatonMatcher, FuzzyMatcher):
+            matcher = engine(['Hack Club', 'The Office'])
+            for guess in ('', '   ', '?!', '--- ...'):
+                self.assertEqual(matcher.is_valid_answer(guess), (False, None, 0.0), (engine.__name__, guess))
+                self.assertEqual(matcher.get_closest_match(guess), [])
+        self.assertEqual(AutomatonMatcher(['Hack Club']).match_fast(''), (False, None, 0.0))
+
+
+def osa_distance(str1, str2):
+    """Full-matrix optimal string alignment distance, the reference for the automaton"""
+    d = [[i + j if not i or not j else 0 for j in range(len(str2) + 1)] for i in range(len(str1) + 1)]
+    for i in range(1, len(str1) + 1):
+        for j in range(1, len(str2) + 1):
+            cost = 0 if str1[i - 1] == str2[j - 1] else 1
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + cost)
+            if i > 1 and j > 1 and str1[i - 1] == str2[j - 2] and str1[i - 2] == str2[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[-1][-1]
+
+
+def typos(rng, word, count):
+    """word with count random single-character edits (including transpositions)"""
+    alphabet = 'abcdefgh '
+    for _ in range(count):
+        i = rng.randrange(len(word) + 1)
+        edit = rng.choice('idst')
+        if edit == 'i' or not word:
+            word = word[:i] + rng.choice(alphabet) + word[i:]
+        elif edit == 'd':
+            word = word[:i - 1] + word[i:] if i else word[1:]
+        elif edit == 's':
+            i = min(i, len(word) - 1)
+            word = word[:i] + rng.choice(alphabet) + word[i + 1:]
+        elif len(word) > 1:
+            i = min(max(i, 1), len(word) - 1)
+            word = word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+    return word
+
+
+class EditAutomatonTests(SimpleTestCase):
+    """The trie walk finds exactly the answers a brute-force OSA scan finds"""
+
+    def setUp(self):
+        self.rng = random.Random(351)
+        words = {''.join(self.rng.choice('abcdefgh ') for _ in range(self.rng.randint(1, 12))) for _ in range(150)}
+        self.answers = sorted(normalize_answers(words))
+        self.matcher = AutomatonMatcher(self.answers)
+
+    def test_search_matches_brute_force(self):
+        for _ in range(200):
+            query = typos(self.rng, self.rng.choice(self.answers), self.rng.randint(0, 4))
+            distances = {word: osa_distance(query, word) for word in set(self.answers)}
+            for max_distance in range(4):
+                expected = {(word, distance) for word, distance in distances.items() if distance <= max_distance}
+                self.assertEqual(set(self.matcher._search(query, max_distance)), expected, (query, max_distance))
+
+    def test_damerau_distance_matches_brute_force(self):
+        for _ in range(300):
+            str1 = typos(self.rng, self.rng.choice(self.answers), self.rng.randint(0, 5))
+            str2 = self.rng.choice(self.answers)
+            distance = osa_distance(str1, str2)
+            self.assertEqual(damerau_distance(str1, str2), distance)
+            self.assertEqual(damerau_distance(str1, str2, 2), min(distance, 3))
+
+    def test_transposition_is_one_edit(self):
+        self.assertEqual(AutomatonMatcher(['abcd'])._search('bacd', 1), [('abcd', 1)])
+
+
+class MatcherEngineTests(SimpleTestCase):
+    """Engines are picked by name and agree on clear-cut verdicts"""
+
+    ANSWERS = ['Association for Computing Machinery', 'ACM', 'Chess Club']
+    VERDICTS = {
+        'acm': True,
+        'Chess Club': True,
+        'chess': True,
+        'club chess': True,
+        'chess clb': True,
+        'asociation for computing machinery': True,
+        'computing machinery association': True,
+        'basketball': False,
+        'zzz': False,
+    }
+
+    def test_registry(self):
+        for name, engine_class in ENGINES.items():
+            self.assertIsInstance(build_matcher(self.ANSWERS, engine=name), engine_class)
+        with self.assertRaises(ValueError):
+            build_matcher(self.ANSWERS, engine='nope')
+        with self.assertRaises(TypeError):
+            register_engine('plain', object)
+
+        register_engine('words', TokenSetMatcher)
+        self.addCleanup(ENGINES.pop, 'words')
+        self.assertIsInstance(build_matcher(self.ANSWERS, engine='words'), TokenSetMatcher)
+
+    def test_engines_agree(self):
+        for name in ENGINES:
+            matcher = build_matcher(self.ANSWERS, engine=name)
+            for guess, expected in self.VERDICTS.items():
+                self.assertEqual(matcher.is_valid_answer(guess)[0], expected, (name, guess))
+
+
+class CompareEnginesCommandTests(TestCase):
+    """compare_engines replays recorded guesses through every engine"""
+
+    def test_reports_latency_and_agreement(self):
+        user = User.objects.create_user('player@uic.edu', 'player@uic.edu', 'pw')
+        event = UICEvent.objects.create(
+            name='Chess Club', description='d', organization='o', acceptable_answers=['Chess Club']
+        )
+        game_round = GameRound.objects.create(user=user)
+        Guess.objects.bulk_create([
+            Guess(game_round=game_round, uic_event=event, user_answer=answer,
+                  is_correct=False, time_taken=2, points_earned=0)
+            for answer in ('chess club', 'club chess', 'basketball')
+        ])
+
+        out = io.StringIO()
+        call_command('compare_engines', baseline='automaton', stdout=out)
+        output = out.getvalue()
+        self.assertIn('Replaying 3 guesses over 1 events', output)
+        for name in ENGINES:
+            self.assertRegex(output, rf'{name}\s+correct\s+2\s+p50')
+        self.assertIn('difflib agrees with automaton on every verdict', output)
+
+
+class MatcherCacheTests(SimpleTestCase):
+    """Compiled matchers are reused until the event's answers change"""
+
+    def event(self, answers):
+        return UICEvent(pk=1, acceptable_answers=answers, normalized_answers=normalize_answers(answers))
+
+    def test_reused_until_answers_change(self):
+        cache = MatcherCache()
+        matcher = cache.get(self.event(['Chess Club']))
+        self.assertIs(cache.get(self.event(['Chess Club'])), matcher)
+
+        # A changed answer list is a new version even without an invalidation signal
+        renamed = cache.get(self.event(['Math Club']))
+        self.assertIsNot(renamed, matcher)
+        self.assertTrue(renamed.is_valid_answer('math club')[0])
+        self.assertFalse(renamed.is_valid_answer('chess club')[0])
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['size']), (1, 2, 1))
+
+    def test_invalidate_drops_the_entry(self):
+        cache = MatcherCache()
+        matcher = cache.get(self.event(['Chess Club']))
+        cache.invalidate(1)
+        self.assertIsNot(cache.get(self.event(['Chess Club'])), matcher)
+        self.assertEqual(cache.stats()['invalidations'], 1)
+
+
+class VerdictCacheTests(SimpleTestCase):
+    """Repeated guesses are graded once per answers version"""
+
+    def setUp(self):
+        self.verdicts = VerdictCache(LocMemCache('verdict-tests', {}), namespace='automaton')
+
+    def test_hits_and_misses(self):
+        verdict = (True, 'Chess Club', 1.0, [])
+        self.assertIsNone(self.verdicts.get(1, 'v1', 'chess club'))
+        self.verdicts.set(1, 'v1', 'chess club', verdict)
+        self.assertEqual(self.verdicts.get(1, 'v1', 'chess club'), verdict)
+        # A new answers version, another event or another engine never sees it
+        self.assertIsNone(self.verdicts.get(1, 'v2', 'chess club'))
+        self.assertIsNone(self.verdicts.get(2, 'v1', 'chess club'))
+        other_engine = VerdictCache(self.verdicts.backend, namespace='difflib')
+        self.assertIsNone(other_engine.get(1, 'v1', 'chess club'))
+        self.assertEqual(self.verdicts.stats(), {'hits': 1, 'misses': 3})
+
+    def test_grade_guess_reuses_verdicts_until_answers_change(self):
+        event = UICEvent(pk=1, acceptable_answers=['Chess Club'], normalized_answers=['chess club'])
+        with mock.patch('games.grading.verdict_cache', self.verdicts), \
+                mock.patch('games.grading.run_grading', wraps=run_grading) as grade:
+            self.assertTrue(grade_guess(event, 'Chess Club')[0])
+            # Same normalized form, so the cached verdict is served
+            self.assertTrue(grade_guess(event, 'the chess-club!')[0])
+            self.assertEqual(grade.call_count, 1)
+
+            event.acceptable_answers = ['Math Club']
+            event.normalized_answers = ['math club']
+            self.assertFalse(grade_guess(event, 'Chess Club')[0])
+            self.assertEqual(grade.call_count, 2)
+
+
+class TokenKeyIndexTests(SimpleTestCase):
+    """Word-order and sound-alike stages for multi-word answers"""
+
+    ANSWERS = ['Association for Computing Machinery', 'Chess Club', 'Math Club']
+
+    def setUp(self):
+        self.index = TokenKeyIndex(self.ANSWERS, normalize_answers(self.ANSWERS))
+
+    def test_reordered_words_without_filler(self):
+        self.assertEqual(
+            self.index.match_tokens('computing machinery association'), 'Association for Computing Machinery'
+        )
+        self.assertEqual(self.index.match_tokens('club chess chess'), 'Chess Club')
+        self.assertIsNone(self.index.match_tokens('chess'))
+
+    def test_sound_alike_misspellings(self):
+        self.assertEqual(
+            self.index.match_phonetic('machinary komputing association', 0.8), 'Association for Computing Machinery'
+        )
+        self.assertEqual(self.index.match_phonetic('club chesss', 0.8), 'Chess Club')
+
+    def test_sound_key_collisions_must_also_be_close(self):
+        # Same sound keys as the answers, but too many letters apart
+        for guess in ('meat club', 'kiss club', 'mud club'):
+            self.assertIsNone(self.index.match_phonetic(guess, 0.8), guess)
+            self.assertEqual(AutomatonMatcher(self.ANSWERS).is_valid_answer(guess), (False, None, 0.0))
+
+
+class CompactTrieTests(SimpleTestCase):
+    """search_prefix returns the stored words under a prefix, in order, up to limit"""
+
+    def setUp(self):
+        rng = random.Random(5)
+        self.words = [''.join(rng.choice('abc ') for _ in range(rng.randint(0, 6))) for _ in range(300)]
+        self.trie = CompactTrie()
+        self.trie.build_from_answers(self.words)
+
+    def test_prefix_and_limit(self):
+        distinct = sorted(set(self.words))
+        self.assertEqual(len(self.trie), len(distinct))
+        for prefix in ['', 'a', 'ab', 'c b', 'abca', 'x', ' ']:
+            expected = [word for word in distinct if word.startswith(prefix)]
+            self.assertEqual(self.trie.search_prefix(prefix), expected, prefix)
+            for limit in (0, 1, 3, len(expected) + 1):
+                self.assertEqual(self.trie.search_prefix(prefix, limit=limit), expected[:limit], (prefix, limit))
+
+    def test_frozen_and_round_trips_through_arrays(self):
+        with self.assertRaises(RuntimeError):
+            self.trie.build_from_answers(['more'])
+        copy = CompactTrie.from_arrays(
+            self.trie.labels, self.trie.first_child, self.trie.child_count, self.trie.word_ids, self.trie.words
+        )
+        self.assertEqual(copy.search_prefix('a'), self.trie.search_prefix('a'))
+
+
+class SymSpellTests(SimpleTestCase):
+    """Delete-neighbourhood lookups return the same suggestions as scanning every answer"""
+
+    def test_lookup_matches_linear_scan(self):
+        rng = random.Random(6)
+        index = SymSpellIndex()
+        events = {}
+        for event_id in range(150):
+            events[event_id] = [
+                ''.join(rng.choice('abcdefgh ') for _ in range(rng.randint(2, 14))) for _ in range(rng.randint(1, 3))
+            ]
+            index.add_event(event_id, events[event_id])
+        # Removed events must leave no trace, even for terms another event shares
+        for event_id in range(0, 150, 7):
+            index.remove_event(event_id)
+            del events[event_id]
+
+        terms = {}
+        for event_id, answers in events.items():
+            for answer in answers:
+                if normalize_answer(answer):
+                    terms.setdefault(normalize_answer(answer), {}).setdefault(event_id, answer)
+        self.assertEqual(len(index), len(terms))
+
+        for _ in range(300):
+            query = typos(rng, rng.choice(list(terms)), rng.randint(0, 3))
+            normalized = normalize_answer(query)
+            expected = rank_suggestions(
+                normalized, ((term, owners.items()) for term, owners in terms.items()), index.max_distance, 5
+            ) if normalized else []
+            self.assertEqual(index.lookup(query, top_k=5), expected, query)
+
+
+class CatalogAutocompleteTests(TestCase):
+    """Autocomplete ranks each answer by how often it was typed, and rebuilds off the request path"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('player@uic.edu', 'player@uic.edu', 'pw')
+        cls.event = UICEvent.objects.create(
+            name='ACM', description='d', organization='o',
+            acceptable_answers=['Association for Computing Machinery', 'ACM'], points_value=10
+        )
+        game_round = GameRound.objects.create(user=user)
+        answers = [('acm', True)] * 3 + [('Association for computing machinery', True), ('Art Club', False)]
+        Guess.objects.bulk_create([
+            Guess(game_round=game_round, uic_event=cls.event, user_answer=answer,
+                  is_correct=is_correct, time_taken=2, points_earned=10 if is_correct else 0)
+            for answer, is_correct in answers
+        ])
+
+    def test_popularity_is_counted_per_answer(self):
+        index = CatalogIndex(background=False)
+        self.assertEqual(index.complete('a'), [('ACM', 3), ('Association for Computing Machinery', 1)])
+
+    def test_edit_is_rebuilt_without_blocking_completions(self):
+        index = CatalogIndex()
+        old = index.autocomplete
+        release = threading.Event()
+        rebuilt = AutocompleteIndex([('Renamed', 0)])
+
+        def slow_build():
+            release.wait(5)
+            return rebuilt
+
+        index.refresh_event(self.event)
+        with mock.patch.object(index, '_build_autocomplete', side_effect=slow_build):
+            self.assertIs(index.autocomplete, old)  # served from the old index
+            release.set()
+            for thread in threading.enumerate():
+                if thread.name == 'autocomplete-rebuild':
+                    thread.join(5)
+        self.assertIs(index.autocomplete, rebuilt)
+
+
+class BatchGraderTests(SimpleTestCase):
+    """Batch grading gives AutomatonMatcher.is_valid_answer's verdicts, with and without NumPy"""
+
+    def setUp(self):
+        rng = random.Random(8)
+        self.answers_by_event = {
+            event_id: [
+                ''.join(rng.choice('abcdefgh ') for _ in range(rng.randint(3, 16))) for _ in range(rng.randint(1, 3))
+            ]
+            for event_id in range(12)
+        }
+        self.pairs = []
+        for _ in range(400):
+            event_id = rng.randrange(13)  # 12 is unknown
+            answers = self.answers_by_event.get(event_id) or ['unknown']
+            self.pairs.append((event_id, typos(rng, rng.choice(answers), rng.randint(0, 4))))
+
+    def check_batch(self):
+        queries = [answer for _, answer in self.pairs] + ['']
+        for answers in self.answers_by_event.values():
+            self.assertEqual(
+                batch_distances(queries, answers[0], 3),
+                [damerau_distance(query, answers[0], 3) for query in queries]
+            )
+
+        verdicts = BatchGrader().grade(self.pairs, self.answers_by_event)
+        for (event_id, answer), verdict in zip(self.pairs, verdicts):
+            if event_id not in self.answers_by_event:
+                self.assertIsNone(verdict)
+                continue
+            expected = AutomatonMatcher(self.answers_by_event[event_id]).is_valid_answer(answer)
+            self.assertEqual(verdict, expected, (event_id, answer))
+
+    @skipIf(batch_grader.np is None, 'NumPy is not installed')
+    def test_numpy_path(self):
+        self.check_batch()
+
+    def test_pure_python_path(self):
+        with mock.patch.object(batch_grader, 'np', None):
+            self.check_batch()
+
+
+class AnswerIndexTests(SimpleTestCase):
+    """A compiled answer index reads back exactly what was written"""
+
+    def setUp(self):
+        rng = random.Random(13)
+        self.events = {
+            event_id: [
+                ''.join(rng.choice('abcdefgh ') for _ in range(rng.randint(2, 12))) for _ in range(rng.randint(1, 3))
+            ]
+            for event_id in range(1, 60, 2)
+        }
+        self.events[99] = ['Hack™ Club', 'Café Society', 'Straße']
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'answers.idx')
+
+    def test_round_trip(self):
+        result = write_answer_index(self.path, [
+            (event_id, answers_version(answers), answers, normalize_answers(answers))
+            for event_id, answers in self.events.items()
+        ])
+        index = AnswerIndex(self.path)
+        self.assertEqual((index.version, index.event_count), (result['version'], len(self.events)))
+        self.assertIsNone(index.event(2))
+
+        symspell = SymSpellIndex(index.max_distance, index.prefix_length)
+        for event_id, answers in self.events.items():
+            symspell.add_event(event_id, answers)
+            compiled = index.event(event_id)
+            self.assertEqual(compiled.version, answers_version(answers))
+            self.assertEqual(compiled.acceptable_answers, answers)
+            self.assertEqual(compiled.normalized_answers, normalize_answers(answers))
+
+            fresh = CompactTrie()
+            fresh.build_from_answers(normalize_answers(answers))
+            for prefix in ['', answers[0][:1], normalize_answers(answers)[0][:3]]:
+                self.assertEqual(list(compiled.trie.search_prefix(prefix)), fresh.search_prefix(prefix))
+
+        for query in ['hack club', 'cafe', 'strase', 'abc', 'zzz']:
+            self.assertEqual(index.suggest(query), symspell.lookup(query))
+        self.assertEqual(index.suggest('hack club')[0]['answer'], 'Hack™ Club')
+
+    def test_big_event_ids_round_trip(self):
+        big_id = 2 ** 40 + 7
+        write_answer_index(self.path, [(big_id, answers_version(['Straße']), ['Straße'], ['strasse'])])
+        index = AnswerIndex(self.path)
+        self.assertEqual(index.event(big_id).acceptable_answers, ['Straße'])
+        self.assertEqual(index.suggest('strase')[0]['event_id'], big_id)
+
+    def test_normalization_version_changes_every_version(self):
+        answers = ['Café Society']
+        events = [(1, answers_version(answers), answers, normalize_answers(answers))]
+        before = (answers_version(answers), write_answer_index(self.path, events)['version'])
+        with mock.patch('games.utils.matcher_cache.NORMALIZATION_VERSION', -1), \
+                mock.patch('games.utils.answer_index.NORMALIZATION_VERSION', -1):
+            after = (answers_version(answers), write_answer_index(self.path, events)['version'])
+        self.assertNotEqual(before[0], after[0])
+        self.assertNotEqual(before[1], after[1])
+
+
+class EventImageTests(TestCase):
+    """The image endpoint answers conditional requests with 304 and sets cache headers"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('player@uic.edu', 'player@uic.edu', 'pw')
+        cls.event = UICEvent.objects.create(
+            name='Event', description='d', organization='o', acceptable_answers=['Event'],
+            image_data=IMAGE_BYTES, image_format='png'
+        )
+        cls.url = f'/api/games/events/{cls.event.pk}/image'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_conditional_requests(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, IMAGE_BYTES)
+        self.assertEqual(response['ETag'], f'"{self.event.image_sha256}"')
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+        )
+
+    def test_versioned_url_is_immutable(self):
+        response = self.client.get(f'{self.url}?v={self.event.image_sha256[:16]}')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_missing_image_and_bad_variant(self):
+        bare = UICEvent.objects.create(name='Bare', description='d', organization='o', acceptable_answers=['Bare'])
+        self.assertEqual(self.client.get(f'/api/games/events/{bare.pk}/image').status_code, 404)
+        self.assertEqual(self.client.get(f'{self.url}?variant=huge').status_code, 400)
+
+    def test_image_without_variants_is_not_reprocessed(self):
+        # IMAGE_BYTES cannot be decoded, so no variants are made for it
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.variants_sha256, self.event.image_sha256)
+        UICEvent.objects.filter(pk=self.event.pk).update(variants_sha256='')
+
+        out = io.StringIO()
+        with mock.patch('games.management.commands.generate_image_variants.build_variants', return_value=[]) as build:
+            call_command('generate_image_variants', workers=1, stdout=out)
+            call_command('generate_image_variants', workers=1, stdout=out)
+        self.assertEqual(build.call_count, 1)
+        self.assertIn('All image variants are up to date', out.getvalue())
+
+
+class GradingPoolTests(SimpleTestCase):
+    """Worker processes grade like the request thread; a broken pool is shut down before it is replaced"""
+
+    def test_grades_in_worker_process(self):
+        answers = ['Association for Computing Machinery', 'ACM']
+        version = answers_version(answers)
+        # Generous timeout: the first guess waits for the spawned process to start
+        pool = GradingPool(workers=1, timeout_ms=60000, engine='automaton')
+        self.addCleanup(pool.shutdown)
+        pool.start([(1, version, answers, normalize_answers(answers))])
+
+        matcher = AutomatonMatcher(answers)
+        for guess in ('acm', 'asociation for computing machinery', 'basketball'):
+            verdict, budget = pool.grade(1, version, answers, None, guess)
+            self.assertEqual(verdict, run_grading(matcher, guess, ValidationBudget()), guess)
+            self.assertFalse(budget.exhausted)
+        stats = pool.stats()
+        self.assertEqual((stats['completed'], stats['queue_depth'], stats['failures']), (3, 0, 0))
+
+    def test_broken_executor_is_shut_down(self):
+        pool = GradingPool(workers=1)
+        executor = pool._executor = mock.Mock()
+        executor.submit.side_effect = BrokenProcessPool('worker died')
+
+        with self.assertLogs('games.utils.grading_pool', 'ERROR'):
+            self.assertIsNone(pool.grade(1, 'v', ['Event'], ['event'], 'event'))
+        executor.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+        self.assertFalse(pool.started)
+        self.assertEqual((pool.failures, pool.pending), (1, 0))
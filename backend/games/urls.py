@@ -3,8 +3,13 @@ from . import views
 
 urlpatterns = [
     path('events/', views.get_uic_events, name='get_events'),
+    path('events/<int:event_id>/image', views.event_image, name='event_image'),
     path('start/', views.start_game, name='start_game'),
     path('guess/', views.submit_guess, name='submit_guess'),
+    path('guesses/batch/', views.submit_guesses_batch, name='submit_guesses_batch'),
     path('complete/', views.complete_game, name='complete_game'),
+    path('suggest/', views.suggest_answers, name='suggest_answers'),
+    path('autocomplete/', views.autocomplete_answers, name='autocomplete_answers'),
+    path('metrics/', views.grading_metrics, name='grading_metrics'),
 ]
 
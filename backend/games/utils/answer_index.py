@@ -0,0 +1,369 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+
+from .compact_trie import CompactTrie
+from .normalize import NORMALIZATION_VERSION, normalize_answer
+from .symspell import delete_variants, rank_suggestions
+
+
+MAGIC = b'UICANSW\x00'
+FORMAT_VERSION = 2
+
+# (magic, format version, index version, event count)
+HEADER = struct.Struct('<8sI16sI')
+# (offset, byte length) per section
+SECTION = struct.Struct('<QQ')
+
+# Event table row: event_id, version string, node start, node count,
+# word start, word count, answer start, answer count
+EVENT_FIELDS = 8
+
+# Every section is a flat array; order here is the order in the file. Sections
+# holding event ids are int64 to fit any BigAutoField primary key
+SECTIONS = (
+    ('events', 'q'),
+    ('labels', 'I'),
+    ('first_child', 'i'),
+    ('child_count', 'I'),
+    ('word_ids', 'i'),
+    ('string_offsets', 'I'),
+    ('string_data', 'B'),
+    ('delete_hashes', 'Q'),
+    ('delete_terms', 'I'),
+    ('terms', 'I'),          # term string, owner start, owner count
+    ('owners', 'q'),         # event_id, answer string
+    ('settings', 'I'),       # symspell max_distance, prefix_length
+)
+
+CompiledEvent = namedtuple(
+    'CompiledEvent', ['event_id', 'version', 'acceptable_answers', 'normalized_answers', 'trie']
+)
+
+
+def _variant_hash(variant):
+    """64-bit hash of a delete variant (collisions only cost a wasted distance check)"""
+    return int.from_bytes(hashlib.blake2b(variant.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class _StringTable:
+    """Growing list of UTF-8 strings stored as one blob plus offsets"""
+
+    def __init__(self):
+        self.offsets = array('I', [0])
+        self.data = bytearray()
+
+    def add(self, text):
+        self.data += text.encode('utf-8')
+        self.offsets.append(len(self.data))
+        return len(self.offsets) - 2
+
+
+class _MappedStrings:
+    """
+    Read-only sequence view over a slice of a mapped string table
+
+    Used as CompactTrie.words, so strings are only decoded when looked up.
+    """
+
+    def __init__(self, offsets, data, start=0, count=None):
+        self._offsets = offsets
+        self._data = data
+        self._start = start
+        self._count = len(offsets) - 1 - start if count is None else count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        index += self._start
+        return str(self._data[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+
+    def __iter__(self):
+        return (self[index] for index in range(self._count))
+
+
+def write_answer_index(path, events, max_distance=2, prefix_length=7):
+    """
+    Compile every event's answers into one binary index file
+
+    The file is written next to path and moved into place with os.replace(),
+    so readers only ever see a complete index.
+
+    Args:
+        path: Destination file
+        events: Iterable of (event_id, version, acceptable_answers, normalized_answers)
+        max_distance, prefix_length: SymSpellIndex settings for the suggestion section
+
+    Returns:
+        Dict with the index version, event count and file size
+    """
+    arrays = {name: array(typecode) for name, typecode in SECTIONS}
+    strings = _StringTable()
+    digest = hashlib.sha1(f'normalize:{NORMALIZATION_VERSION};'.encode('utf-8'))
+    term_owners = {}
+
+    for event_id, version, answers, normalized in sorted(events, key=lambda e: e[0]):
+        digest.update(f'{event_id}:{version};'.encode('utf-8'))
+
+        trie = CompactTrie()
+        trie.build_from_answers(normalized)
+        row = [
+            event_id, strings.add(version),
+            len(arrays['labels']), trie.node_count,
+            len(strings.offsets) - 1, len(trie.words),
+        ]
+        for word in trie.words:
+            strings.add(word)
+        row += [len(strings.offsets) - 1, len(answers)]
+        for text in list(answers) + list(normalized):
+            strings.add(text)
+        arrays['events'].extend(row)
+
+        # Node arrays keep their per-event (local) indices
+        arrays['labels'].extend(trie.labels)
+        arrays['first_child'].extend(trie.first_child)
+        arrays['child_count'].extend(trie.child_count)
+        arrays['word_ids'].extend(trie.word_ids)
+
+        for answer in answers:
+            term = normalize_answer(answer)
+            if term:
+                term_owners.setdefault(term, {}).setdefault(event_id, answer)
+
+    # Suggestion neighbourhoods: sorted (variant hash, term) pairs
+    deletes = []
+    for term_id, (term, owners) in enumerate(sorted(term_owners.items())):
+        arrays['terms'].extend([strings.add(term), len(arrays['owners']) // 2, len(owners)])
+        for event_id, answer in sorted(owners.items()):
+            arrays['owners'].extend([event_id, strings.add(answer)])
+        for variant in delete_variants(term, max_distance, prefix_length):
+            deletes.append((_variant_hash(variant), term_id))
+    deletes.sort()
+    arrays['delete_hashes'].extend(variant_hash for variant_hash, _ in deletes)
+    arrays['delete_terms'].extend(term_id for _, term_id in deletes)
+
+    arrays['string_offsets'] = strings.offsets
+    arrays['string_data'] = array('B', bytes(strings.data))
+    arrays['settings'].extend([max_distance, prefix_length])
+
+    version = digest.hexdigest()[:16]
+    event_count = len(arrays['events']) // EVENT_FIELDS
+
+    # Lay sections out after the header, each 8-byte aligned
+    offset = HEADER.size + SECTION.size * len(SECTIONS)
+    table = []
+    for name, _ in SECTIONS:
+        offset += -offset % 8
+        size = len(arrays[name]) * arrays[name].itemsize
+        table.append((offset, size))
+        offset += size
+
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, version.encode('ascii'), event_count))
+        for entry in table:
+            f.write(SECTION.pack(*entry))
+        for (name, _), (section_offset, _) in zip(SECTIONS, table):
+            f.write(b'\x00' * (section_offset - f.tell()))
+            arrays[name].tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    return {'version': version, 'events': event_count, 'bytes': offset}
+
+
+class AnswerIndex:
+    """
+    Read-only view of a compiled answer index, memory-mapped from disk
+
+    Every worker process mapping the same file shares its pages with the
+    others, so adding workers does not add copies of the tries. Tries are
+    CompactTries over memoryviews of the mapping and strings are decoded only
+    when looked up.
+    """
+
+    def __init__(self, path):
+        """
+        Map an index file
+
+        Args:
+            path: File written by write_answer_index()
+
+        Raises:
+            ValueError: If the file is not a compiled answer index of this format
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.stat = os.fstat(f.fileno())
+
+        buffer = memoryview(self._mmap)
+        magic, format_version, version, event_count = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f'{path} is not a version {FORMAT_VERSION} answer index')
+        self.version = version.decode('ascii')
+        self.event_count = event_count
+
+        self._sections = {}
+        for position, (name, typecode) in enumerate(SECTIONS):
+            offset, size = SECTION.unpack_from(buffer, HEADER.size + SECTION.size * position)
+            self._sections[name] = buffer[offset:offset + size].cast(typecode)
+
+        sections = self._sections
+        self._strings = _MappedStrings(sections['string_offsets'], sections['string_data'])
+        self._event_ids = sections['events'][::EVENT_FIELDS]
+        self.max_distance, self.prefix_length = sections['settings']
+
+    def event(self, event_id):
+        """
+        Compiled state for one event
+
+        Args:
+            event_id: Primary key of the UICEvent
+
+        Returns:
+            CompiledEvent, or None if the event was not compiled into this index
+        """
+        position = bisect_left(self._event_ids, event_id)
+        if position >= len(self._event_ids) or self._event_ids[position] != event_id:
+            return None
+
+        start = position * EVENT_FIELDS
+        (_, version_id, node_start, node_count,
+         word_start, word_count, answer_start, answer_count) = self._sections['events'][start:start + EVENT_FIELDS]
+
+        nodes = slice(node_start, node_start + node_count)
+        sections = self._sections
+        trie = CompactTrie.from_arrays(
+            sections['labels'][nodes],
+            sections['first_child'][nodes],
+            sections['child_count'][nodes],
+            sections['word_ids'][nodes],
+            _MappedStrings(sections['string_offsets'], sections['string_data'], word_start, word_count),
+        )
+        answers = [self._strings[answer_start + k] for k in range(2 * answer_count)]
+        return CompiledEvent(
+            event_id=event_id,
+            version=self._strings[version_id],
+            acceptable_answers=answers[:answer_count],
+            normalized_answers=answers[answer_count:],
+            trie=trie,
+        )
+
+    def suggest(self, query, top_k=5):
+        """
+        Same results as SymSpellIndex.lookup() over the compiled catalog
+
+        Returns:
+            List of dicts: [{'answer', 'event_id', 'distance', 'confidence'}, ...]
+        """
+        query = normalize_answer(query)
+        if not query:
+            return []
+
+        hashes = self._sections['delete_hashes']
+        delete_terms = self._sections['delete_terms']
+        term_ids = set()
+        for variant in delete_variants(query, self.max_distance, self.prefix_length):
+            variant_hash = _variant_hash(variant)
+            position = bisect_left(hashes, variant_hash)
+            while position < len(hashes) and hashes[position] == variant_hash:
+                term_ids.add(delete_terms[position])
+                position += 1
+
+        return rank_suggestions(
+            query, (self._term(term_id) for term_id in term_ids), self.max_distance, top_k
+        )
+
+    def _term(self, term_id):
+        """(term, [(event_id, answer), ...]) for one suggestion term"""
+        terms = self._sections['terms']
+        owners = self._sections['owners']
+        term_string, owner_start, owner_count = terms[3 * term_id:3 * term_id + 3]
+        return self._strings[term_string], [
+            (owners[2 * k], self._strings[owners[2 * k + 1]])
+            for k in range(owner_start, owner_start + owner_count)
+        ]
+
+
+class AnswerIndexLoader:
+    """
+    Keeps the newest published answer index mapped
+
+    Publishing replaces the file atomically, so a changed inode or mtime means
+    a new index. The file is checked at most every check_seconds; the old
+    mapping stays alive for as long as matchers built from it are in use.
+    """
+
+    def __init__(self, path, check_seconds=30):
+        """
+        Args:
+            path: Index file location (it may not exist yet)
+            check_seconds: Minimum interval between checks for a new version
+        """
+        self.path = path
+        self.check_seconds = check_seconds
+        self._index = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self.swaps = 0
+
+    @property
+    def index(self):
+        """Current AnswerIndex, or None if no valid index has been published"""
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_seconds:
+            with self._lock:
+                if self._checked_at is None or now - self._checked_at >= self.check_seconds:
+                    self._checked_at = now
+                    self._reload()
+        return self._index
+
+    def _reload(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._index = None
+            return
+
+        current = self._index
+        if current is not None and (current.stat.st_ino, current.stat.st_mtime_ns) == (
+                stat.st_ino, stat.st_mtime_ns):
+            return
+        try:
+            index = AnswerIndex(self.path)
+        except (OSError, ValueError, struct.error):
+            return
+        if current is None or index.version != current.version:
+            self.swaps += 1
+        self._index = index
+
+    def event(self, event_id):
+        """CompiledEvent from the current index, or None"""
+        index = self.index
+        return index.event(event_id) if index is not None else None
+
+    def stats(self):
+        """
+        Snapshot of the mapped index
+
+        Returns:
+            Dict with path, version, event count and number of swaps
+        """
+        index = self._index
+        return {
+            'path': self.path,
+            'version': index.version if index is not None else None,
+            'events': index.event_count if index is not None else 0,
+            'swaps': self.swaps,
+        }
@@ -0,0 +1,88 @@
+import heapq
+from itertools import chain
+
+from .compact_trie import CompactTrie
+from .normalize import normalize_answer
+
+
+class AutocompleteIndex:
+    """
+    Prefix completion index with precomputed top-k lists per trie node
+
+    Built once over a CompactTrie. Every node stores the ids of the k most
+    popular words in its subtree, so a completion is a walk down the prefix
+    followed by a slice - no subtree scan at query time.
+    """
+
+    def __init__(self, weighted_answers, k=10):
+        """
+        Build the index
+
+        Args:
+            weighted_answers: Iterable of (answer, popularity) pairs; duplicate
+                answers keep their highest popularity
+            k: Number of completions precomputed per node
+        """
+        self.k = k
+        self._originals = {}
+        self._weights = {}
+        for answer, weight in weighted_answers:
+            clean = normalize_answer(answer)
+            if not clean:
+                continue
+            self._originals.setdefault(clean, answer)
+            self._weights[clean] = max(weight, self._weights.get(clean, weight))
+
+        self.trie = CompactTrie()
+        self.trie.build_from_answers(list(self._originals))
+        self._top = self._build_top_lists()
+
+    def _rank_key(self, word_id):
+        """Most popular first, alphabetical among equals"""
+        word = self.trie.words[word_id]
+        return (-self._weights[word], word)
+
+    def _build_top_lists(self):
+        """
+        Compute each node's top-k bottom-up
+
+        Nodes are stored breadth-first, so walking indices in reverse visits
+        every child before its parent.
+        """
+        trie = self.trie
+        top = [()] * trie.node_count
+        for node in range(trie.node_count - 1, -1, -1):
+            start = trie.first_child[node]
+            candidates = chain.from_iterable(
+                top[child] for child in range(start, start + trie.child_count[node])
+            )
+            word_id = trie.word_ids[node]
+            if word_id >= 0:
+                candidates = chain((word_id,), candidates)
+            top[node] = tuple(heapq.nsmallest(self.k, candidates, key=self._rank_key))
+        return top
+
+    def complete(self, prefix, limit=None):
+        """
+        Best completions for a prefix
+        Time Complexity: O(m log a) where m is prefix length, independent of subtree size
+
+        Args:
+            prefix: Text typed so far
+            limit: Maximum completions (capped at k)
+
+        Returns:
+            List of tuples: [(answer, popularity), ...]
+        """
+        node = CompactTrie.ROOT
+        for char in normalize_answer(prefix):
+            node = self.trie.find_child(node, char)
+            if node < 0:
+                return []
+
+        limit = self.k if limit is None else min(limit, self.k)
+        results = []
+        for word_id in self._top[node][:limit]:
+            word = self.trie.words[word_id]
+            results.append((self._originals[word], self._weights[word]))
+        return results
@@ -0,0 +1,164 @@
+from collections import defaultdict
+
+from .distance import damerau_distance, similarity_from_distance
+from .edit_automaton import AutomatonMatcher
+from .normalize import normalize_answer
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; distances fall back to pure Python
+    np = None
+
+
+def batch_distances(queries, target, max_distance):
+    """
+    OSA edit distance from every query to one target string
+
+    With NumPy the queries are packed into a padded code-point matrix and the DP
+    advances one query position at a time for all of them at once; insertions
+    are resolved with a running minimum along the row instead of a Python loop.
+
+    Args:
+        queries: List of strings
+        target: String every query is compared against
+        max_distance: Distances above this are reported as max_distance + 1
+
+    Returns:
+        List of integer distances aligned with queries
+    """
+    if np is None or len(queries) < 2:
+        return [damerau_distance(query, target, max_distance) for query in queries]
+
+    lengths = np.array([len(query) for query in queries])
+    width = int(lengths.max()) if len(queries) else 0
+    codes = np.full((len(queries), max(width, 1)), -1, dtype=np.int64)
+    for row, query in enumerate(queries):
+        codes[row, :len(query)] = [ord(char) for char in query]
+
+    target_codes = np.array([ord(char) for char in target], dtype=np.int64)
+    columns = np.arange(len(target) + 1)
+
+    distances = np.full(len(queries), len(target), dtype=np.int64)
+    prev = np.tile(columns, (len(queries), 1))
+    prev_prev = None
+    for i in range(1, width + 1):
+        current = codes[:, i - 1][:, None]
+        base = np.empty_like(prev)
+        base[:, 0] = i
+        base[:, 1:] = np.minimum(prev[:, 1:] + 1, prev[:, :-1] + (current != target_codes))
+
+        # Adjacent transpositions reach back two rows and two columns
+        if prev_prev is not None and len(target) > 1:
+            swapped = ((current == target_codes[:-1])
+                       & (codes[:, i - 2][:, None] == target_codes[1:]))
+            base[:, 2:] = np.where(
+                swapped, np.minimum(base[:, 2:], prev_prev[:, :-2] + 1), base[:, 2:]
+            )
+
+        # row[j] = min(base[j], row[j - 1] + 1) for every j in one pass
+        row = np.minimum.accumulate(base - columns, axis=1) + columns
+
+        finished = lengths == i
+        distances[finished] = row[finished, -1]
+        prev_prev, prev = prev, row
+
+    return [min(int(distance), max_distance + 1) for distance in distances]
+
+
+class BatchGrader:
+    """
+    Grade many (event_id, answer) pairs at once
+
+    Pairs are grouped by event. Exact and prefix hits come from each event's
+    AutomatonMatcher; everything left is scored against each acceptable answer
+    in one vectorized distance pass. Verdicts are identical to
+    AutomatonMatcher.is_valid_answer without a budget. Other engines are graded
+    one answer at a time.
+    """
+
+    def __init__(self, tolerance=0.8, matcher_for=None):
+        """
+        Initialize batch grader
+
+        Args:
+            tolerance: Minimum similarity ratio (0.0-1.0)
+            matcher_for: Optional callable (event_id, acceptable_answers) -> matcher,
+                e.g. to reuse compiled matchers from a cache
+        """
+        self.tolerance = tolerance
+        self.matcher_for = matcher_for or (
+            lambda event_id, answers: AutomatonMatcher(answers, tolerance=tolerance)
+        )
+
+    def grade(self, pairs, answers_by_event):
+        """
+        Grade a batch of answers
+
+        Args:
+            pairs: List of (event_id, user_answer) tuples
+            answers_by_event: Dict of event_id -> acceptable answers
+
+        Returns:
+            List aligned with pairs of (is_correct, matched_answer, confidence)
+            tuples, or None where the event is unknown
+        """
+        verdicts = [None] * len(pairs)
+        positions_by_event = defaultdict(list)
+        for position, (event_id, _) in enumerate(pairs):
+            if event_id in answers_by_event:
+                positions_by_event[event_id].append(position)
+
+        for event_id, positions in positions_by_event.items():
+            matcher = self.matcher_for(event_id, answers_by_event[event_id])
+            cleaned = [normalize_answer(pairs[position][1]) for position in positions]
+            for position, verdict in zip(positions, self._grade_event(matcher, cleaned)):
+                verdicts[position] = verdict
+
+        return verdicts
+
+    def _grade_event(self, matcher, queries):
+        """
+        Grade normalized answers for a single event
+
+        Returns:
+            List of (is_correct, matched_answer, confidence) aligned with queries
+        """
+        if not isinstance(matcher, AutomatonMatcher):
+            return [matcher.is_valid_answer(query) for query in queries]
+
+        verdicts = [None] * len(queries)
+        pending = []
+        for index, query in enumerate(queries):
+            verdict = matcher.match_fast(query)
+            if verdict is not None:
+                verdicts[index] = verdict
+            else:
+                pending.append(index)
+
+        best = {index: None for index in pending}
+        if pending:
+            pending_queries = [queries[index] for index in pending]
+            limits = [matcher.max_distance_for(query) for query in pending_queries]
+            cap = max(limits)
+
+            for word in matcher.trie.words:
+                answer = matcher.answer_for(word)
+                distances = batch_distances(pending_queries, word, cap)
+                for index, query, limit, distance in zip(pending, pending_queries, limits, distances):
+                    if distance > limit:
+                        continue
+                    confidence = similarity_from_distance(query, word, distance)
+                    if confidence < self.tolerance:
+                        continue
+                    # Same ordering as AutomatonMatcher: best confidence, then alphabetical
+                    candidate = (-confidence, answer)
+                    if best[index] is None or candidate < best[index]:
+                        best[index] = candidate
+
+        for index, candidate in best.items():
+            if candidate is None:
+                verdicts[index] = (False, None, 0.0)
+            else:
+                verdicts[index] = (True, candidate[1], -candidate[0])
+
+        return verdicts
@@ -0,0 +1,136 @@
+import threading
+import time
+
+
+class BudgetExhausted(Exception):
+    """Raised inside a matcher when its validation budget runs out"""
+
+
+class ValidationBudget:
+    """
+    Cost cap and accounting for a single answer validation
+
+    Matchers call charge() once per unit of work (an answer compared, a trie node
+    visited, a SequenceMatcher run). Once either limit is crossed BudgetExhausted
+    is raised and the matcher returns its defined fallback verdict.
+    """
+
+    def __init__(self, max_comparisons=None, max_microseconds=None):
+        """
+        Initialize validation budget
+
+        Args:
+            max_comparisons: Maximum units of work across all strategies (None = unbounded)
+            max_microseconds: Maximum wall time since creation (None = unbounded)
+        """
+        self.max_comparisons = max_comparisons
+        self.max_microseconds = max_microseconds
+        self.comparisons = 0
+        self.spent = {}
+        self.exhausted = False
+        self.exhausted_in = None
+        self._started = time.perf_counter()
+        self._elapsed = None
+
+    def elapsed_microseconds(self):
+        """Wall time spent since the budget was created (or until finish())"""
+        if self._elapsed is not None:
+            return self._elapsed
+        return (time.perf_counter() - self._started) * 1_000_000
+
+    def finish(self):
+        """
+        Stop the clock, e.g. before handing the budget to another process
+
+        Returns:
+            The budget itself
+        """
+        self._elapsed = self.elapsed_microseconds()
+        return self
+
+    def charge(self, strategy, comparisons=1):
+        """
+        Record work done by a strategy and enforce the limits
+
+        Args:
+            strategy: Strategy name (e.g. 'exact', 'prefix', 'fuzzy')
+            comparisons: Units of work performed
+
+        Raises:
+            BudgetExhausted: If either limit has been crossed
+        """
+        self.comparisons += comparisons
+        self.spent[strategy] = self.spent.get(strategy, 0) + comparisons
+
+        over_count = self.max_comparisons is not None and self.comparisons > self.max_comparisons
+        over_time = (self.max_microseconds is not None
+                     and self.elapsed_microseconds() > self.max_microseconds)
+        if over_count or over_time:
+            self.exhausted = True
+            self.exhausted_in = strategy
+            raise BudgetExhausted(strategy)
+
+    def report(self):
+        """
+        Summary of what this validation consumed
+
+        Returns:
+            Dict with per-strategy comparisons, totals and exhaustion info
+        """
+        return {
+            'comparisons': dict(self.spent),
+            'total_comparisons': self.comparisons,
+            'microseconds': round(self.elapsed_microseconds(), 1),
+            'exhausted': self.exhausted,
+            'exhausted_in': self.exhausted_in,
+        }
+
+
+class BudgetStats:
+    """Process-wide aggregate of validation budget reports"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear every counter"""
+        self.validations = 0
+        self.exhausted = 0
+        self.comparisons = {}
+        self.max_microseconds = 0.0
+        self.total_microseconds = 0.0
+
+    def record(self, budget):
+        """
+        Fold a finished budget into the aggregate
+
+        Args:
+            budget: ValidationBudget that has been used for one validation
+        """
+        elapsed = budget.elapsed_microseconds()
+        with self._lock:
+            self.validations += 1
+            if budget.exhausted:
+                self.exhausted += 1
+            for strategy, spent in budget.spent.items():
+                self.comparisons[strategy] = self.comparisons.get(strategy, 0) + spent
+            self.total_microseconds += elapsed
+            self.max_microseconds = max(self.max_microseconds, elapsed)
+
+    def stats(self):
+        """
+        Snapshot of aggregate counters
+
+        Returns:
+            Dict with validation counts, per-strategy comparisons and latency
+        """
+        with self._lock:
+            average = self.total_microseconds / self.validations if self.validations else 0.0
+            return {
+                'validations': self.validations,
+                'exhausted': self.exhausted,
+                'comparisons': dict(self.comparisons),
+                'avg_microseconds': round(average, 1),
+                'max_microseconds': round(self.max_microseconds, 1),
+            }
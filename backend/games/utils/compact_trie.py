@@ -0,0 +1,170 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+
+
+class CompactTrie:
+    """
+    Frozen, array-backed trie for efficient word storage and retrieval
+
+    Nodes are laid out breadth-first in flat arrays instead of one Python object
+    per character. Every node's children are contiguous and sorted by label, so a
+    node is fully described by four integers:
+
+        labels[i]       code point of the edge leading into node i (0 for the root)
+        first_child[i]  index of node i's first child
+        child_count[i]  number of children of node i
+        word_ids[i]     index into words if node i ends a word, else -1
+
+    Words and prefixes are used exactly as given; callers normalize them first
+    (see utils.normalize) so trie keys match their own lookup keys.
+
+    The trie is built once and never mutated afterwards.
+    """
+
+    ROOT = 0
+
+    def __init__(self):
+        """Initialize an empty trie (only the root node)"""
+        self.labels = array('I', [0])
+        self.first_child = array('i', [1])
+        self.child_count = array('I', [0])
+        self.word_ids = array('i', [-1])
+        self.words = []
+        self._frozen = False
+
+    @classmethod
+    def from_arrays(cls, labels, first_child, child_count, word_ids, words):
+        """
+        Wrap prebuilt node arrays (e.g. memoryviews over a mapped file)
+
+        Args:
+            labels, first_child, child_count, word_ids: Node arrays as described above
+            words: Sequence of stored words
+
+        Returns:
+            Frozen CompactTrie sharing the given buffers
+        """
+        trie = cls.__new__(cls)
+        trie.labels = labels
+        trie.first_child = first_child
+        trie.child_count = child_count
+        trie.word_ids = word_ids
+        trie.words = words
+        trie._frozen = True
+        return trie
+
+    def build_from_answers(self, acceptable_answers):
+        """
+        Build and freeze the trie from a list of acceptable answers
+        Time Complexity: O(n log a) where n is total characters and a the alphabet size
+
+        Args:
+            acceptable_answers: List of string answers
+
+        Raises:
+            RuntimeError: If the trie has already been built
+        """
+        if self._frozen:
+            raise RuntimeError('CompactTrie is frozen; build a new one instead')
+
+        # Temporary nested-dict trie: node = [children, word_id]
+        root = [{}, -1]
+        for answer in acceptable_answers:
+            node = root
+            for char in answer:
+                node = node[0].setdefault(char, [{}, -1])
+            if node[1] == -1:
+                node[1] = len(self.words)
+                self.words.append(answer)
+
+        # Lay nodes out breadth-first so siblings are contiguous
+        self.word_ids[0] = root[1]
+        queue = deque([(self.ROOT, root)])
+        while queue:
+            index, (children, _) = queue.popleft()
+            self.first_child[index] = len(self.labels)
+            self.child_count[index] = len(children)
+            for char in sorted(children):
+                child = children[char]
+                queue.append((len(self.labels), child))
+                self.labels.append(ord(char))
+                self.first_child.append(0)
+                self.child_count.append(0)
+                self.word_ids.append(child[1])
+
+        self._frozen = True
+
+    def __len__(self):
+        """Number of distinct words stored"""
+        return len(self.words)
+
+    @property
+    def node_count(self):
+        """Number of nodes, including the root"""
+        return len(self.labels)
+
+    def find_child(self, node, char):
+        """
+        Binary search a node's sorted children for an edge label
+
+        Args:
+            node: Parent node index
+            char: Single character edge label
+
+        Returns:
+            Child node index, or -1 if there is no such edge
+        """
+        code = ord(char)
+        start = self.first_child[node]
+        end = start + self.child_count[node]
+        index = bisect_left(self.labels, code, start, end)
+        if index < end and self.labels[index] == code:
+            return index
+        return -1
+
+    def word_at(self, node):
+        """
+        Word ending at a node
+
+        Returns:
+            The stored word, or None if the node does not end a word
+        """
+        word_id = self.word_ids[node]
+        return self.words[word_id] if word_id >= 0 else None
+
+    def search_prefix(self, prefix, limit=None):
+        """
+        Search for words with given prefix, in alphabetical order
+        Time Complexity: O(m log a) to reach the prefix node, then O(k) for k results
+
+        Args:
+            prefix: String prefix to search for
+            limit: Maximum number of words to return (None = all)
+
+        Returns:
+            List of words matching the prefix
+        """
+        if limit is not None and limit < 1:
+            return []
+
+        node = self.ROOT
+        for char in prefix:
+            node = self.find_child(node, char)
+            if node < 0:
+                return []
+
+        # Iterative pre-order walk; children pushed in reverse to pop in order
+        results = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            word_id = self.word_ids[node]
+            if word_id >= 0:
+                results.append(self.words[word_id])
+                if limit is not None and len(results) >= limit:
+                    break
+            start = self.first_child[node]
+            stack.extend(range(start + self.child_count[node] - 1, start - 1, -1))
+
+        return results
@@ -0,0 +1,46 @@
+def damerau_distance(str1, str2, max_distance=None):
+    """
+    Optimal string alignment (restricted Damerau-Levenshtein) distance
+
+    Insertions, deletions, substitutions and adjacent transpositions each cost 1,
+    matching the distance AutomatonMatcher computes while walking its trie.
+
+    Args:
+        str1: First string
+        str2: Second string
+        max_distance: Optional cut-off; once every cell of a row exceeds it the
+            computation stops early
+
+    Returns:
+        Integer distance, or max_distance + 1 if the cut-off was exceeded
+    """
+    if max_distance is not None and abs(len(str1) - len(str2)) > max_distance:
+        return max_distance + 1
+
+    prev_prev = None
+    prev = list(range(len(str2) + 1))
+    for i in range(1, len(str1) + 1):
+        row = [i] + [0] * len(str2)
+        for j in range(1, len(str2) + 1):
+            cost = 0 if str1[i - 1] == str2[j - 1] else 1
+            value = min(row[j - 1] + 1, prev[j] + 1, prev[j - 1] + cost)
+            if (prev_prev is not None and j > 1 and str1[i - 1] == str2[j - 2]
+                    and str1[i - 2] == str2[j - 1]):
+                value = min(value, prev_prev[j - 2] + 1)
+            row[j] = value
+
+        if max_distance is not None and min(row) > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, row
+
+    distance = prev[-1]
+    if max_distance is not None and distance > max_distance:
+        return max_distance + 1
+    return distance
+
+
+def similarity_from_distance(str1, str2, distance):
+    """
+    Convert an edit distance into a similarity ratio (0.0-1.0)
+    """
+    return 1.0 - distance / max(len(str1), len(str2), 1)
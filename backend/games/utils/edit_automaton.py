@@ -0,0 +1,260 @@
+from .compact_trie import CompactTrie
+from .budget import BudgetExhausted
+from .distance import similarity_from_distance
+from .matcher_base import MatcherEngine
+from .normalize import normalize_answer, normalize_answers
+from .token_matcher import PHONETIC_MATCH_CONFIDENCE, TOKEN_MATCH_CONFIDENCE, TokenKeyIndex
+
+
+class AutomatonMatcher(MatcherEngine):
+    """
+    Fuzzy matching engine that walks a CompactTrie with a bounded edit-distance automaton
+
+    Instead of generating every single-character edit of the guess and scoring each
+    candidate against every answer, the trie is walked once while carrying a banded
+    Damerau-Levenshtein (optimal string alignment) DP row per node. Any branch whose
+    row can no longer come back under the edit budget is pruned.
+    """
+
+    # build_matcher() may hand over a precompiled trie (see utils.answer_index)
+    accepts_trie = True
+
+    def __init__(self, acceptable_answers, tolerance=0.8, normalized_answers=None, max_edits=3,
+                 trie=None):
+        """
+        Initialize automaton matcher
+
+        Args:
+            acceptable_answers: List of correct answer strings
+            tolerance: Minimum similarity ratio (0.0-1.0)
+            normalized_answers: Precomputed normalize_answer() forms aligned
+                with acceptable_answers (computed here if omitted)
+            max_edits: Hard cap on the edit distance explored in the trie
+            trie: Prebuilt CompactTrie over normalized_answers (built here if omitted)
+        """
+        if normalized_answers is None:
+            normalized_answers = normalize_answers(acceptable_answers)
+
+        if trie is None:
+            trie = CompactTrie()
+            trie.build_from_answers(normalized_answers)
+        self.trie = trie
+        self.acceptable_answers = acceptable_answers
+        self.tolerance = tolerance
+        self.max_edits = max_edits
+
+        # Map normalized answers back to the original spelling
+        self._answers_by_clean = {}
+        for normalized, answer in zip(normalized_answers, acceptable_answers):
+            self._answers_by_clean.setdefault(normalized, answer)
+
+        # Word-order and sound-alike keys for multi-word answers
+        self.token_index = TokenKeyIndex(acceptable_answers, normalized_answers)
+        self._longest = max((len(clean) for clean in self._answers_by_clean), default=0)
+
+    def is_valid_answer(self, user_answer, budget=None):
+        """
+        Validate user answer using multiple strategies
+
+        Args:
+            user_answer: User's submitted answer
+            budget: Optional ValidationBudget; when it runs out the search stops
+                and the answer is treated as incorrect
+
+        Returns:
+            Tuple: (is_correct: bool, matched_answer: str, confidence: float)
+        """
+        try:
+            return self._validate(normalize_answer(user_answer), budget)
+        except BudgetExhausted:
+            return False, None, 0.0
+
+    def _validate(self, user_answer_clean, budget):
+        """
+        Run the strategies in order, charging each one to the budget
+        """
+        result = self.match_fast(user_answer_clean, budget)
+        if result is not None:
+            return result
+
+        # Strategy 5: Bounded edit-distance walk of the Trie
+        matches = self._rank(user_answer_clean, budget, 'fuzzy')
+        if matches:
+            return True, matches[0][0], matches[0][1]
+
+        return False, None, 0.0
+
+    def match_fast(self, user_answer_clean, budget=None):
+        """
+        Run only the cheap strategies (no edit-distance search)
+
+        Args:
+            user_answer_clean: Normalized user answer
+            budget: Optional ValidationBudget
+
+        Returns:
+            Tuple: (True, matched_answer, confidence), (False, None, 0.0) for
+            an empty guess, or None if nothing matched
+        """
+        # A guess of only punctuation or whitespace would prefix-match everything
+        if not user_answer_clean:
+            return False, None, 0.0
+
+        # Strategy 1: Exact Match (Fastest)
+        self._charge(budget, 'exact')
+        answer = self._answers_by_clean.get(user_answer_clean)
+        if answer is not None:
+            return True, answer, 1.0
+
+        # Strategy 2: Prefix Match via Trie
+        prefix_matches = self.trie.search_prefix(user_answer_clean, limit=1)
+        self._charge(budget, 'prefix', len(user_answer_clean) + len(prefix_matches))
+        if prefix_matches:
+            return True, self._answers_by_clean[prefix_matches[0]], 0.95
+
+        # Strategy 3: Same words in any order, ignoring filler words
+        self._charge(budget, 'token')
+        answer = self.token_index.match_tokens(user_answer_clean)
+        if answer is not None and TOKEN_MATCH_CONFIDENCE >= self.tolerance:
+            return True, answer, TOKEN_MATCH_CONFIDENCE
+
+        # Strategy 4: Words that sound the same (phonetic keys)
+        self._charge(budget, 'phonetic')
+        answer = self.token_index.match_phonetic(user_answer_clean, self.tolerance)
+        if answer is not None and PHONETIC_MATCH_CONFIDENCE >= self.tolerance:
+            return True, answer, PHONETIC_MATCH_CONFIDENCE
+
+        return None
+
+    def answer_for(self, word):
+        """Original spelling of a normalized answer stored in the trie"""
+        return self._answers_by_clean[word]
+
+    def get_closest_match(self, user_answer, top_n=3, budget=None):
+        """
+        Get the closest matching answers ranked by confidence
+
+        Args:
+            user_answer: User's answer
+            top_n: Number of top matches to return
+            budget: Optional ValidationBudget; no suggestions if it runs out
+
+        Returns:
+            List of tuples: [(answer, confidence), ...]
+        """
+        try:
+            return self._rank(normalize_answer(user_answer), budget, 'suggestions')[:top_n]
+        except BudgetExhausted:
+            return []
+
+    def _charge(self, budget, strategy, comparisons=1):
+        """Charge work to the budget, if one was given"""
+        if budget is not None:
+            budget.charge(strategy, comparisons)
+
+    def _rank(self, query, budget=None, strategy='fuzzy'):
+        """
+        Find answers within tolerance of the query, best first
+
+        Ties are broken alphabetically so results do not depend on trie order.
+
+        Args:
+            query: Cleaned user answer
+            budget: Optional ValidationBudget charged once per trie node
+            strategy: Strategy name the work is charged to
+
+        Returns:
+            List of tuples: [(answer, confidence), ...]
+        """
+        matches = []
+        for word, distance in self._search(query, self.max_distance_for(query), budget, strategy):
+            confidence = similarity_from_distance(query, word, distance)
+            if confidence >= self.tolerance:
+                matches.append((self._answers_by_clean[word], confidence))
+
+        matches.sort(key=lambda m: (-m[1], m[0]))
+        return matches
+
+    def max_distance_for(self, query):
+        """
+        Largest edit distance that could still reach the tolerance
+
+        Args:
+            query: Cleaned user answer
+
+        Returns:
+            Integer edit budget, never above max_edits
+        """
+        longest = max(len(query), self._longest)
+        # Small epsilon so e.g. 0.2 * 10 is not floored to 1
+        return min(self.max_edits, int((1.0 - self.tolerance) * longest + 1e-9))
+
+    def _search(self, query, max_distance, budget=None, strategy='fuzzy'):
+        """
+        Iteratively walk the trie carrying one banded DP row per node
+
+        Time Complexity: O(v * b) where v is the number of trie nodes that stay
+        within max_distance and b is the band width (2 * max_distance + 1)
+
+        Args:
+            query: Cleaned user answer
+            max_distance: Maximum edit distance to accept
+            budget: Optional ValidationBudget charged once per trie node
+            strategy: Strategy name the work is charged to
+
+        Returns:
+            List of tuples: [(trie_word, distance), ...]
+        """
+        trie = self.trie
+        labels = trie.labels
+        first_child = trie.first_child
+        child_count = trie.child_count
+
+        codes = [ord(char) for char in query]
+        n = len(codes)
+        limit = max_distance + 1
+        first_row = [j if j <= max_distance else limit for j in range(n + 1)]
+        found = []
+        root_word = trie.word_at(trie.ROOT)
+        if root_word is not None and n <= max_distance:
+            found.append((root_word, n))
+
+        # (node, depth, parent row, grandparent row, parent edge label)
+        start = first_child[trie.ROOT]
+        stack = [
+            (child, 1, first_row, None, None)
+            for child in range(start, start + child_count[trie.ROOT])
+        ]
+
+        while stack:
+            node, depth, prev, prev_prev, prev_label = stack.pop()
+            if budget is not None:
+                budget.charge(strategy)
+
+            label = labels[node]
+            row = [limit] * (n + 1)
+            row[0] = depth if depth <= max_distance else limit
+            for j in range(max(1, depth - max_distance), min(n, depth + max_distance) + 1):
+                cost = 0 if codes[j - 1] == label else 1
+                value = min(row[j - 1] + 1, prev[j] + 1, prev[j - 1] + cost)
+
+                # Adjacent transposition ("ab" <-> "ba") counts as one edit
+                if (prev_prev is not None and j > 1 and label == codes[j - 2]
+                        and prev_label == codes[j - 1]):
+                    value = min(value, prev_prev[j - 2] + 1)
+
+                row[j] = value if value <= max_distance else limit
+
+            if row[n] <= max_distance:
+                word = trie.word_at(node)
+                if word is not None:
+                    found.append((word, row[n]))
+
+            # A child can still recover through this row, or through a
+            # transposition that reaches back to the parent row
+            if min(row) <= max_distance or min(prev) < max_distance:
+                start = first_child[node]
+                for child in range(start, start + child_count[node]):
+                    stack.append((child, depth + 1, row, prev, label))
+
+        return found
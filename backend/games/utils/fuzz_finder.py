@@ -1,62 +1,113 @@
 from difflib import SequenceMatcher
 from .trie import Trie
+from .budget import BudgetExhausted
+from .matcher_base import MatcherEngine
+from .normalize import normalize_answer, normalize_answers
+from .token_matcher import PHONETIC_MATCH_CONFIDENCE, TOKEN_MATCH_CONFIDENCE, TokenKeyIndex
 
 
-class FuzzyMatcher:
+class FuzzyMatcher(MatcherEngine):
     """
     Fuzzy matching engine using Trie and ID-DFS for answer validation
     """
 
-    def __init__(self, acceptable_answers, tolerance=0.8):
+    def __init__(self, acceptable_answers, tolerance=0.8, normalized_answers=None):
         """
         Initialize fuzzy matcher
 
         Args:
             acceptable_answers: List of correct answer strings
             tolerance: Minimum similarity ratio (0.0-1.0)
+            normalized_answers: Precomputed normalize_answer() forms aligned
+                with acceptable_answers (computed here if omitted)
         """
+        if normalized_answers is None:
+            normalized_answers = normalize_answers(acceptable_answers)
+
         self.trie = Trie()
-        self.trie.build_from_answers(acceptable_answers)
+        self.trie.build_from_answers(normalized_answers)
         self.acceptable_answers = acceptable_answers
+        self.normalized_answers = normalized_answers
         self.tolerance = tolerance
 
-    def is_valid_answer(self, user_answer):
+        # Map normalized answers back to the original spelling
+        self._answers_by_normalized = {}
+        for normalized, answer in zip(normalized_answers, acceptable_answers):
+            self._answers_by_normalized.setdefault(normalized, answer)
+
+        # Word-order and sound-alike keys for multi-word answers
+        self.token_index = TokenKeyIndex(acceptable_answers, normalized_answers)
+
+    def is_valid_answer(self, user_answer, budget=None):
         """
         Validate user answer using multiple strategies
 
         Args:
             user_answer: User's submitted answer
+            budget: Optional ValidationBudget; when it runs out the search stops
+                and the answer is treated as incorrect
 
         Returns:
             Tuple: (is_correct: bool, matched_answer: str, confidence: float)
         """
-        user_answer_clean = user_answer.lower().strip()
+        try:
+            return self._validate(normalize_answer(user_answer), budget)
+        except BudgetExhausted:
+            return False, None, 0.0
+
+    def _validate(self, user_answer_clean, budget):
+        """
+        Run the strategies in order, charging each one to the budget
+        """
+        # A guess of only punctuation or whitespace would prefix-match everything
+        if not user_answer_clean:
+            return False, None, 0.0
 
         # Strategy 1: Exact Match (Fastest)
-        for answer in self.acceptable_answers:
-            if user_answer_clean == answer.lower().strip():
-                return True, answer, 1.0
+        self._charge(budget, 'exact')
+        answer = self._answers_by_normalized.get(user_answer_clean)
+        if answer is not None:
+            return True, answer, 1.0
 
         # Strategy 2: Prefix Match via Trie
         prefix_matches = self.trie.search_prefix(user_answer_clean)
+        self._charge(budget, 'prefix', len(user_answer_clean) + len(prefix_matches))
         if prefix_matches:
-            return True, prefix_matches[0], 0.95
+            return True, self._answers_by_normalized[prefix_matches[0]], 0.95
+
+        # Strategy 3: Same words in any order, ignoring filler words
+        self._charge(budget, 'token')
+        answer = self.token_index.match_tokens(user_answer_clean)
+        if answer is not None and TOKEN_MATCH_CONFIDENCE >= self.tolerance:
+            return True, answer, TOKEN_MATCH_CONFIDENCE
 
-        # Strategy 3: Iterative Deepening DFS for Fuzzy Matching
+        # Strategy 4: Words that sound the same (phonetic keys)
+        self._charge(budget, 'phonetic')
+        answer = self.token_index.match_phonetic(user_answer_clean, self.tolerance)
+        if answer is not None and PHONETIC_MATCH_CONFIDENCE >= self.tolerance:
+            return True, answer, PHONETIC_MATCH_CONFIDENCE
+
+        # Strategy 5: Iterative Deepening DFS for Fuzzy Matching
         result = self._iterative_deepening_fuzzy_search(
             user_answer_clean, 
-            self.acceptable_answers,
-            max_depth=3
+            self.normalized_answers,
+            max_depth=3,
+            budget=budget
         )
 
         if result:
             matched_answer, confidence = result
             if confidence >= self.tolerance:
-                return True, matched_answer, confidence
+                return True, self._answers_by_normalized[matched_answer], confidence
 
         return False, None, 0.0
 
-    def _iterative_deepening_fuzzy_search(self, user_answer, answers, max_depth=3):
+    def _charge(self, budget, strategy, comparisons=1):
+        """Charge work to the budget, if one was given"""
+        if budget is not None:
+            budget.charge(strategy, comparisons)
+
+    def _iterative_deepening_fuzzy_search(self, user_answer, answers, max_depth=3, budget=None):
         """
         Search for matching answer using iterative deepening DFS
 
@@ -69,6 +120,7 @@ class FuzzyMatcher:
             user_answer: User's answer to match
             answers: List of acceptable answers
             max_depth: Maximum search depth (edit distance limit)
+            budget: Optional ValidationBudget charged once per similarity check
 
         Returns:
             Tuple: (matched_answer, confidence) or None
@@ -80,7 +132,8 @@ class FuzzyMatcher:
                 user_answer,
                 answers,
                 depth=0,
-                max_depth=depth_limit
+                max_depth=depth_limit,
+                budget=budget
             )
 
             if result:
@@ -88,7 +141,7 @@ class FuzzyMatcher:
 
         return None
 
-    def _dfs_fuzzy_search(self, user_answer, answers, depth, max_depth):
+    def _dfs_fuzzy_search(self, user_answer, answers, depth, max_depth, budget=None):
         """
         Recursive DFS for fuzzy matching with depth limit
 
@@ -97,6 +150,7 @@ class FuzzyMatcher:
             answers: List of acceptable answers
             depth: Current search depth (edit distance)
             max_depth: Maximum allowed depth
+            budget: Optional ValidationBudget charged once per similarity check
 
         Returns:
             Tuple: (matched_answer, confidence) or None
@@ -107,6 +161,7 @@ class FuzzyMatcher:
 
         # Check similarity at current depth
         for answer in answers:
+            self._charge(budget, 'fuzzy')
             similarity = self._calculate_similarity(user_answer, answer)
 
             # At depth 0, require high similarity
@@ -126,7 +181,7 @@ class FuzzyMatcher:
                     if c != user_answer[i]:
                         modified = user_answer[:i] + c + user_answer[i+1:]
                         result = self._dfs_fuzzy_search(
-                            modified, answers, depth + 1, max_depth
+                            modified, answers, depth + 1, max_depth, budget
                         )
                         if result:
                             return result
@@ -136,7 +191,7 @@ class FuzzyMatcher:
                 for c in 'abcdefghijklmnopqrstuvwxyz ':
                     modified = user_answer[:i] + c + user_answer[i:]
                     result = self._dfs_fuzzy_search(
-                        modified, answers, depth + 1, max_depth
+                        modified, answers, depth + 1, max_depth, budget
                     )
                     if result:
                         return result
@@ -145,7 +200,7 @@ class FuzzyMatcher:
             for i in range(len(user_answer)):
                 modified = user_answer[:i] + user_answer[i+1:]
                 result = self._dfs_fuzzy_search(
-                    modified, answers, depth + 1, max_depth
+                    modified, answers, depth + 1, max_depth, budget
                 )
                 if result:
                     return result
@@ -157,31 +212,36 @@ class FuzzyMatcher:
         Calculate similarity ratio between two strings using SequenceMatcher
 
         Args:
-            str1: First string
-            str2: Second string
+            str1: First string (already normalized)
+            str2: Second string (already normalized)
 
         Returns:
             Float between 0.0 and 1.0 representing similarity
         """
-        matcher = SequenceMatcher(None, str1.lower(), str2.lower())
+        matcher = SequenceMatcher(None, str1, str2)
         return matcher.ratio()
 
-    def get_closest_match(self, user_answer, top_n=3):
+    def get_closest_match(self, user_answer, top_n=3, budget=None):
         """
         Get the closest matching answers ranked by confidence
 
         Args:
             user_answer: User's answer
             top_n: Number of top matches to return
+            budget: Optional ValidationBudget; no suggestions if it runs out
 
         Returns:
             List of tuples: [(answer, confidence), ...]
         """
-        user_answer_clean = user_answer.lower().strip()
+        user_answer_clean = normalize_answer(user_answer)
         matches = []
 
-        for answer in self.acceptable_answers:
-            confidence = self._calculate_similarity(user_answer_clean, answer.lower().strip())
+        for normalized, answer in zip(self.normalized_answers, self.acceptable_answers):
+            try:
+                self._charge(budget, 'suggestions')
+            except BudgetExhausted:
+                return []
+            confidence = self._calculate_similarity(user_answer_clean, normalized)
             matches.append((answer, confidence))
 
         # Sort by confidence descending
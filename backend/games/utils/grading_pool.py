@@ -0,0 +1,270 @@
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+
+from .answer_index import AnswerIndexLoader
+from .budget import ValidationBudget
+from .matcher_cache import MatcherCache
+
+
+logger = logging.getLogger(__name__)
+
+
+def run_grading(matcher, normalized_answer, budget):
+    """
+    Validate one normalized guess and, if it is wrong, collect suggestions
+
+    Args:
+        matcher: Compiled MatcherEngine for the event
+        normalized_answer: normalize_answer() form of the guess
+        budget: ValidationBudget charged by every strategy
+
+    Returns:
+        Tuple: (is_correct, matched_answer, confidence, suggestions)
+    """
+    is_correct, matched_answer, confidence = matcher.is_valid_answer(
+        normalized_answer, budget=budget
+    )
+
+    # Get alternative suggestions if incorrect (and there is budget left)
+    suggestions = []
+    if not is_correct and not budget.exhausted:
+        suggestions = matcher.get_closest_match(normalized_answer, top_n=3, budget=budget)
+        suggestions = [{'answer': ans, 'confidence': conf} for ans, conf in suggestions]
+
+    return is_correct, matched_answer, confidence, suggestions
+
+
+# Per-process state of a grading worker, set up by _init_worker
+_worker = None
+
+
+def _init_worker(config, warm_events):
+    """
+    Build the worker's own matcher cache and compile the warm events up front
+
+    Args:
+        config: Dict with engine, tolerance, cache_size, answer_index_path and budget limits
+        warm_events: Iterable of (event_id, version, acceptable_answers, normalized_answers)
+    """
+    global _worker
+    _worker = SimpleNamespace(
+        matchers=MatcherCache(
+            max_size=config['cache_size'],
+            tolerance=config['tolerance'],
+            engine=config['engine'],
+            answer_index=(AnswerIndexLoader(config['answer_index_path'])
+                          if config['answer_index_path'] else None)
+        ),
+        max_comparisons=config['max_comparisons'],
+        max_microseconds=config['max_microseconds'],
+    )
+    for event_id, version, answers, normalized in warm_events:
+        _worker.matchers.get(_event_stub(event_id, answers, normalized), version)
+
+
+def _event_stub(event_id, acceptable_answers, normalized_answers):
+    """Just enough of a UICEvent for MatcherCache, without touching the database"""
+    return SimpleNamespace(
+        pk=event_id,
+        acceptable_answers=acceptable_answers,
+        normalized_answers=normalized_answers or [],
+    )
+
+
+def _grade_in_worker(event_id, version, acceptable_answers, normalized_answers, normalized_guess):
+    """
+    Worker entry point: grade one guess with the worker's cached matcher
+
+    Returns:
+        Tuple: (verdict, finished budget, time.time() the work started)
+    """
+    started_at = time.time()
+    matcher = _worker.matchers.get(
+        _event_stub(event_id, acceptable_answers, normalized_answers), version
+    )
+    budget = ValidationBudget(
+        max_comparisons=_worker.max_comparisons,
+        max_microseconds=_worker.max_microseconds,
+    )
+    verdict = run_grading(matcher, normalized_guess, budget)
+    return verdict, budget.finish(), started_at
+
+
+class GradingPool:
+    """
+    Bounded process pool that grades guesses off the request thread
+
+    Fuzzy matching is pure Python and holds the GIL, so one slow guess stalls
+    every other request sharing the worker. Submitting it to a pool of grading
+    processes lets heavy guesses run in parallel across cores. Each grading
+    process keeps its own MatcherCache, keyed by answers version, so it never
+    needs the database.
+
+    The pool never queues without bound: once max_pending guesses are in
+    flight, or a guess is not graded within the timeout, grade() returns None
+    and the caller falls back to a cheap verdict.
+    """
+
+    def __init__(self, workers, max_pending=64, timeout_ms=250, engine=None,
+                 tolerance=0.8, cache_size=512, max_comparisons=None, max_microseconds=None,
+                 answer_index_path=''):
+        """
+        Initialize grading pool (processes are started lazily by start())
+
+        Args:
+            workers: Number of grading processes
+            max_pending: Maximum guesses submitted but not yet finished
+            timeout_ms: How long a request waits for its verdict
+            engine: Registered matcher engine name
+            tolerance: Minimum similarity ratio passed to each matcher
+            cache_size: MatcherCache size inside each grading process
+            max_comparisons, max_microseconds: ValidationBudget limits per guess
+            answer_index_path: Compiled answer index each process maps, if any
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout_ms / 1000
+        self._config = {
+            'engine': engine,
+            'tolerance': tolerance,
+            'cache_size': cache_size,
+            'max_comparisons': max_comparisons,
+            'max_microseconds': max_microseconds,
+            'answer_index_path': answer_index_path,
+        }
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.failures = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    @property
+    def started(self):
+        return self._executor is not None
+
+    def start(self, warm_events=()):
+        """
+        Start the grading processes, compiling the given events in each
+
+        Spawned (not forked) so worker processes never inherit the request
+        server's threads or database connections.
+
+        Args:
+            warm_events: Iterable of (event_id, version, acceptable_answers, normalized_answers)
+        """
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self._config, list(warm_events)),
+            )
+
+    def shutdown(self):
+        """Stop the grading processes, abandoning queued work"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def grade(self, event_id, version, acceptable_answers, normalized_answers, normalized_guess):
+        """
+        Grade a normalized guess in a worker process
+
+        Args:
+            event_id: Primary key of the UICEvent
+            version: answers_version() of acceptable_answers
+            acceptable_answers: List of correct answer strings
+            normalized_answers: Stored normalize_answer() forms, or None
+            normalized_guess: normalize_answer() form of the guess
+
+        Returns:
+            Tuple: (verdict, budget), or None if the pool is full, slow or broken
+        """
+        with self._lock:
+            executor = self._executor
+            if executor is None or self.pending >= self.max_pending:
+                self.rejected += 1
+                return None
+            self.pending += 1
+            self.submitted += 1
+
+        submitted_at = time.time()
+        future = None
+        try:
+            future = executor.submit(
+                _grade_in_worker, event_id, version, acceptable_answers,
+                normalized_answers, normalized_guess
+            )
+            verdict, budget, started_at = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Drop it if no worker has picked it up yet; a running guess
+            # finishes in the background and is discarded
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            return None
+        except (BrokenProcessPool, RuntimeError) as exc:
+            logger.error('Grading pool failed, it will be restarted on the next guess: %s', exc)
+            with self._lock:
+                self.failures += 1
+                broken = self._executor is executor
+                if broken:
+                    self._executor = None
+            if broken:
+                # Reap the dead pool's surviving processes and management thread
+                executor.shutdown(wait=False, cancel_futures=True)
+            return None
+        finally:
+            if future is None:
+                self._release()
+            else:
+                future.add_done_callback(lambda _: self._release())
+
+        wait_ms = max(0.0, (started_at - submitted_at) * 1000)
+        with self._lock:
+            self.completed += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        return verdict, budget
+
+    def _release(self):
+        """A submitted guess has left the pool"""
+        with self._lock:
+            self.pending -= 1
+
+    def stats(self):
+        """
+        Snapshot of pool counters
+
+        Returns:
+            Dict with queue depth, outcome counts and queue wait times
+        """
+        with self._lock:
+            average = self.total_wait_ms / self.completed if self.completed else 0.0
+            return {
+                'workers': self.workers,
+                'started': self._executor is not None,
+                'queue_depth': self.pending,
+                'max_pending': self.max_pending,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'timeouts': self.timeouts,
+                'rejected': self.rejected,
+                'failures': self.failures,
+                'avg_wait_ms': round(average, 2),
+                'max_wait_ms': round(self.max_wait_ms, 2),
+            }
@@ -0,0 +1,77 @@
+import hashlib
+from io import BytesIO
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+# Derivative name -> maximum width in pixels, smallest first
+VARIANT_WIDTHS = {
+    'thumb': 160,
+    'mobile': 480,
+    'desktop': 1280,
+}
+
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+
+def _encode(image, image_format):
+    """Encode a Pillow image as 'jpg', 'png' or 'webp' bytes"""
+    buffer = BytesIO()
+    if image_format == 'jpg':
+        image.convert('RGB').save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    elif image_format == 'png':
+        image.save(buffer, 'PNG', optimize=True)
+    else:
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def build_variants(image_bytes, webp=True):
+    """
+    Downscale an uploaded image into the VARIANT_WIDTHS derivatives
+
+    Variants are only produced for widths smaller than the original, keep the
+    aspect ratio and are re-encoded as JPEG (PNG when the image has
+    transparency), plus a WebP copy of each when webp is set. Animated images
+    are left alone so they keep their animation.
+
+    Args:
+        image_bytes: Original image file contents
+        webp: Also produce a WebP copy of every variant
+
+    Returns:
+        List of dicts: [{'name', 'image_format', 'width', 'height', 'image_data',
+        'image_sha256'}, ...], or [] if the image cannot be decoded
+    """
+    try:
+        original = Image.open(BytesIO(image_bytes))
+        if getattr(original, 'is_animated', False):
+            return []
+        original = ImageOps.exif_transpose(original)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        return []
+
+    has_alpha = original.mode in ('RGBA', 'LA') or 'transparency' in original.info
+    if original.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        original = original.convert('RGBA' if has_alpha else 'RGB')
+    formats = ['png' if has_alpha else 'jpg'] + (['webp'] if webp else [])
+
+    variants = []
+    for name, width in VARIANT_WIDTHS.items():
+        if width >= original.width:
+            break
+        height = max(1, round(original.height * width / original.width))
+        resized = original.resize((width, height), Image.LANCZOS)
+        for image_format in formats:
+            image_data = _encode(resized, image_format)
+            variants.append({
+                'name': name,
+                'image_format': image_format,
+                'width': width,
+                'height': height,
+                'image_data': image_data,
+                'image_sha256': hashlib.sha256(image_data).hexdigest(),
+            })
+
+    return variants
@@ -0,0 +1,42 @@
+class MatcherEngine:
+    """
+    Interface every answer matching engine implements
+
+    An engine is compiled once per event from its acceptable answers and then
+    grades any number of guesses. Engines are registered by name in
+    games.utils.fuzzy_matcher and selected with the MATCHER_ENGINE setting.
+    """
+
+    def __init__(self, acceptable_answers, tolerance=0.8, normalized_answers=None):
+        """
+        Initialize matcher
+
+        Args:
+            acceptable_answers: List of correct answer strings
+            tolerance: Minimum similarity ratio (0.0-1.0)
+            normalized_answers: Precomputed normalize_answer() forms aligned
+                with acceptable_answers (computed by the engine if omitted)
+        """
+        raise NotImplementedError
+
+    def is_valid_answer(self, user_answer, budget=None):
+        """
+        Validate user answer
+
+        Args:
+            user_answer: User's submitted answer (raw or already normalized)
+            budget: Optional ValidationBudget
+
+        Returns:
+            Tuple: (is_correct: bool, matched_answer: str, confidence: float)
+        """
+        raise NotImplementedError
+
+    def get_closest_match(self, user_answer, top_n=3, budget=None):
+        """
+        Get the closest matching answers ranked by confidence
+
+        Returns:
+            List of tuples: [(answer, confidence), ...]
+        """
+        raise NotImplementedError
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from .fuzzy_matcher import DEFAULT_ENGINE, build_matcher
+from .normalize import NORMALIZATION_VERSION
+
+
+def answers_version(acceptable_answers):
+    """
+    Short, stable hash of an event's acceptable answers
+
+    NORMALIZATION_VERSION is part of the hash, so a change to normalize_answer
+    also retires every matcher and compiled index built from the old forms.
+
+    Args:
+        acceptable_answers: List of correct answer strings
+
+    Returns:
+        16 character hex digest
+    """
+    payload = json.dumps([NORMALIZATION_VERSION, acceptable_answers], ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class MatcherCache:
+    """
+    Bounded LRU registry of compiled matchers, one per UICEvent
+
+    Entries are keyed by event id and remember the answers version they were
+    built from, so a stale matcher is never served even if an invalidation
+    signal was missed (e.g. a queryset .update()).
+    """
+
+    def __init__(self, max_size=512, tolerance=0.8, engine=DEFAULT_ENGINE, answer_index=None):
+        """
+        Initialize matcher cache
+
+        Args:
+            max_size: Maximum number of compiled matchers kept in memory
+            tolerance: Minimum similarity ratio passed to each matcher
+            engine: Registered matcher engine name
+            answer_index: Optional AnswerIndexLoader; events compiled into it
+                at the same answers version reuse its mapped tries
+        """
+        self.max_size = max_size
+        self.tolerance = tolerance
+        self.engine = engine
+        self.answer_index = answer_index
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.compiled_hits = 0
+
+    def get(self, uic_event, version=None):
+        """
+        Get the compiled matcher for an event, building it on a miss
+
+        Args:
+            uic_event: UICEvent instance
+            version: Precomputed answers_version(), computed here if omitted
+
+        Returns:
+            Compiled matcher for the event's acceptable answers
+        """
+        if version is None:
+            version = answers_version(uic_event.acceptable_answers)
+
+        with self._lock:
+            entry = self._entries.get(uic_event.pk)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(uic_event.pk)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Build outside the lock so a slow build does not block other events
+        # Use the normalized forms stored on the event when they are in sync
+        normalized = uic_event.normalized_answers
+        if len(normalized) != len(uic_event.acceptable_answers):
+            normalized = None
+
+        trie = None
+        compiled = self.answer_index.event(uic_event.pk) if self.answer_index is not None else None
+        if compiled is not None and compiled.version == version:
+            normalized = compiled.normalized_answers
+            trie = compiled.trie
+
+        matcher = build_matcher(
+            uic_event.acceptable_answers,
+            engine=self.engine,
+            tolerance=self.tolerance,
+            normalized_answers=normalized,
+            trie=trie
+        )
+
+        with self._lock:
+            if trie is not None:
+                self.compiled_hits += 1
+            self._entries[uic_event.pk] = (version, matcher)
+            self._entries.move_to_end(uic_event.pk)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return matcher
+
+    def invalidate(self, event_id):
+        """
+        Drop the compiled matcher for a single event
+
+        Args:
+            event_id: Primary key of the UICEvent
+        """
+        with self._lock:
+            if self._entries.pop(event_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every compiled matcher and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+            self.compiled_hits = 0
+
+    def stats(self):
+        """
+        Snapshot of cache counters
+
+        Returns:
+            Dict with size, max_size, hits, misses, evictions, invalidations
+            and how many misses were served from the compiled answer index
+        """
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'engine': self.engine,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'compiled_hits': self.compiled_hits,
+            }
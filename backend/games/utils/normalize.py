@@ -0,0 +1,49 @@
+import re
+import unicodedata
+
+
+# Bump whenever normalize_answer's output changes for any input (alongside a
+# data migration recomputing UICEvent.normalized_answers, as in 0014), so
+# cached matchers and compiled answer indexes built from old forms are dropped
+NORMALIZATION_VERSION = 1
+
+ARTICLES = frozenset({'a', 'an', 'the'})
+NON_WORD_PATTERN = re.compile(r'[\W_]+')
+
+
+def normalize_answer(text):
+    """
+    Canonical form used for every answer comparison
+
+    Pipeline: NFKD accent stripping, casefold, then NFKD again (casefolding
+    can itself produce decomposable characters, like NFKC_Casefold), '&' to
+    'and', punctuation and whitespace collapsed to single spaces, and
+    standalone articles removed (unless nothing else is left). The result is
+    idempotent: compatibility characters such as '™', 'ﬁ' and 'Ⅸ' are
+    expanded before casefolding, so 'Hack™ Club' -> 'hacktm club'.
+
+    Args:
+        text: Raw answer text
+
+    Returns:
+        Normalized string, e.g. "The Café-Society!" -> "cafe society"
+    """
+    text = _strip_marks(_strip_marks(text).casefold())
+    text = text.replace('&', ' and ')
+    tokens = NON_WORD_PATTERN.sub(' ', text).split()
+
+    content = [token for token in tokens if token not in ARTICLES]
+    return ' '.join(content or tokens)
+
+
+def _strip_marks(text):
+    """NFKD decomposition with combining marks (accents) removed"""
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+def normalize_answers(acceptable_answers):
+    """
+    Normalize a list of answers, keeping positions aligned with the input
+    """
+    return [normalize_answer(answer) for answer in acceptable_answers]
@@ -0,0 +1,44 @@
+# Soundex consonant classes; vowels, h, w and y carry no code
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'),
+    **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'),
+    'l': '4',
+    **dict.fromkeys('mn', '5'),
+    'r': '6',
+}
+
+# Leading letters that sound alike ("computing" / "komputing")
+FIRST_LETTER_FOLDS = {'c': 'k', 'q': 'k', 'z': 's'}
+
+
+def phonetic_key(word):
+    """
+    Soundex-style sound key for a single normalized word
+
+    Unlike classic Soundex the code is not truncated to four characters, so
+    long words keep enough detail to avoid collisions (e.g. "machinery" and
+    "machinary" share a key, "machinery" and "machine" do not), and a few
+    sound-alike first letters are folded together. Digits are kept verbatim.
+
+    Args:
+        word: Lowercase word without punctuation
+
+    Returns:
+        Sound key string, or '' for an empty word
+    """
+    if not word:
+        return ''
+    if not word.isalpha():
+        return word
+
+    key = [FIRST_LETTER_FOLDS.get(word[0], word[0])]
+    previous = SOUNDEX_CODES.get(word[0], '')
+    for char in word[1:]:
+        code = SOUNDEX_CODES.get(char, '')
+        if code and code != previous:
+            key.append(code)
+        # h and w do not separate letters with the same code; vowels do
+        if char not in 'hw':
+            previous = code
+    return ''.join(key)
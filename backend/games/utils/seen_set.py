@@ -0,0 +1,45 @@
+class SeenSet:
+    """
+    Set of event ids packed into a bitset (bit n set = event n seen)
+
+    Event ids are small, dense integers, so a player who has seen the whole
+    catalog costs one bit per event instead of one Guess row per question.
+    """
+
+    def __init__(self, data=b''):
+        """
+        Args:
+            data: Bytes from to_bytes() (e.g. UserProfile.seen_events)
+        """
+        self._bits = bytearray(data or b'')
+
+    def __contains__(self, event_id):
+        byte = event_id >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << (event_id & 7)))
+
+    def __len__(self):
+        """Number of events seen"""
+        return int.from_bytes(self._bits, 'little').bit_count()
+
+    def add(self, event_id):
+        """
+        Mark an event as seen
+
+        Returns:
+            True if it had not been seen before
+        """
+        byte = event_id >> 3
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(byte + 1 - len(self._bits)))
+        mask = 1 << (event_id & 7)
+        if self._bits[byte] & mask:
+            return False
+        self._bits[byte] |= mask
+        return True
+
+    def clear(self):
+        """Forget every seen event"""
+        self._bits = bytearray()
+
+    def to_bytes(self):
+        return bytes(self._bits)
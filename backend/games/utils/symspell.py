@@ -0,0 +1,168 @@
+from .distance import damerau_distance, similarity_from_distance
+from .normalize import normalize_answer
+
+
+def delete_variants(term, max_distance, prefix_length):
+    """
+    All strings reachable from the term's prefix by up to max_distance deletions
+
+    Args:
+        term: Normalized term
+        max_distance: Maximum number of deletions
+        prefix_length: Number of leading characters expanded
+
+    Returns:
+        Set of delete variants (the prefix itself included)
+    """
+    key = term[:prefix_length]
+    variants = {key}
+    frontier = {key}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for word in frontier:
+            for i in range(len(word)):
+                next_frontier.add(word[:i] + word[i + 1:])
+        next_frontier -= variants
+        variants |= next_frontier
+        frontier = next_frontier
+    return variants
+
+
+def rank_suggestions(query, candidates, max_distance, top_k):
+    """
+    Verify candidate terms against the query and order the survivors
+
+    Args:
+        query: Normalized query
+        candidates: Iterable of (term, [(event_id, original answer), ...])
+        max_distance: Maximum edit distance a suggestion may be from the query
+        top_k: Maximum number of suggestions
+
+    Returns:
+        List of dicts: [{'answer', 'event_id', 'distance', 'confidence'}, ...],
+        best first
+    """
+    matches = []
+    for term, owners in candidates:
+        distance = damerau_distance(query, term, max_distance)
+        if distance > max_distance:
+            continue
+        confidence = similarity_from_distance(query, term, distance)
+        for event_id, answer in owners:
+            matches.append({
+                'answer': answer,
+                'event_id': event_id,
+                'distance': distance,
+                'confidence': confidence,
+            })
+
+    matches.sort(key=lambda m: (m['distance'], -m['confidence'], m['answer'], m['event_id']))
+    return matches[:top_k]
+
+
+class SymSpellIndex:
+    """
+    Catalog-wide "did you mean" index using symmetric delete neighbourhoods
+
+    Every indexed answer is stored under each string reachable from it by up to
+    max_distance deletions. A query generates its own deletions and only the
+    answers sharing one of those keys are verified with a real edit distance,
+    so lookups cost roughly the same regardless of catalog size.
+
+    Only the first prefix_length characters are expanded, which keeps the
+    neighbourhood small for long event names.
+    """
+
+    def __init__(self, max_distance=2, prefix_length=7):
+        """
+        Initialize an empty index
+
+        Args:
+            max_distance: Maximum edit distance a suggestion may be from the query
+            prefix_length: Number of leading characters expanded into deletes
+        """
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._deletes = {}       # delete variant -> set of terms
+        self._terms = {}         # term -> {event_id: original answer}
+        self._event_terms = {}   # event_id -> set of terms
+
+    def __len__(self):
+        """Number of distinct indexed terms"""
+        return len(self._terms)
+
+    def _delete_variants(self, term):
+        return delete_variants(term, self.max_distance, self.prefix_length)
+
+    def add_event(self, event_id, acceptable_answers):
+        """
+        Index (or re-index) one event's answers
+
+        Args:
+            event_id: Primary key of the UICEvent
+            acceptable_answers: List of correct answer strings
+        """
+        self.remove_event(event_id)
+
+        terms = set()
+        for answer in acceptable_answers:
+            term = normalize_answer(answer)
+            if not term:
+                continue
+            terms.add(term)
+            owners = self._terms.get(term)
+            if owners is None:
+                owners = self._terms[term] = {}
+                for variant in self._delete_variants(term):
+                    self._deletes.setdefault(variant, set()).add(term)
+            owners.setdefault(event_id, answer)
+
+        self._event_terms[event_id] = terms
+
+    def remove_event(self, event_id):
+        """
+        Drop one event's answers, keeping terms other events still use
+
+        Args:
+            event_id: Primary key of the UICEvent
+        """
+        for term in self._event_terms.pop(event_id, ()):
+            owners = self._terms[term]
+            owners.pop(event_id, None)
+            if owners:
+                continue
+
+            del self._terms[term]
+            for variant in self._delete_variants(term):
+                bucket = self._deletes.get(variant)
+                if bucket is not None:
+                    bucket.discard(term)
+                    if not bucket:
+                        del self._deletes[variant]
+
+    def lookup(self, query, top_k=5):
+        """
+        Find the indexed answers closest to the query
+
+        Args:
+            query: User's text
+            top_k: Maximum number of suggestions
+
+        Returns:
+            List of dicts: [{'answer', 'event_id', 'distance', 'confidence'}, ...],
+            best first
+        """
+        query = normalize_answer(query)
+        if not query:
+            return []
+
+        candidates = set()
+        for variant in self._delete_variants(query):
+            candidates.update(self._deletes.get(variant, ()))
+
+        return rank_suggestions(
+            query,
+            ((term, self._terms[term].items()) for term in candidates),
+            self.max_distance,
+            top_k
+        )
@@ -0,0 +1,233 @@
+from difflib import SequenceMatcher
+
+from .budget import BudgetExhausted
+from .distance import damerau_distance, similarity_from_distance
+from .matcher_base import MatcherEngine
+from .normalize import normalize_answer, normalize_answers
+from .phonetic import phonetic_key
+
+
+# Connecting words players tend to drop from organization names
+FILLER_WORDS = frozenset({'of', 'for', 'and', 'at', 'in', 'on', 'to', 'de'})
+
+# Confidence reported by the constant-time TokenKeyIndex stages
+TOKEN_MATCH_CONFIDENCE = 0.9
+PHONETIC_MATCH_CONFIDENCE = 0.85
+
+
+def tokenize(text):
+    """
+    Split text into normalized word tokens
+
+    Returns:
+        List of tokens in their original order
+    """
+    return normalize_answer(text).split()
+
+
+def content_tokens(tokens):
+    """
+    Drop filler words, unless nothing else would be left
+    """
+    return [token for token in tokens if token not in FILLER_WORDS] or tokens
+
+
+def token_set_ratio(tokens1, tokens2):
+    """
+    Similarity of two token sets, insensitive to word order and repeated words
+
+    Shared tokens are compared against each side's full sorted token list, so a
+    guess that names a subset or superset of the answer's words still scores high.
+
+    Returns:
+        Float between 0.0 and 1.0
+    """
+    set1, set2 = set(tokens1), set(tokens2)
+    common = ' '.join(sorted(set1 & set2))
+    combined1 = ' '.join(filter(None, [common, ' '.join(sorted(set1 - set2))]))
+    combined2 = ' '.join(filter(None, [common, ' '.join(sorted(set2 - set1))]))
+
+    return max(
+        SequenceMatcher(None, common, combined1).ratio() if common else 0.0,
+        SequenceMatcher(None, common, combined2).ratio() if common else 0.0,
+        SequenceMatcher(None, combined1, combined2).ratio(),
+    )
+
+
+class TokenKeyIndex:
+    """
+    Constant-time word-order and sound-alike lookups for multi-word answers
+
+    Each multi-word answer is reduced, once, to two keys: its sorted set of
+    content words and the sorted set of their phonetic keys. A guess that
+    reorders, repeats or drops filler words, or misspells words in a way that
+    sounds the same, resolves with a single dict lookup per key.
+
+    Sound keys are coarse ("kiss" and "chess" share one), so a phonetic hit
+    is only accepted if the words, lined up by sound, are also within the
+    matcher's similarity tolerance.
+    """
+
+    def __init__(self, acceptable_answers, normalized_answers):
+        """
+        Initialize token key index
+
+        Args:
+            acceptable_answers: List of correct answer strings
+            normalized_answers: normalize_answer() forms aligned with acceptable_answers
+        """
+        self._by_token_key = {}
+        self._by_phonetic_key = {}
+        for answer, normalized in zip(acceptable_answers, normalized_answers):
+            tokens = content_tokens(normalized.split())
+            # Single words are left to the character-level strategies
+            if len(tokens) < 2:
+                continue
+            self._by_token_key.setdefault(self._token_key(tokens), answer)
+            self._by_phonetic_key.setdefault(self._phonetic_key(tokens), (answer, self._sound_order(tokens)))
+
+    def _token_key(self, tokens):
+        return ' '.join(sorted(set(tokens)))
+
+    def _phonetic_key(self, tokens):
+        return ' '.join(sorted({phonetic_key(token) for token in tokens}))
+
+    def _sound_order(self, tokens):
+        """Words sorted by sound key (one per key), so a reordered guess lines up"""
+        by_key = {phonetic_key(token): token for token in tokens}
+        return ' '.join(by_key[key] for key in sorted(by_key))
+
+    def match_tokens(self, normalized_answer):
+        """
+        Answer with the same content words in any order
+
+        Args:
+            normalized_answer: normalize_answer() form of the guess
+
+        Returns:
+            Matching original answer, or None
+        """
+        tokens = content_tokens(normalized_answer.split())
+        if len(tokens) < 2:
+            return None
+        return self._by_token_key.get(self._token_key(tokens))
+
+    def match_phonetic(self, normalized_answer, tolerance):
+        """
+        Answer whose content words sound the same, in any order
+
+        Args:
+            normalized_answer: normalize_answer() form of the guess
+            tolerance: Minimum similarity between the guess and the answer's
+                words once lined up by sound
+
+        Returns:
+            Matching original answer, or None
+        """
+        tokens = content_tokens(normalized_answer.split())
+        if len(tokens) < 2:
+            return None
+        hit = self._by_phonetic_key.get(self._phonetic_key(tokens))
+        if hit is None:
+            return None
+        answer, answer_words = hit
+        guess_words = self._sound_order(tokens)
+        max_distance = int((1.0 - tolerance) * max(len(guess_words), len(answer_words)) + 1e-9)
+        distance = damerau_distance(guess_words, answer_words, max_distance=max_distance)
+        if similarity_from_distance(guess_words, answer_words, distance) < tolerance:
+            return None
+        return answer
+
+
+class TokenSetMatcher(MatcherEngine):
+    """
+    Word-level matching engine for multi-word answers
+
+    Guesses that reorder, repeat or drop words from an answer are compared on
+    their token sets instead of character by character.
+    """
+
+    def __init__(self, acceptable_answers, tolerance=0.8, normalized_answers=None):
+        """
+        Initialize token-set matcher
+
+        Args:
+            acceptable_answers: List of correct answer strings
+            tolerance: Minimum similarity ratio (0.0-1.0)
+            normalized_answers: Precomputed normalize_answer() forms aligned
+                with acceptable_answers (computed here if omitted)
+        """
+        if normalized_answers is None:
+            normalized_answers = normalize_answers(acceptable_answers)
+
+        self.acceptable_answers = acceptable_answers
+        self.tolerance = tolerance
+
+        # Pre-tokenize every answer once; sorted-token key gives O(1) reorder matches
+        self._tokens = [
+            (answer, normalized.split())
+            for answer, normalized in zip(acceptable_answers, normalized_answers)
+        ]
+        self._answers_by_sorted_key = {}
+        for answer, tokens in self._tokens:
+            self._answers_by_sorted_key.setdefault(' '.join(sorted(tokens)), answer)
+
+    def is_valid_answer(self, user_answer, budget=None):
+        """
+        Validate user answer on its tokens
+
+        Args:
+            user_answer: User's submitted answer
+            budget: Optional ValidationBudget
+
+        Returns:
+            Tuple: (is_correct: bool, matched_answer: str, confidence: float)
+        """
+        tokens = tokenize(user_answer)
+
+        try:
+            # Strategy 1: Same words in any order
+            self._charge(budget, 'exact')
+            answer = self._answers_by_sorted_key.get(' '.join(sorted(tokens)))
+            if answer is not None:
+                return True, answer, 1.0
+
+            # Strategy 2: Token-set similarity
+            matches = self._rank(tokens, budget, 'token')
+        except BudgetExhausted:
+            return False, None, 0.0
+
+        if matches:
+            return True, matches[0][0], matches[0][1]
+        return False, None, 0.0
+
+    def get_closest_match(self, user_answer, top_n=3, budget=None):
+        """
+        Get the closest matching answers ranked by confidence
+
+        Returns:
+            List of tuples: [(answer, confidence), ...]
+        """
+        try:
+            return self._rank(tokenize(user_answer), budget, 'suggestions')[:top_n]
+        except BudgetExhausted:
+            return []
+
+    def _charge(self, budget, strategy, comparisons=1):
+        """Charge work to the budget, if one was given"""
+        if budget is not None:
+            budget.charge(strategy, comparisons)
+
+    def _rank(self, tokens, budget, strategy):
+        """
+        Answers whose token-set similarity reaches the tolerance, best first
+        """
+        matches = []
+        for answer, answer_tokens in self._tokens:
+            self._charge(budget, strategy)
+            confidence = token_set_ratio(tokens, answer_tokens)
+            if confidence >= self.tolerance:
+                matches.append((answer, confidence))
+
+        matches.sort(key=lambda m: (-m[1], m[0]))
+        return matches
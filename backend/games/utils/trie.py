@@ -1,6 +1,8 @@
 class TrieNode:
     """Node in a Trie data structure"""
 
+    __slots__ = ('children', 'is_end_of_word', 'word')
+
     def __init__(self):
         self.children = {}
         self.is_end_of_word = False
@@ -0,0 +1,76 @@
+import hashlib
+
+
+class VerdictCache:
+    """
+    Memoized grading verdicts keyed on (event id, answers version, normalized answer)
+
+    Both correct and incorrect verdicts are stored, so a popular wrong answer costs
+    one cache lookup instead of a full fuzzy search. Storage is any Django-style
+    cache backend (get/set), which makes the cache shareable across workers and
+    leaves size-bounded eviction to the backend (e.g. LocMemCache MAX_ENTRIES,
+    Redis maxmemory).
+    """
+
+    def __init__(self, backend, timeout=None, namespace='default'):
+        """
+        Initialize verdict cache
+
+        Args:
+            backend: Cache backend exposing get(key) and set(key, value, timeout)
+            timeout: Seconds to keep a verdict (None uses the backend default)
+            namespace: Prefix separating verdicts of different matcher engines
+        """
+        self.backend = backend
+        self.timeout = timeout
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, event_id, version, normalized_answer):
+        """
+        Build a short, backend-safe cache key
+
+        Answers are hashed so keys stay fixed-length and free of whitespace
+        """
+        digest = hashlib.sha1(normalized_answer.encode('utf-8')).hexdigest()[:20]
+        return f"verdict:{self.namespace}:{event_id}:{version}:{digest}"
+
+    def get(self, event_id, version, normalized_answer):
+        """
+        Look up a cached verdict
+
+        Returns:
+            Tuple: (is_correct, matched_answer, confidence, suggestions) or None
+        """
+        verdict = self.backend.get(self.make_key(event_id, version, normalized_answer))
+        if verdict is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return verdict
+
+    def set(self, event_id, version, normalized_answer, verdict):
+        """
+        Store a verdict
+
+        Args:
+            verdict: Tuple (is_correct, matched_answer, confidence, suggestions)
+        """
+        key = self.make_key(event_id, version, normalized_answer)
+        if self.timeout is None:
+            self.backend.set(key, verdict)
+        else:
+            self.backend.set(key, verdict, self.timeout)
+
+    def stats(self):
+        """
+        Snapshot of cache counters for this process
+
+        Returns:
+            Dict with hits and misses
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -1,44 +1,194 @@
 from rest_framework import status, viewsets
 from rest_framework.decorators import api_view, permission_classes, action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
-from django.utils import timezone
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
 from datetime import timedelta
-import random
 from .models import UICEvent, GameRound, Guess
-from .serializers import UICEventSerializer, GameRoundSerializer, GuessSerializer
-from games.utils.fuzz_finder import FuzzyMatcher
+from .serializers import IMAGE_MODE_INLINE, IMAGE_MODE_URL, UICEventSerializer, GameRoundSerializer, GuessSerializer
+from .catalog import catalog_index
+from .daily import daily_payload
+from .difficulty import difficulty_sampler
+from .guess_buffer import guess_buffer
+from .images import pick_variant
+from .jobs import job_stats
+from .round_state import DealtEvent, round_states
+from .sampling import SELECTION_MODES, pick_questions
+from .services import GuessRejected, RoundRejected, complete_round, record_guess, record_guesses
+from .grading import (
+    answer_index, budget_stats, grade_guess, grading_pool, matcher_cache, verdict_cache
+)
+from .utils.images import VARIANT_WIDTHS
+
+
+def _image_mode(request):
+    """?images=url asks for image URLs instead of inline base64 images"""
+    return IMAGE_MODE_URL if request.query_params.get('images') == IMAGE_MODE_URL else IMAGE_MODE_INLINE
+
+
+# Longest answer a Guess row can store
+ANSWER_MAX_LENGTH = Guess._meta.get_field('user_answer').max_length
+GUESS_FIELDS_ERROR = (
+    f'answer must be a string of at most {ANSWER_MAX_LENGTH} characters '
+    'and time_taken a non-negative integer'
+)
+
+
+def _guess_fields(answer, time_taken):
+    """
+    Validate a guess's answer and time_taken before it is graded
+
+    Returns:
+        (answer, time_taken as an int), or None if either is invalid
+    """
+    if not isinstance(answer, str) or len(answer) > ANSWER_MAX_LENGTH:
+        return None
+    if isinstance(time_taken, bool):
+        return None
+    try:
+        time_taken = int(time_taken)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if time_taken < 0:
+        return None
+    return answer, time_taken
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_uic_events(request):
     """Get all UIC events (read-only)"""
+    image_mode = _image_mode(request)
     events = UICEvent.objects.all()
-    serializer = UICEventSerializer(events, many=True, context={'request': request})
+    if image_mode == IMAGE_MODE_INLINE:
+        events = events.with_images()
+    serializer = UICEventSerializer(
+        events, many=True, context={'request': request, 'image_mode': image_mode}
+    )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def event_image(request, event_id):
+    """
+    Get an event's raw image bytes
+
+    ?variant=thumb|mobile|desktop or ?width=N picks a downscaled variant (WebP
+    when the browser accepts it); without either the original is served.
+    Answers conditional requests (If-None-Match / If-Modified-Since) with 304
+    without reading the image. When ?v= matches the current content hash, as in
+    the serializer's image_url, the response may be cached indefinitely.
+    """
+    event = UICEvent.objects.only(
+        'id', 'image_format', 'image_sha256', 'image_updated_at'
+    ).filter(id=event_id).first()
+    if event is None or not event.image_sha256:
+        return Response({'error': 'Image not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    variant_name = request.query_params.get('variant')
+    if variant_name is not None and variant_name not in VARIANT_WIDTHS:
+        return Response(
+            {'error': f"variant must be one of: {', '.join(VARIANT_WIDTHS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        width = int(request.query_params['width']) if 'width' in request.query_params else None
+    except ValueError:
+        return Response(
+            {'error': 'width must be an integer'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    accept_webp = 'image/webp' in request.META.get('HTTP_ACCEPT', '')
+    variant = pick_variant(event, name=variant_name, width=width, accept_webp=accept_webp)
+    source = variant or event
+
+    etag = quote_etag(source.image_sha256)
+    modified_at = variant.created_at if variant is not None else event.image_updated_at
+    last_modified = int(modified_at.timestamp()) if modified_at else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        image_data = type(source).objects.filter(pk=source.pk).values_list('image_data', flat=True).first()
+        response = HttpResponse(bytes(image_data), content_type=source.image_content_type)
+
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    if variant_name is not None or width is not None:
+        patch_vary_headers(response, ['Accept'])
+    # Signed-in users only, so never in shared caches
+    if request.query_params.get('v') == event.image_sha256[:16]:
+        patch_cache_control(response, private=True, max_age=31536000, immutable=True)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def start_game(request):
-    """Start a new game round with randomized questions"""
-    # Create a new game round for the user
-    game_round = GameRound.objects.create(user=request.user)
-
-    # Get random UIC events for this round (7 questions, or all if fewer than 7 exist)
-    all_events = list(UICEvent.objects.all())
-    
-    if len(all_events) <= 7:
-        # If 7 or fewer events exist, use all and shuffle them
-        selected_events = all_events
-        random.shuffle(selected_events)
-    else:
-        # If more than 7 events exist, randomly sample 7 (sample() automatically randomizes)
-        selected_events = random.sample(all_events, 7)
+    """
+    Start a new game round with randomized questions
+
+    round_type 'daily' starts today's daily challenge instead: the same
+    questions for every player, served from a cached payload with image URLs.
+    """
+    round_type = request.data.get('round_type', GameRound.ROUND_STANDARD)
+    if round_type == GameRound.ROUND_DAILY:
+        payload = daily_payload()
+        game_round = GameRound.objects.create(
+            user=request.user,
+            round_type=GameRound.ROUND_DAILY,
+            question_ids=[question['id'] for question in payload['questions']]
+        )
+        round_states.prime(game_round, [
+            DealtEvent(
+                question['id'], question['name'], question['description'],
+                question['acceptable_answers'], [], question['points_value']
+            )
+            for question in payload['questions']
+        ])
+        return Response({'game_round_id': game_round.id, **payload}, status=status.HTTP_201_CREATED)
+    if round_type != GameRound.ROUND_STANDARD:
+        return Response(
+            {'error': f"round_type must be one of: {GameRound.ROUND_STANDARD}, {GameRound.ROUND_DAILY}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    selection = request.data.get('selection', settings.GAMES_DEFAULT_SELECTION)
+    if selection not in SELECTION_MODES:
+        return Response(
+            {'error': f"selection must be one of: {', '.join(SELECTION_MODES)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # Get random UIC events for this round (GAMES_ROUND_SIZE questions, or all if fewer exist)
+    # Sample ids from memory, then load just the chosen events
+    selected_ids = pick_questions(request.user, settings.GAMES_ROUND_SIZE, selection)
+
+    image_mode = _image_mode(request)
+    events = UICEvent.objects.all()
+    if image_mode == IMAGE_MODE_INLINE:
+        events = events.with_images()
+    events_by_id = events.in_bulk(selected_ids)
+    selected_events = [events_by_id[event_id] for event_id in selected_ids if event_id in events_by_id]
+
+    # Create a new game round for the user, remembering what was dealt
+    game_round = GameRound.objects.create(
+        user=request.user,
+        question_ids=[event.pk for event in selected_events]
+    )
+    round_states.prime(game_round, selected_events)
 
     serializer = GameRoundSerializer(game_round)
-    events_serializer = UICEventSerializer(selected_events, many=True, context={'request': request})
+    events_serializer = UICEventSerializer(
+        selected_events, many=True, context={'request': request, 'image_mode': image_mode}
+    )
 
     return Response({
         'game_round_id': game_round.id,
@@ -53,53 +203,78 @@ def submit_guess(request):
     """Submit a guess for a question (Updated with fuzzy matching)"""
     game_round_id = request.data.get('game_round_id')
     uic_event_id = request.data.get('uic_event_id')
-    user_answer = request.data.get('answer')
-    time_taken = request.data.get('time_taken', 0)
+    fields = _guess_fields(request.data.get('answer'), request.data.get('time_taken', 0))
+    if fields is None:
+        return Response({'error': GUESS_FIELDS_ERROR}, status=status.HTTP_400_BAD_REQUEST)
+    user_answer, time_taken = fields
 
     try:
-        game_round = GameRound.objects.get(id=game_round_id, user=request.user)
-        uic_event = UICEvent.objects.get(id=uic_event_id)
-    except (GameRound.DoesNotExist, UICEvent.DoesNotExist):
+        game_round_id = int(game_round_id)
+        uic_event_id = int(uic_event_id)
+    except (TypeError, ValueError):
         return Response(
             {'error': 'Game round or event not found'},
             status=status.HTTP_404_NOT_FOUND
         )
 
-    # Initialize fuzzy matcher with this event's acceptable answers
-    fuzzy_matcher = FuzzyMatcher(
-        uic_event.acceptable_answers,
-        tolerance=0.8  # 80% minimum similarity
-    )
+    # The round's dealt events are normally already in memory
+    round_state = round_states.get(game_round_id, request.user)
+    if round_state is None:
+        return Response(
+            {'error': 'Game round or event not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    events_by_id = _round_events(round_state, [uic_event_id])
+    if uic_event_id not in events_by_id:
+        return _event_error(round_state, [uic_event_id])
+    uic_event = events_by_id[uic_event_id]
+
+    # Grade with this event's cached compiled matcher
+    is_correct, matched_answer, confidence, suggestions = grade_guess(uic_event, user_answer)
+
+    # Store the guess and bump the round's counters in one transaction
+    try:
+        guess, current_score, questions_answered = record_guess(
+            game_round_id, request.user, uic_event, user_answer, time_taken, is_correct
+        )
+    except GuessRejected as e:
+        return Response({'error': e.message}, status=e.status_code)
 
-    # Validate answer using fuzzy matching
-    is_correct, matched_answer, confidence = fuzzy_matcher.is_valid_answer(user_answer)
-
-    # Create guess record
-    guess = Guess.objects.create(
-        game_round=game_round,
-        uic_event=uic_event,
-        user_answer=user_answer,
-        time_taken=time_taken,
-        is_correct=is_correct,
-        points_earned=uic_event.points_value if is_correct else 0
+    return Response(
+        _guess_result(uic_event, guess, matched_answer, confidence, suggestions, current_score, questions_answered),
+        status=status.HTTP_200_OK
     )
-    guess.save()
 
-    # Update game round stats
-    game_round.questions_answered += 1
-    if is_correct:
-        game_round.correct_answers += 1
-    game_round.total_score += guess.points_earned
-    game_round.save()
 
-    # Get alternative suggestions if incorrect
-    suggestions = []
-    if not is_correct:
-        suggestions = fuzzy_matcher.get_closest_match(user_answer, top_n=3)
-        suggestions = [{'answer': ans, 'confidence': conf} for ans, conf in suggestions]
+def _round_events(round_state, event_ids):
+    """
+    Events for a round's guesses, keyed by id
 
-    return Response({
-        'is_correct': is_correct,
+    Rounds dealt before question_ids was recorded have no round state to
+    check against, so their events are read from the database.
+    """
+    if round_state.question_ids:
+        return {event_id: round_state.events[event_id] for event_id in event_ids if event_id in round_state.events}
+    return UICEvent.objects.in_bulk(event_ids)
+
+
+def _event_error(round_state, event_ids):
+    """Error response for guesses whose events could not be resolved"""
+    if round_state.question_ids and any(event_id not in round_state.question_ids for event_id in event_ids):
+        return Response(
+            {'error': 'Event is not part of this game round'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(
+        {'error': 'Game round or event not found'},
+        status=status.HTTP_404_NOT_FOUND
+    )
+
+
+def _guess_result(uic_event, guess, matched_answer, confidence, suggestions, current_score, questions_answered):
+    """Response body for one graded guess, shared by submit_guess and submit_guesses_batch"""
+    return {
+        'is_correct': guess.is_correct,
         'points_earned': guess.points_earned,
         'correct_answer': uic_event.name,
         'description': uic_event.description,
@@ -107,54 +282,181 @@ def submit_guess(request):
         'matched_answer': matched_answer,
         'confidence': confidence,
         'suggestions': suggestions,
-        'current_score': game_round.total_score,
-        'questions_remaining': max(0, 7 - game_round.questions_answered)
+        'current_score': current_score,
+        'questions_remaining': max(0, settings.GAMES_ROUND_SIZE - questions_answered)
+    }
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def submit_guesses_batch(request):
+    """
+    Submit several guesses for one round in a single request
+
+    Body: {'game_round_id', 'guesses': [{'uic_event_id', 'answer', 'time_taken'}, ...],
+    'complete': bool}. The guesses are stored all or nothing, with one counter
+    update and one bulk insert (plus the event stats and seen-set updates), so
+    a client can play offline and sync a whole round at once. 'results' holds one submit_guess
+    response per guess, in order; with 'complete' the round is also completed
+    and 'completion' holds the complete_game response.
+
+    Every answer must be a string that fits a Guess row and every time_taken
+    a non-negative integer; otherwise nothing is graded and the 400 response
+    lists the offending positions in 'invalid'.
+    """
+    game_round_id = request.data.get('game_round_id')
+    entries = request.data.get('guesses')
+    if not isinstance(entries, list) or not entries or not all(isinstance(entry, dict) for entry in entries):
+        return Response(
+            {'error': 'guesses must be a non-empty list of {uic_event_id, answer, time_taken}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    fields = [_guess_fields(entry.get('answer'), entry.get('time_taken', 0)) for entry in entries]
+    invalid = [i for i, entry_fields in enumerate(fields) if entry_fields is None]
+    if invalid:
+        return Response(
+            {'error': GUESS_FIELDS_ERROR, 'invalid': invalid},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        game_round_id = int(game_round_id)
+        event_ids = [int(entry.get('uic_event_id')) for entry in entries]
+    except (TypeError, ValueError):
+        return Response(
+            {'error': 'Game round or event not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    round_state = round_states.get(game_round_id, request.user)
+    if round_state is None:
+        return Response(
+            {'error': 'Game round or event not found'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    events_by_id = _round_events(round_state, event_ids)
+    if len(events_by_id) != len(set(event_ids)):
+        return _event_error(round_state, event_ids)
+
+    verdicts = []
+    graded = []
+    for event_id, (answer, time_taken) in zip(event_ids, fields):
+        uic_event = events_by_id[event_id]
+        verdict = grade_guess(uic_event, answer)
+        verdicts.append(verdict)
+        graded.append((uic_event, answer, time_taken, verdict[0]))
+
+    try:
+        guesses, current_score, questions_answered = record_guesses(game_round_id, request.user, graded)
+    except GuessRejected as e:
+        return Response({'error': e.message}, status=e.status_code)
+
+    # Rewind the final counters so each result shows the score as of that guess
+    score = current_score - sum(guess.points_earned for guess in guesses)
+    answered = questions_answered - len(guesses)
+    results = []
+    for guess, (uic_event, *_), (_, matched_answer, confidence, suggestions) in zip(guesses, graded, verdicts):
+        score += guess.points_earned
+        answered += 1
+        results.append(_guess_result(
+            uic_event, guess, matched_answer, confidence, suggestions, score, answered
+        ))
+
+    response = {
+        'results': results,
+        'current_score': current_score,
+        'questions_remaining': max(0, settings.GAMES_ROUND_SIZE - questions_answered)
+    }
+    if request.data.get('complete'):
+        try:
+            response['completion'] = complete_round(game_round_id, request.user)
+        except RoundRejected as e:
+            return Response({'error': e.message}, status=e.status_code)
+    return Response(response, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def suggest_answers(request):
+    """Get "did you mean" suggestions across every event in the catalog"""
+    query = request.query_params.get('q', '')
+    try:
+        limit = min(max(int(request.query_params.get('limit', 5)), 1), 20)
+    except ValueError:
+        return Response(
+            {'error': 'limit must be an integer'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    suggestions = catalog_index.suggest(query, top_k=limit)
+
+    return Response({
+        'query': query,
+        'suggestions': [
+            {
+                'answer': match['answer'],
+                'event_id': match['event_id'],
+                'confidence': match['confidence'],
+            }
+            for match in suggestions
+        ]
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def autocomplete_answers(request):
+    """Get the most popular answers starting with a prefix across the catalog"""
+    prefix = request.query_params.get('q', '')
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 20)
+    except ValueError:
+        return Response(
+            {'error': 'limit must be an integer'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    completions = catalog_index.complete(prefix, limit=limit)
+
+    return Response({
+        'query': prefix,
+        'completions': [
+            {'answer': answer, 'popularity': popularity}
+            for answer, popularity in completions
+        ]
     }, status=status.HTTP_200_OK)
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def complete_game(request):
-    """Complete a game round"""
+    """Complete a game round (profile and leaderboard updates are queued for run_jobs)"""
     game_round_id = request.data.get('game_round_id')
 
     try:
-        game_round = GameRound.objects.get(id=game_round_id, user=request.user)
-    except GameRound.DoesNotExist:
+        summary = complete_round(int(game_round_id), request.user)
+    except (TypeError, ValueError):
         return Response(
             {'error': 'Game round not found'},
             status=status.HTTP_404_NOT_FOUND
         )
+    except RoundRejected as e:
+        return Response({'error': e.message}, status=e.status_code)
 
-    # Mark as completed
-    game_round.is_completed = True
-    game_round.completed_at = timezone.now()
-    game_round.save()
-
-    # Update user profile
-    profile = request.user.profile
-    profile.games_played += 1
-    profile.total_score += game_round.total_score
-    if game_round.total_score > profile.best_score:
-        profile.best_score = game_round.total_score
-    profile.save()
-
-    # Create leaderboard entry
-    from leaderboards.models import LeaderboardEntry
-    LeaderboardEntry.objects.create(
-        user=request.user,
-        game_round=game_round,
-        score=game_round.total_score,
-        accuracy=game_round.accuracy,
-        date=timezone.now().date()
-    )
+    return Response(summary, status=status.HTTP_200_OK)
 
-    accuracy = game_round.accuracy if game_round.questions_answered > 0 else 0
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def grading_metrics(request):
+    """Get grading cache counters for this worker process (staff only)"""
     return Response({
-        'final_score': game_round.total_score,
-        'questions_answered': game_round.questions_answered,
-        'correct_answers': game_round.correct_answers,
-        'accuracy': accuracy,
-        'is_personal_best': game_round.total_score == profile.best_score
+        'matcher_cache': matcher_cache.stats(),
+        'verdict_cache': verdict_cache.stats(),
+        'validation_budget': budget_stats.stats(),
+        'grading_pool': grading_pool.stats() if grading_pool is not None else None,
+        'answer_index': answer_index.stats() if answer_index is not None else None,
+        'difficulty_sampler': {'rebuilds': difficulty_sampler.rebuilds},
+        'round_state': round_states.stats(),
+        'guess_buffer': guess_buffer.stats() if guess_buffer is not None else None,
+        'jobs': job_stats(),
     }, status=status.HTTP_200_OK)
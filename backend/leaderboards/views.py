@@ -3,7 +3,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
 from .models import LeaderboardEntry
 from .serializers import LeaderboardTopScoresSerializer
 
@@ -65,6 +65,43 @@ def top_scores_this_week(request):
     }, status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def top_scores_daily_challenge(request):
+    """Get top daily challenge scores for one day (?date=YYYY-MM-DD, default today)"""
+    limit = int(request.query_params.get('limit', 10))
+
+    try:
+        day = date.fromisoformat(request.query_params['date']) if 'date' in request.query_params \
+            else timezone.localdate()
+    except ValueError:
+        return Response(
+            {'error': 'date must be YYYY-MM-DD'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    entries = LeaderboardEntry.objects.filter(
+        date=day,
+        game_round__round_type='daily'
+    ).select_related('user').order_by('-score', '-accuracy')[:limit]
+
+    results = []
+    for rank, entry in enumerate(entries, 1):
+        results.append({
+            'rank': rank,
+            'user_email': entry.user.email,
+            'score': entry.score,
+            'accuracy': entry.accuracy,
+            'date': entry.date
+        })
+
+    return Response({
+        'leaderboard_type': 'daily',
+        'date': day,
+        'entries': results
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_stats(request):